@@ -12,6 +12,7 @@ from pathlib import Path
 import rich_click as click
 import yaml
 from dateutil.relativedelta import relativedelta
+from google.api_core.exceptions import GoogleAPICallError
 from google.cloud import bigquery
 from google.cloud.exceptions import Conflict, NotFound
 
@@ -747,7 +748,8 @@ def _initiate_backfill(
             scheduling_overrides=scheduling_overrides,
             override_retention_range_limit=override_retention_limit,
         )
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, GoogleAPICallError) as e:
+        # queries are run in-process, or with bq if they can't be
         raise ValueError(
             f"Backfill initiate resulted in error for {qualified_table_name}"
         ) from e
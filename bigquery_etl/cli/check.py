@@ -4,10 +4,13 @@ import re
 import subprocess
 import sys
 import tempfile
+import time
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 from subprocess import CalledProcessError
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
+import attr
 import click
 import sqlparse
 
@@ -15,13 +18,17 @@ from bigquery_etl.format_sql.formatter import reformat
 
 from ..cli.utils import (
     is_authenticated,
+    parallelism_option,
     paths_matching_checks_pattern,
     project_id_option,
     sql_dir_option,
 )
 from ..util.common import render as render_template
+from ..util.query_runner import QueryRunner, UnsupportedQueryArguments
 
 DEFAULT_MARKER = "fail"
+# BigQuery limits the number of concurrent interactive queries per project
+DEFAULT_PARALLELISM = 16
 
 
 def _build_jinja_parameters(query_args):
@@ -170,6 +177,9 @@ def _render(
     help="""
     Runs data checks defined for the query (checks.sql).
 
+    Checks of all matching tables are run concurrently as BigQuery jobs and
+    their outcome and duration are reported once all of them finished.
+
     Example:
 
     \t./bqetl check run ga_derived.downloads_with_attribution_v2 --parameter=download_date:DATE:2023-05-01
@@ -194,8 +204,9 @@ def _render(
     default=False,
     help="To dry run the query to make sure it is valid",
 )
+@parallelism_option(default=DEFAULT_PARALLELISM)
 @click.pass_context
-def run(ctx, dataset, project_id, sql_dir, marker, dry_run):
+def run(ctx, dataset, project_id, sql_dir, marker, dry_run, parallelism):
     """Run a check."""
     if not is_authenticated():
         click.echo(
@@ -204,21 +215,49 @@ def run(ctx, dataset, project_id, sql_dir, marker, dry_run):
         )
         sys.exit(1)
 
-    for checks_file, project_id, dataset_id, table in paths_matching_checks_pattern(
-        dataset, sql_dir, project_id=project_id
-    ):
-        _run_check(
-            checks_file,
-            project_id,
-            dataset_id,
-            table,
-            ctx.args,
-            dry_run=dry_run,
-            marker=marker,
+    # checks of all matching tables are run together
+    checks = [
+        (
+            f"{project_id}.{dataset_id}.{table}",
+            *_rendered_checks(
+                Path(checks_file),
+                project_id,
+                dataset_id,
+                table,
+                ctx.args,
+                marker=marker,
+                dry_run=dry_run,
+            ),
         )
+        for checks_file, project_id, dataset_id, table in paths_matching_checks_pattern(
+            dataset, sql_dir, project_id=project_id
+        )
+        if checks_file is not None
+    ]
+    results = _run_checks(checks, parallelism)
+    _print_check_report(results)
 
+    if not all(result.passed for result in results):
+        sys.exit(1)
 
-def _run_check(
+
+@attr.s(auto_attribs=True)
+class CheckResult:
+    """Outcome of running a single check."""
+
+    table: str
+    index: int
+    query: str
+    duration: float
+    error: Optional[str] = None
+
+    @property
+    def passed(self) -> bool:
+        """Return whether the check passed."""
+        return self.error is None
+
+
+def _rendered_checks(
     checks_file,
     project_id,
     dataset_id,
@@ -226,14 +265,9 @@ def _run_check(
     query_arguments,
     marker=DEFAULT_MARKER,
     dry_run=False,
-):
-    """Run the check."""
-    if checks_file is None:
-        return
-
-    checks_file = Path(checks_file)
-
-    query_arguments.append("--use_legacy_sql=false")
+) -> Tuple[List[str], List[str]]:
+    """Render the checks with the marker and return them with their bq query arguments."""
+    query_arguments = query_arguments + ["--use_legacy_sql=false"]
     if project_id is not None:
         query_arguments.append(f"--project_id={project_id}")
 
@@ -257,32 +291,100 @@ def _run_check(
         **jinja_params,
     )
     result_split_by_marker = _render_result_split_by_marker(marker, rendered_result)
-    checks = sqlparse.split(result_split_by_marker)
-    seek_location = 0
-    check_failed = False
-
-    with tempfile.NamedTemporaryFile(mode="w+") as query_stream:
-        for rendered_check in checks:
-            # since the last check will end with ; the last entry will be empty string.
-            if len(rendered_check) == 0:
-                continue
-            rendered_check = rendered_check.strip()
-            query_stream.write(rendered_check)
-            query_stream.seek(seek_location)
-            seek_location += len(rendered_check)
-
+    # since the last check will end with ; the last entry will be empty string.
+    checks = [
+        rendered_check.strip()
+        for rendered_check in sqlparse.split(result_split_by_marker)
+        if rendered_check.strip()
+    ]
+    return query_arguments, checks
+
+
+def _run_single_check(runner, table, index, query_arguments, query) -> CheckResult:
+    """Run a check and wait for it to finish."""
+    # results of checks aren't used, so they don't need to be printed
+    arguments = ["query", "--format=none"] + query_arguments
+    start = time.monotonic()
+    error = None
+    try:
+        try:
+            runner.submit(arguments, query).result()
+        except UnsupportedQueryArguments:
             # run the query as shell command so that passed parameters can be used as is
-            try:
-                subprocess.check_output(
-                    ["bq", "query"] + query_arguments,
-                    stdin=query_stream,
-                    encoding="UTF-8",
-                )
-            except CalledProcessError as e:
-                print(_parse_check_output(e.output))
-                check_failed = True
-
-    if check_failed:
+            subprocess.check_output(["bq"] + arguments, input=query, encoding="UTF-8")
+    except CalledProcessError as e:
+        error = _parse_check_output(e.output or "")
+    except Exception as e:
+        error = _parse_check_output(str(e))
+    return CheckResult(table, index, query, time.monotonic() - start, error)
+
+
+def _run_checks(
+    checks, parallelism=DEFAULT_PARALLELISM, runner=None
+) -> List[CheckResult]:
+    """Run checks concurrently as BigQuery jobs.
+
+    checks is a list of (table, bq query arguments, rendered checks) tuples. At most
+    parallelism checks are run at the same time, across all tables. Jobs are
+    submitted through runner, or a new QueryRunner if not provided.
+    """
+    if runner is None:
+        runner = QueryRunner(connection_pool_max_size=parallelism)
+    check_queries = [
+        (runner, table, index, query_arguments, query)
+        for table, query_arguments, queries in checks
+        for index, query in enumerate(queries, start=1)
+    ]
+    if not check_queries:
+        return []
+    with ThreadPool(parallelism) as pool:
+        return pool.starmap(_run_single_check, check_queries)
+
+
+def _print_check_report(results: List[CheckResult]):
+    """Print the outcome and duration of each check."""
+    for result in results:
+        status = "PASSED" if result.passed else "FAILED"
+        click.echo(
+            f"{status} {result.table} check {result.index} ({result.duration:.1f}s)"
+        )
+        if not result.passed:
+            click.echo(f"  {result.error}")
+
+    failed = sum(not result.passed for result in results)
+    click.echo(
+        f"{len(results) - failed} of {len(results)} checks passed, {failed} failed "
+        f"({sum(result.duration for result in results):.1f}s total)"
+    )
+
+
+def _run_check(
+    checks_file,
+    project_id,
+    dataset_id,
+    table,
+    query_arguments,
+    marker=DEFAULT_MARKER,
+    dry_run=False,
+    parallelism=DEFAULT_PARALLELISM,
+    runner=None,
+):
+    """Run the check."""
+    if checks_file is None:
+        return
+
+    checks_file = Path(checks_file)
+    query_arguments, checks = _rendered_checks(
+        checks_file, project_id, dataset_id, table, query_arguments, marker, dry_run
+    )
+    results = _run_checks(
+        [(f"{project_id}.{dataset_id}.{table}", query_arguments, checks)],
+        parallelism,
+        runner,
+    )
+    _print_check_report(results)
+
+    if not all(result.passed for result in results):
         sys.exit(1)
 
 
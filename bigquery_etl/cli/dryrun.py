@@ -5,15 +5,13 @@ import glob
 import os
 import re
 import sys
-from functools import partial
-from multiprocessing.pool import Pool
-from typing import List, Set, Tuple
+from typing import List, Set
 
 import rich_click as click
 
-from ..cli.utils import billing_project_option, is_authenticated
+from ..cli.utils import billing_project_option, is_authenticated, parallelism_option
 from ..config import ConfigLoader
-from ..dryrun import DryRun, get_credentials, get_id_token
+from ..dryrun import DryRun, dry_run_many, get_credentials
 
 
 @click.command(
@@ -64,6 +62,7 @@ from ..dryrun import DryRun, get_credentials, get_id_token
     default=ConfigLoader.get("default", "project", fallback="moz-fx-data-shared-prod"),
 )
 @billing_project_option()
+@parallelism_option()
 def dryrun(
     paths: List[str],
     use_cloud_function: bool,
@@ -71,6 +70,7 @@ def dryrun(
     respect_skip: bool,
     project: str,
     billing_project: str,
+    parallelism: int,
 ):
     """Perform a dry run."""
     file_names = (
@@ -97,7 +97,8 @@ def dryrun(
             click.echo(f"Invalid path {path}", err=True)
             sys.exit(1)
     if respect_skip:
-        sql_files -= DryRun.skipped_files()
+        skipped_files = DryRun.skipped_files()
+        sql_files = {file for file in sql_files if file not in skipped_files}
 
     if not sql_files:
         click.echo("Skipping dry run because no queries matched")
@@ -109,23 +110,17 @@ def dryrun(
         )
         sys.exit(1)
 
-    credentials = get_credentials()
-    id_token = get_id_token(credentials=credentials)
-
-    sql_file_valid = partial(
-        _sql_file_valid,
-        use_cloud_function,
-        respect_skip,
-        validate_schemas,
-        credentials=credentials,
-        id_token=id_token,
+    result = dry_run_many(
+        sorted(sql_files),
+        parallelism=parallelism,
+        validate_schemas=validate_schemas,
+        use_cloud_function=use_cloud_function,
+        credentials=get_credentials(),
+        respect_skip=respect_skip,
         billing_project=billing_project,
     )
 
-    with Pool(8) as p:
-        result = p.map(sql_file_valid, sql_files, chunksize=1)
-
-    failures = sorted([r[1] for r in result if not r[0]])
+    failures = [sqlfile for sqlfile, valid in result if not valid]
     if len(failures) > 0:
         click.echo(
             f"Failed to validate {len(failures)} queries (see above for error messages):",
@@ -133,32 +128,3 @@ def dryrun(
         )
         click.echo("\n".join(failures), err=True)
         sys.exit(1)
-
-
-def _sql_file_valid(
-    use_cloud_function,
-    respect_skip,
-    validate_schemas,
-    sqlfile,
-    credentials,
-    id_token,
-    billing_project=None,
-) -> Tuple[bool, str]:
-    """Dry run the SQL file."""
-    result = DryRun(
-        sqlfile,
-        use_cloud_function=use_cloud_function,
-        credentials=credentials,
-        respect_skip=respect_skip,
-        id_token=id_token,
-        billing_project=billing_project,
-    )
-    if validate_schemas:
-        try:
-            success = result.validate_schema()
-        except Exception as e:  # validate_schema raises base exception
-            click.echo(e, err=True)
-            success = False
-        return success, sqlfile
-
-    return result.is_valid(), sqlfile
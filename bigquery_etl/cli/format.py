@@ -34,7 +34,14 @@ from bigquery_etl.format_sql.format import format as format_sql
     " return code 0 indicates nothing would change;"
     " return code 1 indicates some files would be reformatted",
 )
+@click.option(
+    "--no_cache",
+    "--no-cache",
+    default=False,
+    is_flag=True,
+    help="Format all files, including unchanged files that were formatted before",
+)
 @parallelism_option()
-def format(paths, check, parallelism):
+def format(paths, check, no_cache, parallelism):
     """Apply formatting to SQL files."""
-    format_sql(paths, check=check, parallelism=parallelism)
+    format_sql(paths, check=check, parallelism=parallelism, use_cache=not no_cache)
@@ -9,7 +9,6 @@ import multiprocessing
 import os
 import re
 import string
-import subprocess
 import sys
 import tempfile
 from concurrent import futures
@@ -45,14 +44,14 @@ from ..cli.utils import (
     use_cloud_function_option,
 )
 from ..config import ConfigLoader
-from ..dependency import get_dependency_graph
+from ..dependency import get_dependency_graph, get_downstream_graph
 from ..deploy import (
     FailedDeployException,
     SkippedDeployException,
     SkippedExternalDataException,
     deploy_table,
 )
-from ..dryrun import DryRun, get_credentials, get_id_token
+from ..dryrun import DryRun, DryRunSession, get_credentials
 from ..format_sql.format import skip_format
 from ..format_sql.formatter import reformat
 from ..metadata import validate_metadata
@@ -73,6 +72,7 @@ from ..util.bigquery_id import sql_table_id
 from ..util.common import random_str
 from ..util.common import render as render_template
 from ..util.parallel_topological_sorter import ParallelTopologicalSorter
+from ..util.query_runner import QueryRunner
 from .dryrun import dryrun
 from .generate import generate_all
 
@@ -474,6 +474,7 @@ def _backfill_query(
     run_checks,
     checks_file_name,
     billing_project,
+    runner=None,
 ):
     """Run a query backfill for a specific date."""
     project, dataset, table = extract_from_query_path(query_file_path)
@@ -538,6 +539,7 @@ def _backfill_query(
         ),
         query_arguments=arguments,
         billing_project=billing_project,
+        runner=runner,
     )
 
     # Run checks on the query
@@ -554,6 +556,7 @@ def _backfill_query(
             table=table_name,
             query_arguments=check_args,
             dry_run=dry_run,
+            runner=runner,
         )
 
     return True
@@ -736,6 +739,9 @@ def backfill(
         if query_files == []:
             raise click.ClickException(f"No queries matching `{name}` were found.")
 
+    # jobs for all dates are run with shared clients and polled from a single thread
+    runner = QueryRunner(connection_pool_max_size=max(parallelism, 1))
+
     for query_file in query_files:
         query_file_path = Path(query_file)
 
@@ -802,6 +808,7 @@ def backfill(
             run_checks=checks,
             checks_file_name=checks_file_name or DEFAULT_CHECKS_FILE_NAME,
             billing_project=billing_project,
+            runner=runner,
         )
 
         if not depends_on_past and parallelism > 0:
@@ -943,6 +950,7 @@ def _run_query(
     query_arguments,
     addl_templates: Optional[dict] = None,
     billing_project: Optional[str] = None,
+    runner: Optional[QueryRunner] = None,
 ):
     """Run a query.
 
@@ -950,7 +958,12 @@ def _run_query(
     do not have a project id qualifier.
     billing_project is the project to run the query in for the purposes of billing and
     slot reservation selection.  This is project_id if billing_project is not set
+    runner runs the query in-process and can be shared between threads; queries
+    with arguments that have no in-process equivalent are run with bq.
     """
+    if runner is None:
+        runner = QueryRunner()
+
     if billing_project is not None:
         query_arguments.append(f"--project_id={billing_project}")
     elif project_id is not None:
@@ -1061,14 +1074,7 @@ def _run_query(
             # when running the query
             query_arguments.append(f"--dataset_id={dataset_id}")
 
-        # write rendered query to a temporary file;
-        # query string cannot be passed directly to bq as SQL comments will be interpreted as CLI arguments
-        with tempfile.NamedTemporaryFile(mode="w+") as query_stream:
-            query_stream.write(query_text)
-            query_stream.seek(0)
-
-            # run the query as shell command so that passed parameters can be used as is
-            subprocess.check_call(["bq"] + query_arguments, stdin=query_stream)
+        runner.run(query_arguments, query_text)
 
 
 def create_query_session(
@@ -1444,6 +1450,7 @@ def _initialize_in_parallel(
                 dataset,
                 addl_templates=addl_templates,
                 billing_project=billing_project,
+                runner=QueryRunner(connection_pool_max_size=parallelism),
             ),
             [arguments + [f"--parameter=sample_id:INT64:{i}"] for i in sample_ids],
         )
@@ -1744,7 +1751,7 @@ def _render_query(output_dir, resolved_sql_dir, query_file):
         + "\n"
     )
 
-    if not any(s in str(query_file) for s in skip_format()):
+    if query_file not in skip_format():
         rendered_sql = reformat(rendered_sql, trailing_newline=True)
 
     if output_dir:
@@ -1869,7 +1876,9 @@ def update(
         if str(query_file)
         not in ConfigLoader.get("schema", "deploy", "skip", fallback=[])
     ]
-    dependency_graph = get_dependency_graph([sql_dir], without_views=True)
+    downstream_graph = get_downstream_graph(
+        get_dependency_graph([sql_dir], without_views=True)
+    )
     manager = multiprocessing.Manager()
     tmp_tables = manager.dict({})
 
@@ -1895,7 +1904,9 @@ def update(
             query_file_graph[query_file] = []
 
     credentials = get_credentials()
-    id_token = get_id_token(credentials=credentials)
+    if use_cloud_function:
+        # mint the ID token once, forked worker processes reuse it
+        DryRunSession.shared().id_token
 
     ts = ParallelTopologicalSorter(
         query_file_graph, parallelism=parallelism, with_follow_up=update_downstream
@@ -1906,14 +1917,13 @@ def update(
             sql_dir,
             project_id,
             tmp_dataset,
-            dependency_graph,
+            downstream_graph,
             tmp_tables,
             use_cloud_function,
             respect_dryrun_skip,
             update_downstream,
             is_init=is_init,
             credentials=credentials,
-            id_token=id_token,
         )
     )
 
@@ -1928,7 +1938,7 @@ def _update_query_schema_with_downstream(
     sql_dir,
     project_id,
     tmp_dataset,
-    dependency_graph,
+    downstream_graph,
     tmp_tables={},
     use_cloud_function=True,
     respect_dryrun_skip=True,
@@ -1977,11 +1987,10 @@ def _update_query_schema_with_downstream(
                 # get downstream dependencies that will be updated in the next iteration
                 dependencies = [
                     p
-                    for k, refs in dependency_graph.items()
+                    for k in downstream_graph.get(identifier, [])
                     for p in paths_matching_name_pattern(
                         k, sql_dir, project_id, files=("query.sql",)
                     )
-                    if identifier in refs
                 ]
 
                 for d in dependencies:
@@ -2297,7 +2306,6 @@ def deploy(
             raise click.ClickException(f"No queries matching `{name}` were found.")
 
     credentials = get_credentials()
-    id_token = get_id_token(credentials=credentials)
 
     query_file_paths = [query_file.parent for query_file in query_files]
     metadata_files_without_query_file = [
@@ -2321,7 +2329,6 @@ def deploy(
         respect_dryrun_skip=respect_dryrun_skip,
         sql_dir=sql_dir,
         credentials=credentials,
-        id_token=id_token,
     )
 
     failed_deploys, skipped_deploys, external_deploys = [], [], []
@@ -2423,17 +2430,16 @@ def validate_schema(
             raise click.ClickException(f"No queries matching `{name}` were found.")
 
     credentials = get_credentials()
-    id_token = get_id_token(credentials=credentials)
+    id_token = DryRunSession.shared().id_token if use_cloud_function else None
 
     _validate_schema = partial(
         _validate_schema_from_path,
         use_cloud_function=use_cloud_function,
         respect_dryrun_skip=respect_dryrun_skip,
         credentials=credentials,
-        id_token=id_token,
     )
 
-    with Pool(8) as p:
+    with Pool(8, initializer=DryRunSession.seed_shared, initargs=(id_token,)) as p:
         result = p.map(_validate_schema, query_files, chunksize=1)
 
     all_valid = True
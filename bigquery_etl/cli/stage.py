@@ -3,7 +3,9 @@
 import re
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from glob import glob
 from pathlib import Path
 
@@ -16,9 +18,9 @@ from .. import ConfigLoader
 from ..cli.query import deploy as deploy_query_schema
 from ..cli.query import update as update_query_schema
 from ..cli.routine import publish as publish_routine
-from ..cli.utils import paths_matching_name_pattern, sql_dir_option
+from ..cli.utils import parallelism_option, paths_matching_name_pattern, sql_dir_option
 from ..cli.view import publish as publish_view
-from ..dryrun import DryRun, get_id_token
+from ..dryrun import DryRun
 from ..routine.parse_routine import (
     ROUTINE_FILES,
     UDF_FILE,
@@ -28,6 +30,7 @@ from ..routine.parse_routine import (
 )
 from ..schema import SCHEMA_FILE, Schema
 from ..util.common import render
+from ..util.workspace import link_tree, replace_text
 from ..view import View
 
 VIEW_FILE = "view.sql"
@@ -36,6 +39,7 @@ QUERY_SCRIPT = "query.py"
 MATERIALIZED_VIEW = "materialized_view.sql"
 ROOT = Path(__file__).parent.parent.parent
 TEST_DIR = ROOT / "tests" / "sql"
+IDENTIFIER_RE = re.compile(r"[a-zA-Z0-9_]+")
 
 
 @click.group(help="Commands for managing stage deploys")
@@ -91,6 +95,7 @@ def stage():
     help="Remove artifacts that have been updated and deployed to stage from prod folder. This ensures that"
     + " tests don't run on outdated or undeployed artifacts (required for CI)",
 )
+@parallelism_option()
 @click.pass_context
 def deploy(
     ctx,
@@ -101,14 +106,16 @@ def deploy(
     update_references,
     copy_sql_to_tmp_dir,
     remove_updated_artifacts,
+    parallelism,
 ):
     """Deploy provided artifacts to destination project."""
     if copy_sql_to_tmp_dir:
-        # copy SQL to a temporary directory
+        # mirror SQL in a temporary directory, file content is only copied
+        # for files that are changed
         tmp_dir = Path(tempfile.mkdtemp())
         tmp_dir.mkdir(parents=True, exist_ok=True)
         new_sql_dir = tmp_dir / Path(sql_dir).name
-        shutil.copytree(sql_dir, new_sql_dir, dirs_exist_ok=True)
+        link_tree(sql_dir, new_sql_dir)
 
         # rename paths to tmp_dir
         paths = [path.replace(sql_dir, f"{new_sql_dir}/", 1) for path in paths]
@@ -177,7 +184,7 @@ def deploy(
                 sql_content,
                 flags=re.DOTALL,
             )
-            artifact_file.write_text(sql_content)
+            replace_text(artifact_file, sql_content)
             # map materialized views to normal queries
             query_path = Path(artifact_file.parent, QUERY_FILE)
             artifact_file.rename(query_path)
@@ -244,7 +251,14 @@ def deploy(
                 shutil.rmtree(artifact_file.parent)
 
     # deploy to stage
-    _deploy_artifacts(ctx, updated_artifact_files, project_id, dataset_suffix, sql_dir)
+    _deploy_artifacts(
+        ctx,
+        updated_artifact_files,
+        project_id,
+        dataset_suffix,
+        sql_dir,
+        parallelism=parallelism,
+    )
 
 
 def _udf_dependencies(artifact_files):
@@ -269,14 +283,13 @@ def _view_dependencies(artifact_files, sql_dir):
     """Determine view dependencies."""
     view_dependencies = set()
     view_dependency_files = [file for file in artifact_files if file.name == VIEW_FILE]
-    id_token = get_id_token()
     for dep_file in view_dependency_files:
         # all references views and tables need to be deployed in the same stage project
         if dep_file not in artifact_files:
             view_dependencies.add(dep_file)
 
         if dep_file.name == VIEW_FILE:
-            view = View.from_file(dep_file, id_token=id_token)
+            view = View.from_file(dep_file)
 
             for dependency in view.table_references:
                 dependency_components = dependency.split(".")
@@ -316,7 +329,6 @@ def _view_dependencies(artifact_files, sql_dir):
                             project=project,
                             dataset=dataset,
                             table=name,
-                            id_token=id_token,
                             partitioned_by=partitioned_by,
                         )
                         schema.to_yaml_file(path / SCHEMA_FILE)
@@ -343,8 +355,15 @@ def _view_dependencies(artifact_files, sql_dir):
 
 
 def _update_references(artifact_files, project_id, dataset_suffix, sql_dir):
+    """Point references to deployed artifacts to their stage counterparts.
+
+    The identifiers of all artifacts are combined into a single pattern, so that
+    each file is scanned once. Only files that reference any of the artifact
+    names are rendered and rewritten.
+    """
     replace_references = []
     replace_partial_references = []
+    artifact_names = set()
     for artifact_file in artifact_files:
         name = artifact_file.parent.name
         name_pattern = name.replace("*", r"\*")  # match literal *
@@ -368,14 +387,12 @@ def _update_references(artifact_files, project_id, dataset_suffix, sql_dir):
         replace_partial_references += [
             # partially qualified references (like "telemetry.main")
             (
-                re.compile(rf"(?<![\._])`{original_dataset}\.{name_pattern}`"),
+                rf"(?<![\._])`{original_dataset}\.{name_pattern}`",
                 f"`{deployed_project}.{deployed_dataset}.{name}`",
                 original_project,
             ),
             (
-                re.compile(
-                    rf"(?<![\._])`?{original_dataset}`?\.`?{name_pattern}(?![a-zA-Z0-9_])`?"
-                ),
+                rf"(?<![\._])`?{original_dataset}`?\.`?{name_pattern}(?![a-zA-Z0-9_])`?",
                 f"`{deployed_project}`.`{deployed_dataset}`.`{name}`",
                 original_project,
             ),
@@ -383,59 +400,89 @@ def _update_references(artifact_files, project_id, dataset_suffix, sql_dir):
         replace_references += [
             # fully qualified references (like "moz-fx-data-shared-prod.telemetry.main")
             (
-                re.compile(
-                    rf"`{original_project}\.{original_dataset}\.{name_pattern}`"
-                ),
+                rf"`{original_project}\.{original_dataset}\.{name_pattern}`",
                 f"`{deployed_project}.{deployed_dataset}.{name}`",
                 original_project,
             ),
             (
-                re.compile(
-                    rf"(?<![a-zA-Z0-9_])`?{original_project}`?\.`?{original_dataset}`?\.`?{name_pattern}(?![a-zA-Z0-9_])`?"
-                ),
+                rf"(?<![a-zA-Z0-9_])`?{original_project}`?\.`?{original_dataset}`?\.`?{name_pattern}(?![a-zA-Z0-9_])`?",
                 f"`{deployed_project}`.`{deployed_dataset}`.`{name}`",
                 original_project,
             ),
         ]
+        # every reference ends with the artifact name as a separate identifier
+        artifact_names.update(IDENTIFIER_RE.findall(name)[:1])
+
+    rewriters = {}
+
+    def _rewriter(file_project):
+        """Return a function applying all substitutions for files of the project."""
+        if file_project not in rewriters:
+            # fully qualified references take precedence, like they'd be
+            # substituted first if the patterns were applied one after another
+            references = replace_references + [
+                ref for ref in replace_partial_references if ref[2] == file_project
+            ]
+            pattern = re.compile(
+                "|".join(f"(?P<r{i}>{ref[0]})" for i, ref in enumerate(references))
+            )
+            rewriters[file_project] = partial(
+                pattern.sub, lambda match: references[int(match.lastgroup[1:])][1]
+            )
+        return rewriters[file_project]
+
+    def _references_artifacts(sql):
+        return not artifact_names.isdisjoint(IDENTIFIER_RE.findall(sql))
+
+    artifact_files = {artifact_file.resolve() for artifact_file in artifact_files}
 
     for path in map(Path, glob(f"{sql_dir}/**/*.sql", recursive=True)):
-        # apply substitutions
-        if path.is_file():
-            if "is_init()" in path.read_text():
-                init_sql = render(
-                    path.name,
-                    template_folder=path.parent,
-                    format=False,
-                    **{"is_init": lambda: True},
-                )
-                query_sql = render(
-                    path.name,
-                    template_folder=path.parent,
-                    format=False,
-                    **{"is_init": lambda: False},
-                )
-                sql = f"""
+        if not path.is_file():
+            continue
+
+        text = path.read_text()
+        is_artifact = path.resolve() in artifact_files
+        # templates might generate references, so they need to be rendered first
+        is_template = "{{" in text or "{%" in text
+        if not (is_artifact or is_template or _references_artifacts(text)):
+            continue
+
+        if "is_init()" in text:
+            init_sql = render(
+                path.name,
+                template_folder=path.parent,
+                format=False,
+                **{"is_init": lambda: True},
+            )
+            query_sql = render(
+                path.name,
+                template_folder=path.parent,
+                format=False,
+                **{"is_init": lambda: False},
+            )
+            sql = f"""
                     {{% if is_init() %}}
                     {init_sql}
                     {{% else %}}
                     {query_sql}
                     {{% endif %}}
                 """
-            else:
-                sql = render(path.name, template_folder=path.parent, format=False)
+        else:
+            sql = render(path.name, template_folder=path.parent, format=False)
 
-            for ref in replace_references:
-                sql = re.sub(ref[0], ref[1], sql)
-
-            for ref in replace_partial_references:
-                file_project = path.parent.parent.parent.name
-                if file_project == ref[2]:
-                    sql = re.sub(ref[0], ref[1], sql)
+        if not (is_artifact or _references_artifacts(sql)):
+            continue
 
-            path.write_text(sql)
+        # apply substitutions
+        file_project = path.parent.parent.parent.name
+        updated_sql = _rewriter(file_project)(sql)
+        if is_artifact or updated_sql != sql:
+            replace_text(path, updated_sql)
 
 
-def _deploy_artifacts(ctx, artifact_files, project_id, dataset_suffix, sql_dir):
+def _deploy_artifacts(
+    ctx, artifact_files, project_id, dataset_suffix, sql_dir, parallelism=8
+):
     """Deploy routines, tables and views."""
     # give read permissions to dry run accounts
     dataset_access_entries = [
@@ -449,19 +496,7 @@ def _deploy_artifacts(ctx, artifact_files, project_id, dataset_suffix, sql_dir):
         )
     ]
 
-    # deploy routines
     routine_files = [file for file in artifact_files if file.name in ROUTINE_FILES]
-    for routine_file in routine_files:
-        dataset = routine_file.parent.parent.name
-        create_dataset_if_not_exists(
-            project_id=project_id,
-            dataset=dataset,
-            suffix=dataset_suffix,
-            access_entries=dataset_access_entries,
-        )
-    ctx.invoke(publish_routine, name=None, project_id=project_id, dry_run=False)
-
-    # deploy table schemas
     query_files = list(
         {
             file
@@ -471,66 +506,82 @@ def _deploy_artifacts(ctx, artifact_files, project_id, dataset_suffix, sql_dir):
             and "*" not in file.parent.name and file.parent.name != "INFORMATION_SCHEMA"
         }
     )
+    view_files = [
+        file
+        for file in artifact_files
+        if file.name == VIEW_FILE and str(file) not in DryRun.skipped_files()
+    ]
 
-    if len(query_files) > 0:
-        # checking and creating datasets needs to happen sequentially
-        for query_file in query_files:
-            dataset = query_file.parent.parent.name
-            create_dataset_if_not_exists(
+    client = bigquery.Client(project_id)
+    with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as executor:
+        # start creating all datasets upfront, each of them only once; every
+        # deploy stage then only waits for the datasets it deploys to
+        datasets = {
+            file.parent.parent.name for file in routine_files + query_files + view_files
+        }
+        dataset_futures = {
+            dataset: executor.submit(
+                create_dataset_if_not_exists,
                 project_id=project_id,
                 dataset=dataset,
                 suffix=dataset_suffix,
                 access_entries=dataset_access_entries,
+                client=client,
             )
+            for dataset in sorted(datasets)
+        }
 
+        def _wait_for_datasets(files):
+            for file in files:
+                dataset_futures[file.parent.parent.name].result()
+
+        # deploy routines
+        _wait_for_datasets(routine_files)
+        ctx.invoke(publish_routine, name=None, project_id=project_id, dry_run=False)
+
+        # deploy table schemas, these might depend on routines
+        if len(query_files) > 0:
+            _wait_for_datasets(query_files)
+            ctx.invoke(
+                update_query_schema,
+                name=query_files,
+                sql_dir=sql_dir,
+                project_id=project_id,
+                respect_dryrun_skip=True,
+                is_init=True,
+                parallelism=parallelism,
+            )
+            ctx.invoke(
+                deploy_query_schema,
+                name=query_files,
+                sql_dir=sql_dir,
+                project_id=project_id,
+                force=True,
+                respect_dryrun_skip=False,
+                skip_external_data=True,
+                parallelism=parallelism,
+            )
+
+        # deploy views, these might depend on routines and tables
+        _wait_for_datasets(view_files)
         ctx.invoke(
-            update_query_schema,
-            name=query_files,
-            sql_dir=sql_dir,
-            project_id=project_id,
-            respect_dryrun_skip=True,
-            is_init=True,
-        )
-        ctx.invoke(
-            deploy_query_schema,
-            name=query_files,
+            publish_view,
+            name=None,
             sql_dir=sql_dir,
             project_id=project_id,
+            dry_run=False,
+            skip_authorized=False,
             force=True,
-            respect_dryrun_skip=False,
-            skip_external_data=True,
-        )
-
-    # deploy views
-    view_files = [
-        file
-        for file in artifact_files
-        if file.name == VIEW_FILE and str(file) not in DryRun.skipped_files()
-    ]
-    for view_file in view_files:
-        dataset = view_file.parent.parent.name
-        create_dataset_if_not_exists(
-            project_id=project_id,
-            dataset=dataset,
-            suffix=dataset_suffix,
-            access_entries=dataset_access_entries,
+            respect_dryrun_skip=True,
+            parallelism=parallelism,
         )
 
-    ctx.invoke(
-        publish_view,
-        name=None,
-        sql_dir=sql_dir,
-        project_id=project_id,
-        dry_run=False,
-        skip_authorized=False,
-        force=True,
-        respect_dryrun_skip=True,
-    )
 
-
-def create_dataset_if_not_exists(project_id, dataset, suffix=None, access_entries=None):
+def create_dataset_if_not_exists(
+    project_id, dataset, suffix=None, access_entries=None, client=None
+):
     """Create a temporary dataset if not already exists."""
-    client = bigquery.Client(project_id)
+    client = client or bigquery.Client(project_id)
     dataset = bigquery.Dataset(f"{project_id}.{dataset}")
     dataset.location = "US"
     dataset = client.create_dataset(dataset, exists_ok=True)
@@ -4,7 +4,6 @@ import fnmatch
 import os
 import re
 from fnmatch import fnmatchcase
-from glob import glob
 from pathlib import Path
 from typing import Iterator, List, Optional, Tuple
 
@@ -14,6 +13,7 @@ from google.cloud import bigquery
 
 from bigquery_etl.config import ConfigLoader
 from bigquery_etl.util.common import TempDatasetReference, project_dirs
+from bigquery_etl.util.sql_catalog import SqlCatalog
 
 QUERY_FILE_RE = re.compile(
     r"^.*/([a-zA-Z0-9-]+)/([a-zA-Z0-9_]+)/([a-zA-Z0-9_]+(_v[0-9]+)?)/"
@@ -116,36 +116,25 @@ def paths_matching_name_pattern(
                 str(p), sql_path, project_id, files, file_regex
             )
     elif os.path.isdir(pattern):
-        for root, _, _ in os.walk(pattern, followlinks=True):
-            for file in files:
-                matching_files.extend(
-                    map(Path, glob(f"{root}/**/{file}", recursive=True))
-                )
+        matching_files.extend(SqlCatalog.for_path(pattern).files(files))
     elif os.path.isfile(pattern):
         matching_files.append(Path(pattern))
     else:
-        sql_path = Path(sql_path)
-        if project_id is not None:
-            sql_path = sql_path / project_id
 
-        all_matching_files: List[Path] = []
-
-        for file in files:
-            all_matching_files.extend(
-                map(Path, glob(f"{sql_path}/**/{file}", recursive=True))
+        def matches_pattern(artifact):
+            query_name = ".".join(artifact)
+            return fnmatchcase(query_name, f"*{pattern}") or bool(
+                project_id and fnmatchcase(query_name, f"{project_id}.{pattern}")
             )
 
-        for query_file in all_matching_files:
-            match = file_regex.match(str(query_file))
-            if match:
-                project = match.group(1)
-                dataset = match.group(2)
-                table = match.group(3)
-                query_name = f"{project}.{dataset}.{table}"
-                if fnmatchcase(query_name, f"*{pattern}"):
-                    matching_files.append(query_file)
-                elif project_id and fnmatchcase(query_name, f"{project_id}.{pattern}"):
-                    matching_files.append(query_file)
+        for _, query_files in SqlCatalog.for_path(sql_path).artifacts(
+            files, subdir=project_id, key_filter=matches_pattern
+        ):
+            matching_files.extend(
+                query_file
+                for query_file in query_files
+                if file_regex.match(str(query_file))
+            )
 
     if len(matching_files) == 0:
         print(f"No files matching: {pattern}, {files}")
@@ -4,6 +4,7 @@ import logging
 import re
 import string
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from fnmatch import fnmatchcase
 from functools import partial
 from graphlib import TopologicalSorter
@@ -11,7 +12,6 @@ from multiprocessing.pool import Pool, ThreadPool
 from traceback import print_exc
 
 import rich_click as click
-from google.cloud import bigquery
 
 from ..cli.utils import (
     parallelism_option,
@@ -21,7 +21,7 @@ from ..cli.utils import (
     sql_dir_option,
 )
 from ..config import ConfigLoader
-from ..dryrun import DryRun, get_credentials, get_id_token
+from ..dryrun import DryRun, DryRunSession, get_credentials
 from ..metadata.parse_metadata import METADATA_FILE, Metadata
 from ..util.bigquery_id import sql_table_id
 from ..util.client_queue import ClientQueue
@@ -104,10 +104,13 @@ def validate(
     view_files = paths_matching_name_pattern(
         name, sql_dir, project_id, files=("view.sql",)
     )
-    id_token = get_id_token()
-    views = [View.from_file(f, id_token=id_token) for f in view_files]
+    views = [View.from_file(f) for f in view_files]
 
-    with Pool(parallelism) as p:
+    with Pool(
+        parallelism,
+        initializer=DryRunSession.seed_shared,
+        initargs=(DryRunSession.shared().id_token,),
+    ) as p:
         result = p.map(_view_is_valid, views)
     if not all(result):
         sys.exit(1)
@@ -200,6 +203,8 @@ def publish(
         logging.basicConfig(level=log_level, format="%(levelname)s %(message)s")
     except ValueError as e:
         raise click.ClickException(f"argument --log-level: {e}")
+    # views are published sequentially with --parallelism=0
+    parallelism = max(parallelism, 1)
     credentials = get_credentials()
 
     views = _collect_views(name, sql_dir, project_id, user_facing_only, skip_authorized)
@@ -224,25 +229,57 @@ def publish(
         for view in views
     }
 
-    view_id_order = TopologicalSorter(view_id_graph).static_order()
-
-    client = bigquery.Client(credentials=credentials)
+    # all threads share a client with a connection pool large enough for each of them
+    client_q = ClientQueue(
+        [None],
+        parallelism,
+        connection_pool_max_size=parallelism,
+        credentials=credentials,
+    )
 
-    result = []
-    for view_id in view_id_order:
+    def _publish_view(view_id):
         try:
-            result.append(views_by_id[view_id].publish(target_project, dry_run, client))
+            return client_q.with_client(
+                partial(views_by_id[view_id].publish, target_project, dry_run)
+            )
         except Exception:
             print(f"Failed to publish view: {view_id}")
             print_exc()
-            result.append(False)
+            return False
 
-    if not all(result):
+    result = _map_in_dependency_order(_publish_view, view_id_graph, parallelism)
+
+    failed_view_ids = [view_id for view_id, success in result.items() if not success]
+    if failed_view_ids:
+        print(f"Failed to publish views: {', '.join(sorted(failed_view_ids))}")
         sys.exit(1)
 
     click.echo("All have been published.")
 
 
+def _map_in_dependency_order(func, dependencies, parallelism):
+    """Call func for each node of the graph concurrently and return the results.
+
+    Nodes are processed as soon as all of their dependencies have been
+    processed, regardless of whether func succeeded for them.
+    """
+    sorter = TopologicalSorter(dependencies)
+    sorter.prepare()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        pending = {}
+        while sorter.is_active():
+            for node in sorter.get_ready():
+                pending[executor.submit(func, node)] = node
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                results[node] = future.result()
+                sorter.done(node)
+    return results
+
+
 def _view_has_changes(target_project, credentials, view):
     return view.has_changes(target_project, credentials)
 
@@ -251,9 +288,7 @@ def _collect_views(name, sql_dir, project_id, user_facing_only, skip_authorized)
     view_files = paths_matching_name_pattern(
         name, sql_dir, project_id, files=("view.sql",)
     )
-    id_token = get_id_token()
-
-    views = [View.from_file(f, id_token=id_token) for f in view_files]
+    views = [View.from_file(f) for f in view_files]
     if user_facing_only:
         views = [v for v in views if v.is_user_facing]
     if skip_authorized:
@@ -9,9 +9,9 @@ or to process only a specific list of tables.
 
 import json
 import logging
+import math
 from datetime import datetime, timedelta
 from functools import partial
-from itertools import groupby
 from multiprocessing.pool import ThreadPool
 
 import click
@@ -25,6 +25,23 @@ from bigquery_etl.util.common import TempDatasetReference
 
 from .cli.utils import parallelism_option, project_id_option
 
+# live partition bytes per deduplication query with --auto-slices
+DEFAULT_BYTES_PER_SLICE = 256 * 2**30
+# slices that exceed resources are not split into parts shorter than this
+MIN_SLICE_DURATION = timedelta(minutes=5)
+
+PARTITIONS_QUERY = """
+SELECT
+  table_name,
+  partition_id,
+  total_logical_bytes,
+  total_rows
+FROM
+  `{dataset}.INFORMATION_SCHEMA.PARTITIONS`
+WHERE
+  partition_id IN UNNEST(@partition_ids)
+"""
+
 QUERY_TEMPLATE = """
 WITH
   -- Distinct document_ids and their minimum submission_timestamp today
@@ -81,6 +98,100 @@ WHERE
 """
 
 
+def _temp_table_ddl(stable_table):
+    """Return DDL for temporary tables holding slices of stable_table.
+
+    Temporary tables have stable_table's time_partitioning and clustering_fields,
+    and a 1-day expiration.
+    """
+    ddl = "CREATE TABLE\n  `{dest}`"
+    ddl += f"\nPARTITION BY\n  DATE({stable_table.time_partitioning.field})"
+    if stable_table.clustering_fields:
+        ddl += f"\nCLUSTER BY\n  {', '.join(stable_table.clustering_fields)}"
+    ddl += (
+        "\nOPTIONS"
+        "\n  ("
+        "\n    partition_expiration_days = CAST('inf' AS FLOAT64),"
+        "\n    expiration_timestamp = "
+        "TIMESTAMP_ADD(CURRENT_TIMESTAMP, INTERVAL 1 DAY)"
+        "\n  )"
+    )
+    return ddl
+
+
+def _query_parameters(start_time, end_time, preceding_days):
+    return [
+        bigquery.ScalarQueryParameter("start_time", "TIMESTAMP", start_time),
+        bigquery.ScalarQueryParameter("end_time", "TIMESTAMP", end_time),
+        bigquery.ScalarQueryParameter("num_preceding_days", "INT64", preceding_days),
+    ]
+
+
+def _get_slice_job_configs(
+    live_table,
+    stable_table,
+    params,
+    preceding_days,
+    num_retries,
+    temp_dataset,
+    split,
+    **kwargs,
+):
+    """Return query jobs writing each time slice between params to a temp table."""
+    sql = QUERY_TEMPLATE.format(live_table=live_table)
+    ddl = _temp_table_ddl(stable_table)
+    return [
+        (
+            f"{ddl.format(dest=temp_dataset.temp_table())}\nAS\n{sql.strip()}",
+            stable_table,
+            bigquery.QueryJobConfig(
+                query_parameters=_query_parameters(
+                    params[i], params[i + 1], preceding_days
+                ),
+                **kwargs,
+            ),
+            num_retries,
+            split,
+        )
+        for i in range(len(params) - 1)
+    ]
+
+
+def _split_slice(
+    live_table,
+    preceding_days,
+    num_retries,
+    temp_dataset,
+    client,
+    stable_table,
+    job_config,
+):
+    """Return query jobs for the two halves of the time slice in job_config.
+
+    Returns an empty list if the slice is too short to be split further.
+    """
+    params = {param.name: param.value for param in job_config.query_parameters}
+    start_time, end_time = params["start_time"], params["end_time"]
+    if end_time - start_time < MIN_SLICE_DURATION * 2:
+        return []
+    if isinstance(stable_table, str):
+        stable_table = client.get_table(stable_table)
+    return _get_slice_job_configs(
+        live_table,
+        stable_table,
+        [start_time, start_time + (end_time - start_time) / 2, end_time],
+        preceding_days,
+        num_retries,
+        temp_dataset,
+        split=partial(
+            _split_slice, live_table, preceding_days, num_retries, temp_dataset
+        ),
+        use_legacy_sql=False,
+        dry_run=job_config.dry_run,
+        priority=job_config.priority,
+    )
+
+
 def _get_query_job_configs(
     client,
     live_table,
@@ -91,97 +202,96 @@ def _get_query_job_configs(
     preceding_days,
     num_retries,
     temp_dataset,
+    auto_slices=False,
 ):
-    sql = QUERY_TEMPLATE.format(live_table=live_table)
     stable_table = f"{live_table.replace('_live.', '_stable.', 1)}${date:%Y%m%d}"
     kwargs = dict(use_legacy_sql=False, dry_run=dry_run, priority=priority)
     start_time = datetime(*date.timetuple()[:6])
     end_time = start_time + timedelta(days=1)
+    split = (
+        partial(_split_slice, live_table, preceding_days, num_retries, temp_dataset)
+        if auto_slices
+        else None
+    )
     if slices > 1:
-        # create temporary tables with stable_table's time_partitioning and
-        # clustering_fields, and a 1-day expiration
-        stable_table = client.get_table(stable_table)
-        ddl = "CREATE TABLE\n  `{dest}`"
-        ddl += f"\nPARTITION BY\n  DATE({stable_table.time_partitioning.field})"
-        if stable_table.clustering_fields:
-            ddl += f"\nCLUSTER BY\n  {', '.join(stable_table.clustering_fields)}"
-        ddl += (
-            "\nOPTIONS"
-            "\n  ("
-            "\n    partition_expiration_days = CAST('inf' AS FLOAT64),"
-            "\n    expiration_timestamp = "
-            "TIMESTAMP_ADD(CURRENT_TIMESTAMP, INTERVAL 1 DAY)"
-            "\n  )"
-        )
         slice_size = (end_time - start_time) / slices
         params = [start_time + slice_size * i for i in range(slices)] + [
             end_time
         ]  # explicitly use end_time to avoid rounding errors
-        return [
-            (
-                f"{ddl.format(dest=temp_dataset.temp_table())}\nAS\n{sql.strip()}",
-                stable_table,
-                bigquery.QueryJobConfig(
-                    query_parameters=[
-                        bigquery.ScalarQueryParameter(
-                            "start_time", "TIMESTAMP", params[i]
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "end_time", "TIMESTAMP", params[i + 1]
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "num_preceding_days", "INT64", preceding_days
-                        ),
-                    ],
-                    **kwargs,
-                ),
-                num_retries,
-            )
-            for i in range(slices)
-        ]
+        return _get_slice_job_configs(
+            live_table,
+            client.get_table(stable_table),
+            params,
+            preceding_days,
+            num_retries,
+            temp_dataset,
+            split,
+            **kwargs,
+        )
     else:
         return [
             (
-                sql,
+                QUERY_TEMPLATE.format(live_table=live_table),
                 stable_table,
                 bigquery.QueryJobConfig(
                     destination=stable_table,
                     write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-                    query_parameters=[
-                        bigquery.ScalarQueryParameter(
-                            "start_time", "TIMESTAMP", start_time
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "end_time", "TIMESTAMP", end_time
-                        ),
-                        bigquery.ScalarQueryParameter(
-                            "num_preceding_days", "INT64", preceding_days
-                        ),
-                    ],
+                    query_parameters=_query_parameters(
+                        start_time, end_time, preceding_days
+                    ),
                     **kwargs,
                 ),
                 num_retries,
+                split,
             )
         ]
 
 
-def _run_deduplication_query(client, sql, stable_table, job_config, num_retries):
+def _is_resources_exceeded(error):
+    return any(e.get("reason") == "resourcesExceeded" for e in error.errors) or (
+        "Resources exceeded" in str(error)
+    )
+
+
+def _run_deduplication_query(
+    client, sql, stable_table, job_config, num_retries, split=None
+):
+    """Run a deduplication query and return stable_table with the query jobs.
+
+    If split is set, slices that fail because resources were exceeded are split
+    up and each part is run separately.
+    """
     query_job = client.query(sql, job_config, job_id_prefix="copy_dedup_")
     if not query_job.dry_run:
         try:
             query_job.result()
         except BadRequest as e:
+            split_jobs = (
+                split(client, stable_table, job_config)
+                if split is not None and _is_resources_exceeded(e)
+                else []
+            )
+            if split_jobs:
+                logging.warning(
+                    f"Resources exceeded for {stable_table}, splitting slice with"
+                    f" params: {job_config.query_parameters}"
+                )
+                return stable_table, [
+                    query_job
+                    for args in split_jobs
+                    for query_job in _run_deduplication_query(client, *args)[1]
+                ]
             if num_retries <= 0:
                 raise
             logging.warn("Encountered bad request, retrying: ", e)
             return _run_deduplication_query(
-                client, sql, stable_table, job_config, num_retries - 1
+                client, sql, stable_table, job_config, num_retries - 1, split
             )
     logging.info(
         f"Completed query job {query_job.job_id} for {stable_table}"
         f" with params: {job_config.query_parameters}"
     )
-    return stable_table, query_job
+    return stable_table, [query_job]
 
 
 def _copy_join_parts(client, stable_table, query_jobs):
@@ -202,7 +312,9 @@ def _copy_join_parts(client, stable_table, query_jobs):
             f" slot hours to populate {stable_table}"
         )
         if len(query_jobs) > 1:
-            partition_id = stable_table.table_id.split("$", 1)[1]
+            # stable_table is only a table id if the query wasn't sliced up front
+            table_id = getattr(stable_table, "table_id", stable_table)
+            partition_id = table_id.split("$", 1)[1]
             sources = [
                 f"{sql_table_id(job.destination)}${partition_id}" for job in query_jobs
             ]
@@ -217,6 +329,100 @@ def _copy_join_parts(client, stable_table, query_jobs):
             logging.info(f"Deleted {len(query_jobs)} temporary tables")
 
 
+def _run_pipelined(client_q, pool, copy_pool, table_jobs):
+    """Deduplicate tables and copy each one as soon as all of its slices are done.
+
+    table_jobs contains the deduplication query jobs for each stable table. Copy
+    jobs run in copy_pool with the default client, so they don't wait for query
+    slots. Returns the stable tables that could not be populated.
+    """
+    finished, failed = [], []
+
+    def _finish(stable_table, error=None):
+        if error is None:
+            finished.append(stable_table)
+            logging.info(
+                f"Populated {stable_table} ({len(finished)}/{len(table_jobs)} tables)"
+            )
+        else:
+            failed.append(stable_table)
+            logging.error(f"Failed to populate {stable_table}: {error}")
+
+    def _submit(jobs):
+        stable_table = jobs[0][1]
+        query_jobs = [None] * len(jobs)
+        errors = []
+        pending = len(jobs)
+
+        # callbacks are run sequentially by the pool's result handler thread
+        def _slice_done(i, result):
+            nonlocal pending
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                query_jobs[i] = result[1]
+            pending -= 1
+            if pending > 0:
+                return
+            if errors:
+                _finish(stable_table, errors[0])
+            else:
+                copy_pool.apply_async(
+                    _copy_join_parts,
+                    (
+                        client_q.default_client,
+                        stable_table,
+                        [job for slice_jobs in query_jobs for job in slice_jobs],
+                    ),
+                    callback=lambda _: _finish(stable_table),
+                    error_callback=partial(_finish, stable_table),
+                )
+
+        for i, args in enumerate(jobs):
+            pool.apply_async(
+                client_q.with_client,
+                (_run_deduplication_query, *args),
+                callback=partial(_slice_done, i),
+                error_callback=partial(_slice_done, i),
+            )
+
+    for jobs in table_jobs:
+        _submit(jobs)
+
+    # copy jobs are submitted from query callbacks, so wait for queries first
+    pool.close()
+    pool.join()
+    copy_pool.close()
+    copy_pool.join()
+    return failed
+
+
+def _get_partition_sizes(client, pool, live_tables, dates):
+    """Return logical bytes and row count of the live table partitions for dates."""
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ArrayQueryParameter(
+                "partition_ids", "STRING", [f"{date:%Y%m%d}" for date in dates]
+            )
+        ]
+    )
+    datasets = sorted({live_table.rsplit(".", 1)[0] for live_table in live_tables})
+    results = pool.map(
+        lambda dataset: client.query(
+            PARTITIONS_QUERY.format(dataset=dataset), job_config
+        ).result(),
+        datasets,
+    )
+    return {
+        (
+            f"{dataset}.{row.table_name}",
+            datetime.strptime(row.partition_id, "%Y%m%d").date(),
+        ): (row.total_logical_bytes, row.total_rows)
+        for dataset, rows in zip(datasets, results)
+        for row in rows
+    }
+
+
 def _contains_glob(patterns):
     return any(set("*?[").intersection(pattern) for pattern in patterns)
 
@@ -310,6 +516,23 @@ def _list_live_tables(client, pool, project_id, only_tables, table_filter):
     is_flag=True,
     help="Deduplicate one hour at a time; equivalent to --slices=24",
 )
+@click.option(
+    "--auto-slices",
+    "--auto_slices",
+    is_flag=True,
+    help=(
+        "Pick the number of slices per table based on the size of its live "
+        "partition, and split slices that fail because resources were exceeded; "
+        "overrides --slices and --hourly for tables with partition metadata"
+    ),
+)
+@click.option(
+    "--bytes-per-slice",
+    "--bytes_per_slice",
+    type=int,
+    default=DEFAULT_BYTES_PER_SLICE,
+    help="Target number of live partition bytes per slice with --auto-slices",
+)
 @click.option(
     "--preceding_days",
     "--preceding-days",
@@ -358,6 +581,8 @@ def copy_deduplicate(
     temp_dataset,
     slices,
     hourly,
+    auto_slices,
+    bytes_per_slice,
     preceding_days,
     num_retries,
     billing_projects,
@@ -388,33 +613,43 @@ def copy_deduplicate(
                 table_filter=table_filter,
             )
 
-            query_jobs = [
-                (_run_deduplication_query, *args)
-                for jobs in pool.starmap(
-                    _get_query_job_configs,
-                    [
-                        (
-                            client,  # only use one client to create temp tables
-                            live_table,
-                            date,
-                            dry_run,
-                            slices,
-                            priority,
-                            preceding_days,
-                            num_retries,
-                            temp_dataset,
-                        )
-                        for live_table in live_tables
-                        for date in dates
-                    ],
-                )
-                for args in jobs
-            ]
+            table_slices = {}
+            if auto_slices:
+                partition_sizes = _get_partition_sizes(client, pool, live_tables, dates)
+                for (live_table, date), (size, rows) in partition_sizes.items():
+                    table_slices[live_table, date] = max(
+                        1, math.ceil((size or 0) / bytes_per_slice)
+                    )
+                    logging.info(
+                        f"Using {table_slices[live_table, date]} slices for"
+                        f" {live_table} on {date} with {size} bytes in {rows} rows"
+                    )
 
-        # preserve query_jobs order so results stay sorted by stable_table for groupby
-        results = pool.starmap(client_q.with_client, query_jobs, chunksize=1)
-        copy_jobs = [
-            (_copy_join_parts, stable_table, [query_job for _, query_job in group])
-            for stable_table, group in groupby(results, key=lambda result: result[0])
-        ]
-        pool.starmap(client_q.with_client, copy_jobs, chunksize=1)
+            table_jobs = pool.starmap(
+                _get_query_job_configs,
+                [
+                    (
+                        client,  # only use one client to create temp tables
+                        live_table,
+                        date,
+                        dry_run,
+                        table_slices.get((live_table, date), slices),
+                        priority,
+                        preceding_days,
+                        num_retries,
+                        temp_dataset,
+                        auto_slices,
+                    )
+                    for live_table in live_tables
+                    for date in dates
+                ],
+            )
+
+        with ThreadPool(parallelism) as copy_pool:
+            failed = _run_pipelined(client_q, pool, copy_pool, table_jobs)
+
+    if failed:
+        raise click.ClickException(
+            f"Failed to populate {len(failed)} stable tables: "
+            + ", ".join(map(str, failed))
+        )
@@ -1,12 +1,13 @@
 """Build and use query dependency graphs."""
 
+import hashlib
+import os
 import re
 import sys
-from glob import glob
 from itertools import groupby
 from pathlib import Path
 from subprocess import CalledProcessError
-from typing import Dict, Iterator, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import rich_click as click
 import sqlglot
@@ -14,9 +15,24 @@ import yaml
 
 from bigquery_etl.config import ConfigLoader
 from bigquery_etl.schema.stable_table_schema import get_stable_table_schemas
-from bigquery_etl.util.common import render
+from bigquery_etl.util.common import render, template_hash
+from bigquery_etl.util.disk_cache import DiskCache
+from bigquery_etl.util.sql_catalog import SqlCatalog
+
+# bump to invalidate persisted table references when their resolution changes
+REFERENCES_CACHE_VERSION = 2
+REFERENCES_CACHE_TTL = 7 * 24 * 60 * 60
+# recorded instead of the hash of views whose references can't be cached, so that
+# results resolved through them never match and are re-resolved
+UNCACHEABLE_VIEW = "uncacheable"
+
+# table references and the hashes of the view files they were resolved through
+References = Tuple[List[str], Dict[str, Optional[str]]]
 
 stable_views = None
+# view references memoized by path and content hash, since popular views are
+# referenced by many queries
+_view_references: Dict[Tuple[Path, Optional[str]], References] = {}
 
 
 def _raw_table_name(table: sqlglot.exp.Table) -> str:
@@ -66,10 +82,103 @@ def extract_table_references(sql: str) -> List[str]:
     return sorted(tables)
 
 
-def extract_table_references_without_views(path: Path) -> Iterator[str]:
-    """Recursively search for non-view tables referenced in the given SQL file."""
+def _file_hash(path: Path) -> Optional[str]:
+    """Return the hash of the file content or None if the file doesn't exist."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _render_inputs_key(path: Path) -> Optional[str]:
+    """Return a key of the inputs the file renders from, or None if it can't be cached.
+
+    Besides the file and the templates it may include, rendering depends on the
+    render skip list. Metrics are rendered from metric-hub definitions that can
+    change independently of the file, so their references are never cached.
+    """
+    try:
+        if "metrics." in path.read_text():
+            return None
+    except OSError:
+        # missing files are reported when rendering
+        return None
+    return DiskCache.key(
+        template_hash(path), ConfigLoader.get("render", "skip", fallback=[])
+    )
+
+
+def _references_cache() -> DiskCache:
+    return DiskCache("table_references", ttl=REFERENCES_CACHE_TTL)
+
+
+def _cached_references(cache: DiskCache, key: str) -> Optional[References]:
+    """Return persisted references if none of the views they depend on changed."""
+    entry = cache.get(key)
+    if entry is None or any(
+        _file_hash(Path(view_path)) != view_hash
+        for view_path, view_hash in entry["view_hashes"].items()
+    ):
+        return None
+    return entry["references"], entry["view_hashes"]
+
+
+def _view_table_references(
+    view_path: Path,
+    view_hash: Optional[str],
+    use_cache: bool,
+    expanding: Tuple[Path, ...],
+) -> References:
+    """Return the memoized non-view table references of a view."""
+    resolved_path = view_path.resolve()
+    memo_key = (resolved_path, view_hash)
+    if memo_key in _view_references:
+        return _view_references[memo_key]
+
+    if resolved_path in expanding:
+        cycle = expanding[expanding.index(resolved_path) :] + (resolved_path,)
+        raise ValueError("Circular view reference: " + " -> ".join(map(str, cycle)))
+
+    inputs_key = _render_inputs_key(view_path) if use_cache else None
+    if inputs_key is not None:
+        cache = _references_cache()
+        key = DiskCache.key(
+            REFERENCES_CACHE_VERSION, "view", str(resolved_path), inputs_key
+        )
+        references = _cached_references(cache, key)
+        if references is None:
+            references = _table_references_without_views(
+                view_path, use_cache, expanding
+            )
+            cache.set(key, {"references": references[0], "view_hashes": references[1]})
+    elif use_cache:
+        references = _table_references_without_views(view_path, use_cache, expanding)
+        # files referencing this view can't be cached either
+        references = (
+            references[0],
+            {**references[1], str(resolved_path): UNCACHEABLE_VIEW},
+        )
+    else:
+        references = _table_references_without_views(view_path, use_cache, expanding)
+
+    _view_references[memo_key] = references
+    return references
+
+
+def _table_references_without_views(
+    path: Path, use_cache: bool = False, expanding: Tuple[Path, ...] = ()
+) -> References:
+    """Recursively search for non-view tables referenced in the given SQL file.
+
+    Also returns the hashes of all view files that were looked up while resolving
+    references, with None for views that don't exist. `expanding` holds the views
+    that are currently being resolved and is used to detect circular references.
+    """
     global stable_views
 
+    expanding = (*expanding, path.resolve())
+    references = []
+    view_hashes: Dict[str, Optional[str]] = {}
     sql = render(path.name, template_folder=path.parent)
     for table in extract_table_references(sql):
         ref_base = path.parent
@@ -92,8 +201,13 @@ def extract_table_references_without_views(path: Path) -> Iterator[str]:
         for view_path in view_paths:
             if view_path == path:
                 continue  # skip self references
+            view_hash = view_hashes[str(view_path.resolve())] = _file_hash(view_path)
             if view_path.is_file():
-                yield from extract_table_references_without_views(view_path)
+                view_references, view_view_hashes = _view_table_references(
+                    view_path, view_hash, use_cache, expanding
+                )
+                references += view_references
+                view_hashes.update(view_view_hashes)
                 break
         else:
             # use directory structure to fully qualify table names
@@ -127,26 +241,134 @@ def extract_table_references_without_views(path: Path) -> Iterator[str]:
                         ),
                         *stable_views[parts[-2:]],
                     )
-            yield ".".join(parts)
+            references.append(".".join(parts))
+    return references, view_hashes
+
+
+def extract_table_references_without_views(
+    path: Path, use_cache: bool = False
+) -> Iterator[str]:
+    """Recursively search for non-view tables referenced in the given SQL file.
+
+    Expanded views are memoized for the lifetime of the process, and with
+    `use_cache` are also persisted on disk keyed by the view file content.
+    Raises ValueError if views reference each other in a cycle.
+    """
+    yield from _table_references_without_views(path, use_cache)[0]
+
+
+def table_references_without_views(path: Path, use_cache=True) -> List[str]:
+    """Return non-view tables referenced in the given SQL file.
+
+    Results are persisted on disk keyed by the content of the file, the templates
+    it may include and the render skip list; files using metrics aren't cached.
+    Cached results are reused as long as none of the views they were resolved
+    through changed, and no view was added for a table that had been referenced
+    directly.
+    """
+    path = Path(path)
+    if not use_cache:
+        return list(extract_table_references_without_views(path))
+
+    inputs_key = _render_inputs_key(path)
+    if inputs_key is None:
+        return list(extract_table_references_without_views(path, use_cache))
+
+    cache = _references_cache()
+    key = DiskCache.key(REFERENCES_CACHE_VERSION, str(path.resolve()), inputs_key)
+    references = _cached_references(cache, key)
+    if references is None:
+        references = _table_references_without_views(path, use_cache)
+        cache.set(key, {"references": references[0], "view_hashes": references[1]})
+    return references[0]
+
+
+class _ReferenceIndex:
+    """Persistent index of the table references of SQL files.
+
+    Files are only rendered and parsed again if their content or the templates
+    in their directory changed, or if one of the views their references were
+    resolved through changed.
+    """
+
+    def __init__(self, without_views: bool):
+        self.without_views = without_views
+        self.cache = DiskCache("dependency_graph", ttl=REFERENCES_CACHE_TTL)
+        self.key = DiskCache.key(REFERENCES_CACHE_VERSION, without_views)
+        self.entries: Dict[str, dict] = self.cache.get(self.key, {})
+        # views are shared by many files, so hash each of them once
+        self._view_hashes: Dict[str, Optional[str]] = {}
+
+    def _view_hash(self, view_path: str) -> Optional[str]:
+        if view_path not in self._view_hashes:
+            self._view_hashes[view_path] = _file_hash(Path(view_path))
+        return self._view_hashes[view_path]
+
+    def references(self, path: Path) -> List[str]:
+        """Return the table references of path, re-parsing it only if it changed."""
+        abs_path = os.path.abspath(path)
+        content_hash = _render_inputs_key(path)
+        entry = self.entries.get(abs_path)
+        if (
+            content_hash is not None
+            and entry is not None
+            and entry["hash"] == content_hash
+            and all(
+                self._view_hash(view_path) == view_hash
+                for view_path, view_hash in entry["view_hashes"].items()
+            )
+        ):
+            return entry["references"]
+
+        if self.without_views:
+            references, view_hashes = _table_references_without_views(
+                path, use_cache=True
+            )
+        else:
+            sql = render(path.name, template_folder=path.parent)
+            references, view_hashes = extract_table_references(sql), {}
+        if content_hash is None:
+            self.entries.pop(abs_path, None)
+        else:
+            self.entries[abs_path] = {
+                "hash": content_hash,
+                "references": references,
+                "view_hashes": view_hashes,
+            }
+        return references
+
+    def save(self):
+        """Persist the index, dropping entries of files that no longer exist."""
+        self.cache.set(
+            self.key,
+            {
+                path: entry
+                for path, entry in self.entries.items()
+                if os.path.exists(path)
+            },
+        )
 
 
 def _get_references(
-    paths: Tuple[str, ...], without_views: bool = False
+    paths: Tuple[str, ...], without_views: bool = False, use_cache: bool = True
 ) -> Iterator[Tuple[Path, List[str]]]:
     file_paths = {
         path
         for parent in map(Path, paths or ["sql"])
         for path in (
-            map(Path, glob(f"{parent}/**/*.sql", recursive=True))
+            SqlCatalog.for_path(parent).files(["*.sql"])
             if parent.is_dir()
             else [parent]
         )
         if not path.name.endswith(".template.sql")  # skip templates
     }
+    index = _ReferenceIndex(without_views) if use_cache else None
     fail = False
     for path in sorted(file_paths):
         try:
-            if without_views:
+            if index is not None:
+                yield path, index.references(path)
+            elif without_views:
                 yield path, list(extract_table_references_without_views(path))
             else:
                 sql = render(path.name, template_folder=path.parent)
@@ -159,15 +381,22 @@ def _get_references(
             fail = True
             print(f"Failed to parse file {path}: {e}", file=sys.stderr)
 
+    if index is not None:
+        index.save()
+
     if fail:
         raise click.ClickException("Some paths could not be analyzed")
 
 
 def get_dependency_graph(
-    paths: Tuple[str, ...], without_views: bool = False
+    paths: Tuple[str, ...], without_views: bool = False, use_cache: bool = True
 ) -> Dict[str, List[str]]:
-    """Return the query dependency graph."""
-    refs = _get_references(paths, without_views=without_views)
+    """Return the query dependency graph.
+
+    Unless `use_cache` is False, only files that changed since the graph was last
+    built are parsed again.
+    """
+    refs = _get_references(paths, without_views=without_views, use_cache=use_cache)
     dependency_graph = {}
 
     for ref in refs:
@@ -179,6 +408,17 @@ def get_dependency_graph(
     return dependency_graph
 
 
+def get_downstream_graph(
+    dependency_graph: Dict[str, List[str]],
+) -> Dict[str, List[str]]:
+    """Return the tables that reference each table in the dependency graph."""
+    downstream_graph: Dict[str, List[str]] = {}
+    for table, references in dependency_graph.items():
+        for reference in dict.fromkeys(references):
+            downstream_graph.setdefault(reference, []).append(table)
+    return downstream_graph
+
+
 @click.group(help=__doc__)
 def dependency():
     """Create the CLI group for dependency commands."""
@@ -8,7 +8,7 @@ from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
 
 from .config import ConfigLoader
-from .dryrun import DryRun, get_id_token
+from .dryrun import DryRun
 from .metadata.parse_metadata import METADATA_FILE, Metadata
 from .metadata.publish_metadata import attach_external_data_config, attach_metadata
 from .schema import SCHEMA_FILE, Schema
@@ -95,7 +95,7 @@ def deploy_table(
             respect_skip=respect_dryrun_skip,
             sql_dir=sql_dir,
             client=client,
-            id_token=id_token if not use_cloud_function or id_token else get_id_token(),
+            id_token=id_token,
         )
         if not existing_schema.equal(query_schema):
             raise FailedDeployException(
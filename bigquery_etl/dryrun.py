@@ -11,26 +11,34 @@ accidentally running queries during tests and overwriting production data, we
 proxy the queries through the dry run service endpoint.
 """
 
-import glob
-import json
+import hashlib
+import os
 import re
 import sys
 import time
 from enum import Enum
+from functools import lru_cache, partial
+from multiprocessing.pool import Pool
 from os.path import basename, dirname, exists
 from pathlib import Path
-from typing import Optional, Set
-from urllib.request import Request, urlopen
+from threading import Lock
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
 import click
 import google.auth
+import requests
+from google.auth import jwt
 from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.cloud import bigquery
 from google.oauth2.id_token import fetch_id_token
+from requests import adapters
+from urllib3.util.retry import Retry
 
 from .config import ConfigLoader
 from .metadata.parse_metadata import Metadata
 from .util.common import render
+from .util.disk_cache import DiskCache, cache_dir
+from .util.skip_registry import PathMatcher, SkipRegistry
 
 try:
     from functools import cached_property  # type: ignore
@@ -52,6 +60,29 @@ QUERY_PARAMETER_TYPE_VALUES = {
     "NUMERIC": 1,
     "BIGNUMERIC": 1,
 }
+DEFAULT_PARALLELISM = 8
+# refresh ID tokens this many seconds before they expire
+ID_TOKEN_EXPIRY_MARGIN = 300
+
+
+@lru_cache(maxsize=None)
+def _dry_run_cache(directory: Path) -> DiskCache:
+    """Return the dry run result cache stored in directory."""
+    max_size_mb = ConfigLoader.get("dry_run", "cache", "max_size_mb", fallback=None)
+    return DiskCache(
+        "dry_run",
+        ttl=ConfigLoader.get("dry_run", "cache", "ttl_seconds", fallback=None),
+        max_size=max_size_mb * 1024 * 1024 if max_size_mb else None,
+        directory=directory,
+    )
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    """Return the hash of the file content or None if the file doesn't exist."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
 
 
 def get_credentials(auth_req: Optional[GoogleAuthRequest] = None):
@@ -79,6 +110,123 @@ def get_id_token(dry_run_url=ConfigLoader.get("dry_run", "function"), credential
     return id_token
 
 
+class DryRunSession:
+    """Shared HTTP session for sending requests to the dry run Cloud Function.
+
+    Connections are kept alive and pooled across requests, failed requests are
+    retried with exponential backoff and the ID token used to authenticate is
+    minted once and refreshed before it expires. Use `DryRunSession.shared()` to
+    get the session of the current process.
+    """
+
+    _sessions: Dict[int, "DryRunSession"] = {}
+    _lock = Lock()
+
+    def __init__(
+        self,
+        dry_run_url=ConfigLoader.get("dry_run", "function"),
+        pool_size=32,
+        retries=3,
+        backoff_factor=1,
+        id_token=None,
+    ):
+        """Initialize the session."""
+        self.dry_run_url = dry_run_url
+        self._id_token = id_token
+        self._id_token_expiry = self._token_expiry(id_token)
+        self._token_lock = Lock()
+
+        self.session = requests.Session()
+        adapter = adapters.HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(429, 500, 502, 503, 504),
+                # dry runs are idempotent, so POST requests can be retried
+                allowed_methods=None,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def shared(cls) -> "DryRunSession":
+        """Return the session shared by all dry runs in the current process."""
+        # connections can't be shared with forked processes
+        pid = os.getpid()
+        with cls._lock:
+            if pid not in cls._sessions:
+                session = cls()
+                # ID tokens are safe to share, reuse the token of the parent process
+                for parent_session in cls._sessions.values():
+                    session._id_token = parent_session._id_token
+                    session._id_token_expiry = parent_session._id_token_expiry
+                cls._sessions[pid] = session
+            return cls._sessions[pid]
+
+    @classmethod
+    def seed_shared(cls, id_token):
+        """Use id_token for the session of the current process.
+
+        Used to share the ID token minted in a parent process with worker processes.
+        """
+        session = cls.shared()
+        with session._token_lock:
+            session._id_token = id_token
+            session._id_token_expiry = cls._token_expiry(id_token)
+
+    @staticmethod
+    def _token_expiry(id_token) -> Optional[float]:
+        """Return the expiry timestamp of the ID token."""
+        if id_token is None:
+            return None
+        try:
+            return jwt.decode(id_token, verify=False)["exp"]
+        except Exception:
+            # not a JWT, assume it doesn't expire
+            return float("inf")
+
+    @property
+    def id_token(self):
+        """Return a valid ID token, minting a new one if it is about to expire."""
+        with self._token_lock:
+            if (
+                self._id_token is None
+                or self._id_token_expiry is None
+                or self._id_token_expiry - ID_TOKEN_EXPIRY_MARGIN < time.time()
+            ):
+                self._id_token = get_id_token(self.dry_run_url)
+                self._id_token_expiry = self._token_expiry(self._id_token)
+            return self._id_token
+
+    def invalidate_id_token(self):
+        """Force a new ID token to be minted on the next request."""
+        with self._token_lock:
+            self._id_token = None
+
+    def post(self, json_data, id_token=None):
+        """Send a dry run request and return the JSON result.
+
+        If id_token is not provided the session's ID token is used, which is
+        refreshed once if the request is rejected as unauthorized.
+        """
+        for attempt in range(2):
+            response = self.session.post(
+                self.dry_run_url,
+                json=json_data,
+                headers={"Authorization": f"Bearer {id_token or self.id_token}"},
+            )
+            if response.status_code == 401 and id_token is None and attempt == 0:
+                self.invalidate_id_token()
+                continue
+            break
+
+        response.raise_for_status()
+        return response.json()
+
+
 class Errors(Enum):
     """DryRun errors that require special handling."""
 
@@ -105,8 +253,14 @@ class DryRun:
         dataset=None,
         table=None,
         billing_project=None,
+        use_cache=True,
     ):
-        """Instantiate DryRun class."""
+        """Instantiate DryRun class.
+
+        Dry run results are cached on disk across processes if enabled via
+        `dry_run.cache` in bqetl_project.yaml, unless use_cache is False. Dry runs
+        for table metadata are never cached, since they return the live table.
+        """
         self.sqlfile = sqlfile
         self.content = content
         self.strip_dml = strip_dml
@@ -115,16 +269,21 @@ class DryRun:
         self.respect_skip = respect_skip
         self.dry_run_url = ConfigLoader.get("dry_run", "function")
         self.sql_dir = sql_dir
-        self.id_token = (
-            id_token
-            if not use_cloud_function or id_token
-            else get_id_token(self.dry_run_url)
-        )
+        # if no ID token is provided, the token of the shared session is used
+        self.id_token = id_token
         self.credentials = credentials
         self.project = project
         self.dataset = dataset
         self.table = table
         self.billing_project = billing_project
+        self.cache = (
+            _dry_run_cache(cache_dir())
+            if use_cache
+            and table is None
+            and ConfigLoader.get("dry_run", "cache", "enabled")
+            else None
+        )
+        self.dry_run_cached = False
         try:
             self.metadata = Metadata.of_query_file(self.sqlfile)
         except FileNotFoundError:
@@ -147,41 +306,15 @@ class DryRun:
             return None
         return self.bq_client or bigquery.Client(credentials=self.credentials)
 
-    @staticmethod
-    def skipped_files(sql_dir=ConfigLoader.get("default", "sql_dir")) -> Set[str]:
-        """Return files skipped by dry run."""
-        default_sql_dir = Path(ConfigLoader.get("default", "sql_dir"))
-        sql_dir = Path(sql_dir)
-        file_pattern_re = re.compile(rf"^{re.escape(str(default_sql_dir))}/")
-
-        skip_files = {
-            file
-            for skip in ConfigLoader.get("dry_run", "skip", fallback=[])
-            for file in glob.glob(
-                file_pattern_re.sub(f"{str(sql_dir)}/", skip),
-                recursive=True,
-            )
-        }
-
-        # update skip list to include renamed queries in stage.
-        test_project = ConfigLoader.get("default", "test_project", fallback="")
-        file_pattern_re = re.compile(r"sql/([^\/]+)/([^/]+)(/?.*|$)")
-
-        skip_files.update(
-            [
-                file
-                for skip in ConfigLoader.get("dry_run", "skip", fallback=[])
-                for file in glob.glob(
-                    file_pattern_re.sub(
-                        lambda x: f"sql/{test_project}/{x.group(2)}_{x.group(1).replace('-', '_')}*{x.group(3)}",
-                        skip,
-                    ),
-                    recursive=True,
-                )
-            ]
-        )
+    @property
+    def session(self) -> DryRunSession:
+        """Get the shared session for sending requests to the Cloud Function."""
+        return DryRunSession.shared()
 
-        return skip_files
+    @staticmethod
+    def skipped_files(sql_dir=ConfigLoader.get("default", "sql_dir")) -> PathMatcher:
+        """Return a matcher for files skipped by dry run."""
+        return SkipRegistry.dry_run(sql_dir)
 
     def skip(self):
         """Determine if dry run should be skipped."""
@@ -249,6 +382,14 @@ class DryRun:
 
         project = basename(dirname(dirname(dirname(self.sqlfile))))
         dataset = basename(dirname(dirname(self.sqlfile)))
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(sql, project, dataset, query_parameters)
+            if (result := self._cached_result(cache_key)) is not None:
+                self.dry_run_cached = True
+                return result
+
         try:
             start_time = time.time()
             if self.use_cloud_function:
@@ -265,18 +406,7 @@ class DryRun:
                 if self.table:
                     json_data["table"] = self.table
 
-                r = urlopen(
-                    Request(
-                        self.dry_run_url,
-                        headers={
-                            "Content-Type": "application/json",
-                            "Authorization": f"Bearer {self.id_token}",
-                        },
-                        data=json.dumps(json_data).encode("utf8"),
-                        method="POST",
-                    )
-                )
-                result = json.load(r)
+                result = self.session.post(json_data, id_token=self.id_token)
             else:
                 # Prefer billing project if provided, otherwise use the project from the SQL file
                 self.client.project = (
@@ -330,12 +460,85 @@ class DryRun:
                     }
 
             self.dry_run_duration = time.time() - start_time
+            if cache_key is not None:
+                self._cache_result(cache_key, result)
             return result
 
         except Exception as e:
             print(f"{self.sqlfile!s:59} ERROR\n", e)
             return None
 
+    def _cache_key(self, sql, project, dataset, query_parameters):
+        """Return the cache key for the dry run request."""
+        return DiskCache.key(
+            {
+                "query": sql,
+                "query_parameters": [
+                    query_parameter.to_api_repr()
+                    for query_parameter in query_parameters
+                ],
+                "file_project": project,
+                "file_dataset": dataset,
+                "project": self.project,
+                "dataset": self.dataset,
+                "table": self.table,
+                "use_cloud_function": self.use_cloud_function,
+                "dry_run_url": self.dry_run_url if self.use_cloud_function else None,
+                "billing_project": self.billing_project,
+            }
+        )
+
+    def _referenced_schema_hashes(self, result):
+        """Return hashes of the schema files of tables referenced in the result."""
+        # delay import to prevent circular imports in 'bigquery_etl.schema'
+        from .schema import SCHEMA_FILE
+
+        if not ConfigLoader.get(
+            "dry_run", "cache", "invalidate_on_schema_change", fallback=False
+        ):
+            return {}
+
+        hashes = {}
+        for table in result.get("referencedTables", []):
+            schema_file = (
+                Path(self.sql_dir)
+                / table.get("projectId", "")
+                / table.get("datasetId", "")
+                / table.get("tableId", "")
+                / SCHEMA_FILE
+            )
+            hashes[str(schema_file)] = _file_hash(schema_file)
+        return hashes
+
+    def _cached_result(self, cache_key):
+        """Return the cached dry run result, unless referenced schemas changed."""
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+        if entry["schema_hashes"] != self._referenced_schema_hashes(entry["result"]):
+            self.cache.delete(cache_key)
+            return None
+        return entry["result"]
+
+    def _cache_result(self, cache_key, result):
+        """Cache successful results and results with errors that are expected.
+
+        Table metadata and dataset labels reflect the live state in BigQuery and
+        aren't covered by the cache key, so they are not cached.
+        """
+        if result.get("valid") or self._error_type(result.get("errors", [])):
+            self.cache.set(
+                cache_key,
+                {
+                    "result": {
+                        key: value
+                        for key, value in result.items()
+                        if key not in ("tableMetadata", "datasetLabels")
+                    },
+                    "schema_hashes": self._referenced_schema_hashes(result),
+                },
+            )
+
     def get_referenced_tables(self):
         """Return referenced tables by dry running the SQL file."""
         if not self.skip() and not self.is_valid():
@@ -481,7 +684,10 @@ class DryRun:
             return False
 
         if self.dry_run_result["valid"]:
-            print(f"{self.sqlfile!s:59} OK, took {self.dry_run_duration or 0:.2f}s")
+            if self.dry_run_cached:
+                print(f"{self.sqlfile!s:59} OK, cached")
+            else:
+                print(f"{self.sqlfile!s:59} OK, took {self.dry_run_duration or 0:.2f}s")
         elif self.get_error() == Errors.READ_ONLY:
             # We want the dryrun service to only have read permissions, so
             # we expect CREATE VIEW and CREATE TABLE to throw specific
@@ -507,7 +713,11 @@ class DryRun:
 
     def get_error(self) -> Optional[Errors]:
         """Get specific errors for edge case handling."""
-        errors = self.errors()
+        return self._error_type(self.errors())
+
+    @staticmethod
+    def _error_type(errors) -> Optional[Errors]:
+        """Classify errors that require special handling."""
         if len(errors) != 1:
             return None
 
@@ -607,6 +817,43 @@ class DryRun:
         return True
 
 
+def _dry_run_file(validate_schemas, kwargs, sqlfile) -> Tuple[str, bool]:
+    """Dry run the SQL file and return whether it is valid."""
+    dry_run = DryRun(sqlfile, **kwargs)
+    if validate_schemas:
+        try:
+            return sqlfile, dry_run.validate_schema()
+        except Exception as e:  # validate_schema raises base exception
+            click.echo(e, err=True)
+            return sqlfile, False
+    return sqlfile, dry_run.is_valid()
+
+
+def dry_run_many(
+    sqlfiles: Iterable[str],
+    parallelism=DEFAULT_PARALLELISM,
+    validate_schemas=False,
+    **kwargs,
+) -> Iterator[Tuple[str, bool]]:
+    """Dry run SQL files in parallel.
+
+    Rendering and parsing queries is CPU bound, so files are processed in a pool of
+    `parallelism` processes. The ID token is minted once and shared with all
+    processes. kwargs are passed to DryRun. Yields `(sqlfile, valid)` in the
+    order of sqlfiles.
+    """
+    id_token = kwargs.pop("id_token", None)
+    if id_token is None and kwargs.get("use_cloud_function", True):
+        id_token = DryRunSession.shared().id_token
+
+    with Pool(
+        max(parallelism, 1),
+        initializer=DryRunSession.seed_shared,
+        initargs=(id_token,),
+    ) as pool:
+        yield from pool.imap(partial(_dry_run_file, validate_schemas, kwargs), sqlfiles)
+
+
 def sql_file_valid(sqlfile):
     """Dry run SQL files."""
     return DryRun(sqlfile).is_valid()
@@ -1,54 +1,95 @@
 """Format SQL."""
 
-import glob
+import hashlib
 import os
 import os.path
 import sys
-from functools import partial
+from functools import lru_cache, partial
 from multiprocessing.pool import Pool
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
+import sqlglot
 from sqlglot.errors import ParseError
 
 from bigquery_etl.config import ConfigLoader
 from bigquery_etl.format_sql.formatter import reformat  # noqa E402
-from bigquery_etl.util.common import qualify_table_references_in_file
+from bigquery_etl.util import common
+from bigquery_etl.util.common import qualify_table_references_in_file, template_hash
+from bigquery_etl.util.disk_cache import DiskCache
+from bigquery_etl.util.skip_registry import PathMatcher, SkipRegistry
 
+FORMAT_CACHE_TTL = 30 * 24 * 60 * 60
 
-def skip_format():
-    """Return a list of configured queries for which formatting should be skipped."""
-    return [
-        file
-        for skip in ConfigLoader.get("format", "skip", fallback=[])
-        for file in glob.glob(skip, recursive=True)
-    ]
 
+def skip_format() -> PathMatcher:
+    """Return a matcher for configured queries for which formatting should be skipped."""
+    return SkipRegistry.get("format", "skip")
+
+
+def skip_qualifying_references() -> PathMatcher:
+    """Return a matcher for configured queries where fully qualifying references should be skipped."""
+    return SkipRegistry.get("format", "skip_qualifying_references")
+
+
+@lru_cache(maxsize=None)
+def _formatter_version() -> str:
+    """Return a hash of the code that determines how files get formatted."""
+    sha = hashlib.sha256(sqlglot.__version__.encode("utf-8"))
+    for module in sorted(Path(__file__).parent.glob("*.py")) + [Path(common.__file__)]:
+        sha.update(module.read_bytes())
+    return sha.hexdigest()
 
-def skip_qualifying_references():
-    """Return a list of configured queries where fully qualifying references should be skipped."""
-    return [
-        file
-        for skip in ConfigLoader.get(
-            "format", "skip_qualifying_references", fallback=[]
-        )
-        for file in glob.glob(skip, recursive=True)
-    ]
 
+def _format_cache_key(path: str, qualify_references: bool) -> Optional[str]:
+    """Return the key of the format verdict of the file, or None if it can't be cached.
 
-def _format_path(check: bool, path: str) -> Tuple[int, int]:
+    Qualifying table references renders the file, so the key includes the
+    templates it may include. Metrics are rendered from metric-hub definitions
+    that can change independently of the file, so they are never cached.
+    """
+    query_path = Path(path)
+    if qualify_references and "metrics." in query_path.read_text():
+        return None
+    return DiskCache.key(
+        _formatter_version(),
+        str(query_path.resolve()),
+        template_hash(query_path),
+        qualify_references,
+        ConfigLoader.get("render", "skip", fallback=[]),
+    )
+
+
+def _format_path(
+    check: bool,
+    path: str,
+    use_cache: bool = False,
+    skip_qualifying: Optional[PathMatcher] = None,
+) -> Tuple[int, int]:
     """
     Format SQL file or if `check` flag set validate it is correct format.
 
     :param check:   Flag which indicates whether we should only check if query needs reformatted.
     :param path:    String path of the SQL file to perform the operations on.
+    :param use_cache: Skip files that were already formatted and haven't changed since.
+    :param skip_qualifying: Files to not qualify references in, defaults to skip_qualifying_references().
     :return:        a tuple with two elements. Element one represents if formamtting was applied,
                     element two if the query's format is invalid.
     """
+    if skip_qualifying is None:
+        skip_qualifying = skip_qualifying_references()
+    qualify_references = path not in skip_qualifying
+    cache_key = None
+    if use_cache:
+        cache = DiskCache("format", ttl=FORMAT_CACHE_TTL)
+        cache_key = _format_cache_key(path, qualify_references)
+        if cache_key is not None and cache.get(cache_key):
+            return 0, 0
+
     query = Path(path).read_text()
 
     try:
-        if not any([path.endswith(s) for s in skip_qualifying_references()]):
+        if qualify_references:
             fully_referenced_query = qualify_table_references_in_file(Path(path))
         else:
             fully_referenced_query = query
@@ -69,11 +110,17 @@ def _format_path(check: bool, path: str) -> Tuple[int, int]:
             print(f"Reformatted: {path}")
         return 1, 0
     else:
+        if cache_key is not None:
+            cache.set(cache_key, True)
         return 0, 0
 
 
-def format(paths, check=False, parallelism=8):
-    """Format SQL files."""
+def format(paths, check=False, parallelism=8, use_cache=True):
+    """Format SQL files.
+
+    Files that were already formatted are remembered by content, so that they
+    are skipped on subsequent runs until they or the formatter change.
+    """
     if not paths:
         query = sys.stdin.read()
         formatted = reformat(query, trailing_newline=True)
@@ -94,7 +141,7 @@ def format(paths, check=False, parallelism=8):
                     # skip tests/**/input.sql
                     and not (path.startswith("tests") and filename == "input.sql")
                     for filepath in [os.path.join(dirpath, filename)]
-                    if not any([filepath.endswith(s) for s in skip_format()])
+                    if filepath not in skip_format()
                 )
             elif path:
                 sql_files.append(path)
@@ -103,7 +150,15 @@ def format(paths, check=False, parallelism=8):
             sys.exit(255)
 
         with Pool(parallelism) as pool:
-            results = pool.map(partial(_format_path, check), sql_files)
+            results = pool.map(
+                partial(
+                    _format_path,
+                    check,
+                    use_cache=use_cache,
+                    skip_qualifying=skip_qualifying_references(),
+                ),
+                sql_files,
+            )
 
         reformatted = sum([x[0] for x in results])
         unchanged = len(sql_files) - reformatted
@@ -3,7 +3,8 @@
 import re
 import sys
 from dataclasses import dataclass, field
-from typing import Iterator
+from functools import lru_cache
+from typing import Iterator, Tuple, Type
 
 # These words get their own line followed by increased indent
 TOP_LEVEL_KEYWORDS = [
@@ -736,7 +737,7 @@ class Literal(Token):
 
     pattern = re.compile(
         # String literal
-        rf"(?:r?b|b?r)?({QUOTE})(?:{STRING_CONTENT})*?\1"
+        rf"(?:r?b|b?r)?(?P<quote>{QUOTE})(?:{STRING_CONTENT})*?(?P=quote)"
         # Hexadecimal integer literal
         "|0[xX][0-9a-fA-F]+"
         # Decimal integer or float literal
@@ -901,18 +902,55 @@ BIGQUERY_TOKEN_PRIORITY = [
 ]
 
 
+def _scoped_pattern(pattern: re.Pattern) -> str:
+    """Return the pattern as a group that applies its flags only to itself."""
+    flags = "".join(
+        char
+        for flag, char in ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+        if pattern.flags & flag
+    )
+    return f"(?{flags}:{pattern.pattern})"
+
+
+@lru_cache(maxsize=None)
+def _token_pattern(token_types: Tuple[Type[Token], ...]) -> re.Pattern:
+    """Compile a single regex that matches the first of token_types that matches.
+
+    The group name of each alternative is the index of its token type, so that
+    match.lastgroup identifies the type of the token.
+    """
+    return re.compile(
+        "|".join(
+            f"(?P<_{i}>{_scoped_pattern(token_type.pattern)})"
+            for i, token_type in enumerate(token_types)
+        )
+    )
+
+
 def tokenize(query, token_priority=BIGQUERY_TOKEN_PRIORITY) -> Iterator[Token]:
     """Split query into a series of tokens."""
+    token_priority = tuple(token_priority)
+    # patterns for token types from the given index in token_priority, used to
+    # resume matching when a token type is rejected based on context
+    patterns = {0: _token_pattern(token_priority)}
     open_blocks: list[BlockStartKeyword] = []
     open_angle_brackets = 0
     angle_bracket_is_operator = True
     reserved_keyword_is_identifier = False
-    while query:
-        for token_type in token_priority:
-            match = token_type.pattern.match(query)
+    pos = 0
+    while pos < len(query):
+        start = 0
+        while True:
+            if start not in patterns:
+                patterns[start] = _token_pattern(token_priority[start:])
+            match = patterns[start].match(query, pos)
             if not match:
-                continue
-            token = token_type(match.group())
+                raise ValueError(f"Could not determine next token in {query[pos:]!r}")
+            # group of the alternative that matched, which encloses its other groups
+            index = start + int(match.lastgroup[1:])  # type: ignore[index]
+            # skip this token type if it is rejected
+            start = index + 1
+            token = token_priority[index](match.group())
             # handle stateful matches
             if isinstance(token, MaybeCaseSubclause):
                 if open_blocks and open_blocks[-1].value.upper() == "CASE":
@@ -936,8 +974,7 @@ def tokenize(query, token_priority=BIGQUERY_TOKEN_PRIORITY) -> Iterator[Token]:
             ):
                 continue  # prevent matching identifier as keyword
             yield token
-            length = len(token.value)
-            query = query[length:]
+            pos = match.end()
             # update stateful conditions for next token
             if isinstance(token, BlockEndKeyword) and open_blocks:
                 open_blocks.pop()
@@ -955,8 +992,6 @@ def tokenize(query, token_priority=BIGQUERY_TOKEN_PRIORITY) -> Iterator[Token]:
                     token, (FieldAccessOperator, AliasSeparator)
                 )
             break
-        else:
-            raise ValueError(f"Could not determine next token in {query!r}")
 
 
 if __name__ == "__main__":
@@ -11,6 +11,9 @@ from google.cloud import bigquery
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
+# maximum number of requests sent to Cloud Storage in a single batch request
+MAX_BATCH_SIZE = 100
+
 
 @click.command()
 @click.option(
@@ -87,20 +90,19 @@ def export_newtab_merino_table_to_gcs(
         bucket = storage_client.bucket(destination_bucket)
         blob = bucket.blob(f"{destination_prefix}/{temp_file}")
 
-        # Read the temporary JSON file from GCS
-        temp_file_content = blob.download_as_text()
-
-        # Convert the content to a JSON array
-        json_array = [json.loads(line) for line in temp_file_content.splitlines()]
-        json_data = json.dumps(json_array, indent=1)
+        # Convert the newline delimited JSON to a JSON array while streaming it
+        # to the final destination files in GCS:
+        # 1. {timestamp}.json keeps a historical record for debugging purposes.
+        # 2. latest.json is a single file, that's easy to reference from Merino.
+        timestamp_blob = bucket.blob(f"{destination_prefix}/{timestamp}.json")
+        with (
+            blob.open("r") as ndjson_file,
+            timestamp_blob.open("w", content_type="application/json") as json_file,
+        ):
+            write_json_array(ndjson_file, json_file)
 
-        # Write the JSON array to the final destination files in GCS:
-        # 1. latest.json is a single file, that's easy to reference from Merino.
-        # 2. {timestamp}.json keeps a historical record for debugging purposes.
-        for suffix in ["latest", timestamp]:
-            final_destination_uri = f"{destination_prefix}/{suffix}.json"
-            final_blob = bucket.blob(final_destination_uri)
-            final_blob.upload_from_string(json_data, content_type="application/json")
+        # copy within GCS instead of uploading the data a second time
+        bucket.copy_blob(timestamp_blob, bucket, f"{destination_prefix}/latest.json")
 
         # Delete the temporary file from GCS
         blob.delete()
@@ -120,12 +122,35 @@ def export_newtab_merino_table_to_gcs(
             )
 
 
+def write_json_array(ndjson_file, json_file):
+    """Write the rows of a newline delimited JSON file as an indented JSON array.
+
+    Rows are written one at a time, the output is the same as `json.dumps(rows, indent=1)`.
+    """
+    json_file.write("[")
+    separator = "\n "
+    empty = True
+    for line in ndjson_file:
+        if not line.strip():
+            continue
+        row = json.dumps(json.loads(line), indent=1)
+        # indent the row by one more level as an element of the array
+        json_file.write(separator + row.replace("\n", "\n "))
+        separator = ",\n "
+        empty = False
+    json_file.write("]" if empty else "\n]")
+
+
 def delete_old_files(bucket, prefix, days_old):
     """Delete files older than `days_old` days from the bucket with the given prefix."""
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_old)
-    blobs = bucket.list_blobs(prefix=prefix)
-
-    for blob in blobs:
-        if blob.updated < cutoff_date:
-            blob.delete()
+    old_blobs = [
+        blob for blob in bucket.list_blobs(prefix=prefix) if blob.updated < cutoff_date
+    ]
+
+    for i in range(0, len(old_blobs), MAX_BATCH_SIZE):
+        with bucket.client.batch():
+            for blob in old_blobs[i : i + MAX_BATCH_SIZE]:
+                blob.delete()
+        for blob in old_blobs[i : i + MAX_BATCH_SIZE]:
             log.info(f"Deleted {blob.name}")
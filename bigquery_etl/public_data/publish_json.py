@@ -1,4 +1,11 @@
-"""Machinery for exporting query results as JSON to Cloud storage."""
+"""Machinery for exporting query results as JSON to Cloud storage.
+
+Query results are exported as ndjson files, which are packed into groups of up to
+MAX_JSON_SIZE bytes and converted to JSON files concurrently. Each group is written
+to its own JSON files, which keep the order of rows but aren't filled across
+groups. A group usually results in a single file, so there can be up to twice as
+many JSON files as when converting all exported files in one pass.
+"""
 
 import datetime
 import json
@@ -8,6 +15,7 @@ import re
 import string
 import sys
 from argparse import ArgumentParser
+from multiprocessing.pool import ThreadPool
 
 import smart_open
 from google.cloud import storage  # type: ignore
@@ -24,6 +32,10 @@ MAX_JSON_SIZE = 1 * 1024 * 1024 * 1024  # 1 GB as max. size of exported JSON fil
 MAX_FILE_COUNT = 10_000
 # exported file name format: 000000000000.json, 000000000001.json, ...
 MAX_JSON_NAME_LENGTH = 12
+# number of groups of exported files that are converted to JSON concurrently
+DEFAULT_PARALLELISM = 8
+# maximum number of requests sent to Cloud Storage in a single batch request
+MAX_BATCH_SIZE = 100
 
 logging.basicConfig(
     level=logging.DEBUG, format="%(asctime)s: %(levelname)s: %(message)s"
@@ -43,6 +55,7 @@ class JsonPublisher:
         target_bucket,
         parameter=None,
         gcs_path="",
+        parallelism=DEFAULT_PARALLELISM,
     ):
         """Init JsonPublisher."""
         self.project_id = project_id
@@ -51,6 +64,7 @@ class JsonPublisher:
         self.target_bucket = target_bucket
         self.gcs_path = gcs_path
         self.parameter = parameter
+        self.parallelism = parallelism
         self.client = client
         self.storage_client = storage_client
         self.temp_table = None
@@ -150,15 +164,88 @@ class JsonPublisher:
 
     def _gcp_convert_ndjson_to_json(self, gcs_path):
         """Convert ndjson files on GCP to json files."""
-        blobs = self.storage_client.list_blobs(
-            self.target_bucket, prefix=self.stage_gcs_path
+        blobs = sorted(
+            self.storage_client.list_blobs(
+                self.target_bucket, prefix=self.stage_gcs_path
+            ),
+            key=lambda blob: blob.name,
         )
-        bucket = self.storage_client.bucket(self.target_bucket)
 
+        # pack consecutive ndjson files into groups of up to MAX_JSON_SIZE bytes,
+        # files larger than that form a group of their own. Each group is written
+        # to its own JSON output files, so a group usually results in a single file
+        # and files larger than MAX_JSON_SIZE are split like before. Rows keep their
+        # order, but since files aren't filled across groups, there can be up to
+        # twice as many output files as when converting all files into one stream.
+        groups = []
+        group_size = 0
+        for blob in blobs:
+            blob_size = blob.size or 0
+            if not groups or group_size + blob_size > MAX_JSON_SIZE:
+                groups.append([])
+                group_size = 0
+            groups[-1].append(blob)
+            group_size += blob_size
+
+        # fail before converting anything if the output could have too many files,
+        # each group results in one file plus one per MAX_JSON_SIZE bytes at most
+        max_file_count = (
+            len(groups) + sum(blob.size or 0 for blob in blobs) // MAX_JSON_SIZE
+        )
+        if max_file_count > MAX_FILE_COUNT:
+            logging.error(
+                f"Export could result in up to {max_file_count} JSON output files, "
+                f"more than the maximum of {MAX_FILE_COUNT}."
+            )
+            sys.exit(1)
+
+        # groups are converted concurrently, output files are ordered by group
+        with ThreadPool(self.parallelism) as pool:
+            tmp_blob_names = [
+                tmp_blob_name
+                for group_tmp_blob_names in pool.starmap(
+                    self._convert_ndjson_group, enumerate(groups)
+                )
+                for tmp_blob_name in group_tmp_blob_names
+            ]
+
+        if len(tmp_blob_names) > MAX_FILE_COUNT:
+            logging.error("Maximum number of JSON output files reached.")
+            sys.exit(1)
+
+        # copy all files from stage directory to target directory,
+        # the stage directory gets cleared after publishing
+        bucket = self.storage_client.bucket(self.target_bucket)
+        file_names = [
+            gcs_path + str(output_file_counter).zfill(MAX_JSON_NAME_LENGTH) + ".json"
+            for output_file_counter in range(len(tmp_blob_names))
+        ]
+
+        for i in range(0, len(file_names), MAX_BATCH_SIZE):
+            with self.storage_client.batch():
+                for tmp_blob_name, file_name in zip(
+                    tmp_blob_names[i : i + MAX_BATCH_SIZE],
+                    file_names[i : i + MAX_BATCH_SIZE],
+                ):
+                    logging.info(f"""Move {tmp_blob_name} to {file_name}""")
+                    bucket.copy_blob(bucket.blob(tmp_blob_name), bucket, file_name)
+
+            # set Content-Type to json and encoding to gzip
+            with self.storage_client.batch():
+                for file_name in file_names[i : i + MAX_BATCH_SIZE]:
+                    blob = bucket.blob(file_name)
+                    blob.content_type = "application/json"
+                    blob.content_encoding = "gzip"
+                    blob.patch()
+
+    def _convert_ndjson_group(self, group_index, blobs):
+        """Convert a group of ndjson files to gzipped JSON files in the stage directory.
+
+        Returns the names of the written files in order.
+        """
+        tmp_blob_names = []
         # keeps track of the number of bytes written to the JSON output file
         output_size = 0
-        # tracks the current output file name
-        output_file_counter = 0
         # track if the first JSON object is currently processed
         first_line = True
         # output file handler
@@ -176,17 +263,11 @@ class JsonPublisher:
                             output_file.write("]")
                             output_file.close()
 
-                        if output_file_counter >= MAX_FILE_COUNT:
-                            logging.error(
-                                "Maximum number of JSON output files reached."
-                            )
-                            sys.exit(1)
-
                         tmp_blob_name = "/".join(blob.name.split("/")[:-1])
                         tmp_blob_name += (
                             "/"
-                            + str(output_file_counter).zfill(MAX_JSON_NAME_LENGTH)
-                            + ".json.tmp.gz"
+                            + str(group_index).zfill(MAX_JSON_NAME_LENGTH)
+                            + f"_{len(tmp_blob_names)}.json.tmp.gz"
                         )
                         tmp_blob_path = f"gs://{self.target_bucket}/{tmp_blob_name}"
 
@@ -195,7 +276,7 @@ class JsonPublisher:
                         output_file = smart_open.open(tmp_blob_path, "w")
                         output_file.write("[")
                         first_line = True
-                        output_file_counter += 1
+                        tmp_blob_names.append(tmp_blob_name)
                         output_size = 1
 
                     # skip the first line, it has no preceding json object
@@ -206,31 +287,11 @@ class JsonPublisher:
                     output_size += len(line)
                     first_line = False
 
-        output_file.write("]")
-        output_file.close()
-
-        # move all files from stage directory to target directory
-        tmp_blobs = self.storage_client.list_blobs(
-            self.target_bucket, prefix=self.stage_gcs_path
-        )
-
-        for tmp_blob in tmp_blobs:
-            # only copy gzipped files to target directory
-            if "tmp.gz" in tmp_blob.name:
-                # remove .tmp from the final file name
-                file_name = tmp_blob.name.split("/")[-1].replace(".tmp.gz", "")
-
-                logging.info(f"""Move {tmp_blob.name} to {gcs_path + file_name}""")
-
-                bucket.rename_blob(tmp_blob, gcs_path + file_name)
+        if output_file is not None:
+            output_file.write("]")
+            output_file.close()
 
-                # set Content-Type to json and encoding to gzip
-                blob = self.storage_client.get_bucket(self.target_bucket).get_blob(
-                    gcs_path + file_name
-                )
-                blob.content_type = "application/json"
-                blob.content_encoding = "gzip"
-                blob.patch()
+        return tmp_blob_names
 
     def _write_results_to_temp_table(self):
         """Write the query results to a temporary table and return the table name."""
@@ -310,6 +371,14 @@ parser.add_argument(
 parser.add_argument(
     "--gcs-path", "--gcs_path", default="", help="GCS path data is exported to"
 )
+parser.add_argument(
+    "--parallelism",
+    type=int,
+    default=DEFAULT_PARALLELISM,
+    help="Number of groups of exported files converted to JSON concurrently. "
+    "Groups are written to separate files, so there can be up to twice as many "
+    "JSON files as when converting all exported files in one pass",
+)
 
 
 def main():
@@ -341,6 +410,7 @@ def main():
         args.target_bucket,
         args.parameter,
         args.gcs_path,
+        args.parallelism,
     )
     publisher.publish_json()
 
@@ -11,8 +11,25 @@ import yaml
 from black import FileMode, format_file_contents
 
 from bigquery_etl.query_scheduling.dag import Dag, InvalidDag, PublicDataJsonDag
+from bigquery_etl.query_scheduling.task import referenced_tables_for_files
 from bigquery_etl.query_scheduling.utils import negate_timedelta_string
 
+# starting worker processes isn't worth it for a handful of queries
+MIN_TASKS_FOR_POOL = 32
+
+
+def _referenced_tables_or_none(query_files):
+    """Return referenced tables, or None if they cannot be extracted.
+
+    Failing tasks are resolved again when their upstream dependencies are
+    determined, which reports errors the same way as without the pre-pass. Some
+    queries exit while rendering, which would leave a pool waiting on a dead worker.
+    """
+    try:
+        return referenced_tables_for_files(query_files)
+    except (Exception, SystemExit):
+        return None
+
 
 class DagCollection:
     """Representation of all configured DAGs."""
@@ -21,6 +38,7 @@ class DagCollection:
         """Instantiate DAGs."""
         self.dags = dags
         self.dags_by_name = {dag.name: dag for dag in dags}
+        self._index_tasks()
 
     @classmethod
     def from_dict(cls, d):
@@ -65,49 +83,36 @@ class DagCollection:
         """Return the DAG with the provided name."""
         return self.dags_by_name.get(name)
 
-    def task_for_table(self, project, dataset, table):
-        """Return the task that schedules the query for the provided table."""
+    def _index_tasks(self):
+        """Index tasks by the (project, dataset, table_version) they write to.
+
+        If multiple tasks match, the first one in DAG order is used.
+        """
+        self._tasks_by_table = {}
+        self._fail_checks_tasks_by_table = {}
+        self._fail_bigeye_checks_tasks_by_table = {}
+
         for dag in self.dags:
             for task in dag.tasks:
-                if (
-                    project == task.project
-                    and dataset == task.dataset
-                    and table == f"{task.table}_{task.version}"
-                    and not task.is_dq_check
-                    and not task.is_bigeye_check
-                ):
-                    return task
+                key = (task.project, task.dataset, f"{task.table}_{task.version}")
+                if not task.is_dq_check and not task.is_bigeye_check:
+                    self._tasks_by_table.setdefault(key, task)
+                if task.is_dq_check and task.is_dq_check_fail:
+                    self._fail_checks_tasks_by_table.setdefault(key, task)
+                if task.is_bigeye_check:
+                    self._fail_bigeye_checks_tasks_by_table.setdefault(key, task)
 
-        return None
+    def task_for_table(self, project, dataset, table):
+        """Return the task that schedules the query for the provided table."""
+        return self._tasks_by_table.get((project, dataset, table))
 
     def fail_checks_task_for_table(self, project, dataset, table):
         """Return the task that schedules the checks for the provided table."""
-        for dag in self.dags:
-            for task in dag.tasks:
-                if (
-                    project == task.project
-                    and dataset == task.dataset
-                    and table == f"{task.table}_{task.version}"
-                    and task.is_dq_check
-                    and task.is_dq_check_fail
-                ):
-                    return task
-
-        return None
+        return self._fail_checks_tasks_by_table.get((project, dataset, table))
 
     def fail_bigeye_checks_task_for_table(self, project, dataset, table):
         """Return the task that schedules the BigEye checks for the provided table."""
-        for dag in self.dags:
-            for task in dag.tasks:
-                if (
-                    project == task.project
-                    and dataset == task.dataset
-                    and table == f"{task.table}_{task.version}"
-                    and task.is_bigeye_check
-                ):
-                    return task
-
-        return None
+        return self._fail_bigeye_checks_tasks_by_table.get((project, dataset, table))
 
     def with_tasks(self, tasks):
         """Assign tasks to their corresponding DAGs."""
@@ -135,6 +140,7 @@ class DagCollection:
             if public_data_json_dag:
                 public_data_json_dag.add_export_tasks(public_json_tasks, self)
 
+        self._index_tasks()
         return self
 
     def get_task_downstream_dependencies(self, task):
@@ -161,6 +167,32 @@ class DagCollection:
 
         return self._downstream_dependencies[task.task_key]
 
+    def with_referenced_tables(self, parallelism=8):
+        """Extract the tables referenced by all task queries using a process pool.
+
+        Upstream dependencies are resolved from the referenced tables, which
+        requires rendering and parsing every query and the views it references.
+        """
+        tasks = [
+            task
+            for dag in self.dags
+            for task in dag.tasks
+            if task.referenced_tables_pending
+        ]
+        query_files = [[str(path) for path in task.query_files()] for task in tasks]
+
+        if parallelism > 1 and len(tasks) >= MIN_TASKS_FOR_POOL:
+            with get_context("spawn").Pool(parallelism) as p:
+                referenced_tables = p.map(
+                    _referenced_tables_or_none, query_files, chunksize=8
+                )
+        else:
+            referenced_tables = map(_referenced_tables_or_none, query_files)
+
+        for task, tables in zip(tasks, referenced_tables):
+            task.referenced_tables = tables
+        return self
+
     def dag_to_airflow(self, output_dir, dag):
         """Generate the Airflow DAG representation for the provided DAG."""
         output_file = Path(output_dir) / (dag.name + ".py")
@@ -179,6 +211,9 @@ class DagCollection:
         # when running tests on CI that call this function, we need
         # to create a custom pool to prevent processes from getting stuck
 
+        # upstream dependencies of all DAGs are needed for downstream dependencies
+        self.with_referenced_tables()
+
         # Generate a single DAG:
         if dag_to_generate is not None:
             dag_to_generate.with_upstream_dependencies(self)
@@ -13,7 +13,7 @@ import attr
 import cattrs
 import click
 
-from bigquery_etl.dependency import extract_table_references_without_views
+from bigquery_etl.dependency import table_references_without_views
 from bigquery_etl.metadata.parse_metadata import Metadata, PartitionType
 from bigquery_etl.query_scheduling.utils import (
     is_date_string,
@@ -307,6 +307,19 @@ EXTERNAL_TASKS = {
 }
 
 
+def referenced_tables_for_files(query_files):
+    """Return the sorted (project, dataset, table) tuples referenced by the files."""
+    table_names = {
+        tuple(table.split("."))
+        for query_file in query_files
+        for table in table_references_without_views(query_file)
+    }
+
+    # the order of table dependencies changes between requests
+    # sort to maintain same order between DAG generation runs
+    return sorted(table_names)
+
+
 @attr.s(auto_attribs=True)
 class Task:
     """
@@ -682,6 +695,20 @@ class Task:
             task_group=self.task_group,
         )
 
+    @property
+    def referenced_tables_pending(self):
+        """Check whether referenced tables still need to be extracted from SQL."""
+        return self.referenced_tables is None and not (
+            self.is_python_script or self.is_bigeye_check
+        )
+
+    def query_files(self):
+        """Return the SQL files the task runs."""
+        if self.multipart:
+            # dry_run all files if query is split into multiple parts
+            return sorted(Path(self.query_file_path).glob("*.sql"))
+        return [Path(self.query_file)]
+
     def _get_referenced_tables(self):
         """Use sqlglot to get tables the query depends on."""
         logging.info(f"Get dependencies for {self.task_key}")
@@ -691,21 +718,7 @@ class Task:
             return self.referenced_tables or []
 
         if self.referenced_tables is None:
-            query_files = [Path(self.query_file)]
-
-            if self.multipart:
-                # dry_run all files if query is split into multiple parts
-                query_files = Path(self.query_file_path).glob("*.sql")
-
-            table_names = {
-                tuple(table.split("."))
-                for query_file in query_files
-                for table in extract_table_references_without_views(query_file)
-            }
-
-            # the order of table dependencies changes between requests
-            # sort to maintain same order between DAG generation runs
-            self.referenced_tables = sorted(table_names)
+            self.referenced_tables = referenced_tables_for_files(self.query_files())
         return self.referenced_tables
 
     def with_upstream_dependencies(self, dag_collection):
@@ -7,8 +7,10 @@ parsing UDF dependencies in queries as well.
 
 import os
 import re
+from collections import defaultdict
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Set, Tuple
 
 import attr
 import sqlparse
@@ -30,6 +32,9 @@ PERSISTENT_UDF_RE = re.compile(
     re.IGNORECASE,
 )
 UDF_NAME_RE = re.compile(r"^([a-zA-Z0-9_]+\.)?[a-zA-Z][a-zA-Z0-9_]{0,255}$")
+# names of routines are matched around each dot in a text
+DOTTED_NAME_RE = re.compile(f"({UDF_CHAR}*)\\.(?=({UDF_CHAR}*))")
+ROUTINE_NAME_RE = re.compile(f"({UDF_CHAR}+)\\.({UDF_CHAR}+)")
 GENERIC_DATASET = "_generic_dataset_"
 
 raw_routines = {}
@@ -49,11 +54,92 @@ def get_routines_from_dir(project_dir):
     ]
 
 
+class RoutineRegistry:
+    """Routines that could be referenced by a project.
+
+    Finds usages of all routines in a single pass over a text.
+    """
+
+    def __init__(self, routines):
+        """Index the routines by name."""
+        self.routines = routines
+        # dataset -> names of routines in the dataset
+        self._names_by_dataset: Dict[str, Set[str]] = defaultdict(set)
+        self._other_names = set()
+        for routine in routines:
+            if match := ROUTINE_NAME_RE.fullmatch(routine["name"]):
+                self._names_by_dataset[match.group(1)].add(match.group(2))
+            else:
+                self._other_names.add(routine["name"])
+
+    @cached_property
+    def _calls_re(self):
+        # names referenced as function calls, optionally quoted with backticks
+        call_names = sorted(
+            {
+                r"\.".join(f"`?{part}`?" for part in routine["name"].split("."))
+                for routine in self.routines
+            },
+            reverse=True,
+        )
+        if not call_names:
+            return None
+        return re.compile(rf"\b({'|'.join(call_names)})(?=\()")
+
+    def usages(self, text) -> Set[str]:
+        """Return names of routines that occur anywhere in text."""
+        usages = {name for name in self._other_names if name in text}
+        for match in DOTTED_NAME_RE.finditer(text):
+            before, after = match.groups()
+            # the name's dataset ends right before the dot
+            for start in range(len(before)):
+                routine_names = self._names_by_dataset.get(before[start:])
+                if routine_names:
+                    # the name's routine starts right after the dot
+                    usages.update(
+                        f"{before[start:]}.{after[:end]}"
+                        for end in range(1, len(after) + 1)
+                        if after[:end] in routine_names
+                    )
+        return usages
+
+    def calls(self, text) -> Set[str]:
+        """Return names of routines that are called in text."""
+        if self._calls_re is None:
+            return set()
+        return {
+            match.group(1).replace("`", "") for match in self._calls_re.finditer(text)
+        }
+
+
+@lru_cache(maxsize=None)
+def _routine_registry(project_dir, mozfun_dir) -> RoutineRegistry:
+    return RoutineRegistry(
+        get_routines_from_dir(project_dir) + get_routines_from_dir(mozfun_dir)
+    )
+
+
+@lru_cache(maxsize=64)
+def _name_registry(names: Tuple[str, ...]) -> RoutineRegistry:
+    return RoutineRegistry([{"name": name} for name in names])
+
+
+def routine_registry(project) -> RoutineRegistry:
+    """Return the registry of routines that could be referenced by the project.
+
+    Registries are built once per process.
+    """
+    return _routine_registry(
+        os.path.abspath(project),
+        os.path.abspath(
+            Path(ConfigLoader.get("default", "sql_dir", fallback="sql")) / "mozfun"
+        ),
+    )
+
+
 def get_routines(project):
     """Return all routines that could be referenced by the project."""
-    return get_routines_from_dir(project) + get_routines_from_dir(
-        Path(ConfigLoader.get("default", "sql_dir", fallback="sql")) / "mozfun"
-    )
+    return list(routine_registry(project).routines)
 
 
 @attr.s(auto_attribs=True)
@@ -188,16 +274,7 @@ class RawRoutine:
                     procedure_start = -1
 
         # get routines that could be referenced by the UDF
-        routines = get_routines(project)
-        dependencies = []
-        for udf in routines:
-            udf_re = re.compile(
-                r"\b"
-                + r"\.".join(f"`?{name}`?" for name in udf["name"].split("."))
-                + r"\("
-            )
-            if udf_re.search("\n".join(definitions)):
-                dependencies.append(udf["name"])
+        dependencies = list(routine_registry(project).calls("\n".join(definitions)))
 
         dependencies.extend(re.findall(TEMP_UDF_RE, "\n".join(definitions)))
         dependencies = list(set(dependencies))
@@ -284,13 +361,7 @@ def accumulate_dependencies(deps, raw_routines, udf_name):
 def routine_usages_in_text(text, project):
     """Return a list of routine names used in the provided SQL text."""
     sql = sqlparse.format(text, strip_comments=True)
-    routines = get_routines(project)
-
-    udf_usages = []
-
-    for routine in routines:
-        if routine["name"] in sql:
-            udf_usages.append(routine["name"])
+    udf_usages = list(routine_registry(project).usages(sql))
 
     # the TEMP_UDF_RE matches udf_js, remove since it's not a valid UDF
     tmp_udfs = list(filter(lambda u: u != "udf_js", TEMP_UDF_RE.findall(sql)))
@@ -325,25 +396,40 @@ def sub_local_routines(test, project, raw_routines=None, stored_procedure_test=F
 
     sql = prepend_routine_usage_definitions(test, project, raw_routines)
 
-    for name, routine in raw_routines.items():
-        if name in sql:
-            for defn in routine.definitions:
-                match = PERSISTENT_UDF_RE.match(defn)
-                dataset, name = match.group(1), match.group(2)
-                replace_name = f"{dataset}_{name}"
-                if stored_procedure_test:
-                    replace_name = f"{GENERIC_DATASET}.{replace_name}"
-                sql = re.sub(
-                    rf"(?<![\w\.])(`?{routine.project}`?\.)?`?{dataset}`?\.`?{name}`?(?=\()",
-                    replace_name,
-                    sql,
-                )
+    # persistent names of the routines used in the sql, in order of raw_routines
+    used_names = _name_registry(tuple(raw_routines)).usages(sql)
+    persistent_names = tuple(
+        (routine.project, *PERSISTENT_UDF_RE.match(defn).groups())  # type: ignore
+        for name, routine in raw_routines.items()
+        if name in used_names
+        for defn in routine.definitions
+    )
+    if persistent_names:
+        replace_prefix = f"{GENERIC_DATASET}." if stored_procedure_test else ""
+        sql = _persistent_routine_re(persistent_names).sub(
+            lambda match: replace_prefix
+            + "_".join(match.group(0).replace("`", "").split(".")[-2:]),
+            sql,
+        )
 
     if not stored_procedure_test:
         sql = PERSISTENT_UDF_PREFIX.sub("CREATE TEMP FUNCTION", sql)
     return sql
 
 
+@lru_cache(maxsize=1024)
+def _persistent_routine_re(persistent_names: Tuple[Tuple[str, str, str], ...]):
+    """Return a regex matching calls of any of the persistent routines."""
+    return re.compile(
+        r"(?<![\w\.])(?:"
+        + "|".join(
+            rf"(?:`?{project}`?\.)?`?{dataset}`?\.`?{name}`?"
+            for project, dataset, name in persistent_names
+        )
+        + r")(?=\()"
+    )
+
+
 def routine_tests_sql(raw_routine, raw_routines, project):
     """
     Create tests for testing persistent UDFs.
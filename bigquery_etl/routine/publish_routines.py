@@ -1,7 +1,6 @@
 """Publish UDFs and resources to the public mozfun GCP project."""
 
 import fnmatch
-import glob
 import json
 import os
 import re
@@ -14,6 +13,7 @@ from bigquery_etl.config import ConfigLoader
 from bigquery_etl.routine.parse_routine import accumulate_dependencies, read_routine_dir
 from bigquery_etl.util import standard_args
 from bigquery_etl.util.common import project_dirs
+from bigquery_etl.util.skip_registry import PathMatcher, SkipRegistry
 
 OPTIONS_LIB_RE = re.compile(r'library = "gs://[^"]+/([^"]+)"')
 OPTIONS_RE = re.compile(r"OPTIONS(\n|\s)*\(")
@@ -89,16 +89,9 @@ def main():
         )
 
 
-def skipped_routines():
+def skipped_routines() -> PathMatcher:
     """Get skipped routines from config."""
-    return {
-        file
-        for skip in ConfigLoader.get("routine", "publish", "skip", fallback=[])
-        for file in glob.glob(
-            skip,
-            recursive=True,
-        )
-    }
+    return SkipRegistry.get("routine", "publish", "skip")
 
 
 def publish(
@@ -14,6 +14,7 @@ from google.cloud import bigquery
 from google.cloud.bigquery import SchemaField
 
 from .. import dryrun
+from ..util.artifact_store import FullLoader, load_yaml
 
 SCHEMA_FILE = "schema.yaml"
 
@@ -44,9 +45,7 @@ class Schema:
         if not schema_file.is_file() or schema_file.suffix != ".yaml":
             raise Exception(f"{schema_file} is not a valid YAML schema file.")
 
-        with open(schema_file) as file:
-            schema = yaml.load(file, Loader=yaml.FullLoader)
-            return cls(schema)
+        return cls(load_yaml(schema_file, loader=FullLoader))
 
     @classmethod
     def empty(cls):
@@ -74,6 +73,7 @@ class Schema:
                     project=project,
                     dataset=dataset,
                     table=table,
+                    use_cache=False,
                     *args,
                     **kwargs,
                 ).get_schema()
@@ -10,7 +10,7 @@ from functools import partial
 from multiprocessing.pool import ThreadPool
 from operator import attrgetter
 from textwrap import dedent
-from typing import Callable, Iterable, Optional, Tuple, Union
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
 from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
@@ -665,6 +665,33 @@ def delete_from_table(
         )
 
 
+def discover_tasks(pool, client, targets, **kwargs) -> Iterator[List[Task]]:
+    """Yield the tasks for each target table as soon as they are discovered.
+
+    targets contains (target, sources, use_sampling) tuples. Table metadata and
+    partitions are listed concurrently in pool, so tables are yielded in the order
+    in which their lookups finish. Tasks for each table are ordered so that tasks
+    without partition_id, then without time_partitioning, then most recent dates
+    are handled first.
+    """
+
+    def _delete_from_table(target_sources):
+        target, sources, use_sampling = target_sources
+        tasks = list(
+            delete_from_table(
+                client=client,
+                target=target,
+                sources=sources,
+                use_sampling=use_sampling,
+                **kwargs,
+            )
+        )
+        tasks.sort(key=attrgetter("partition_sort_key"), reverse=True)
+        return tasks
+
+    yield from pool.imap_unordered(_delete_from_table, targets)
+
+
 def main():
     """Process deletion requests."""
     args = parser.parse_args()
@@ -755,116 +782,128 @@ def main():
             f"targets: {missing_sampling_tables}"
         )
 
-    tasks = [
-        task
-        for target, sources in targets_with_sources
-        if args.table_filter(target.table)
-        for task in delete_from_table(
-            client=client,
-            target=replace(target, project=args.target_project or target.project),
-            sources=[
+    targets = [
+        (
+            replace(target, project=args.target_project or target.project),
+            [
                 replace(source, project=args.source_project or source.project)
                 for source in (sources if isinstance(sources, tuple) else (sources,))
             ],
-            source_condition=source_condition,
-            dry_run=args.dry_run,
-            use_dml=args.use_dml,
-            priority=args.priority,
-            start_date=args.start_date,
-            end_date=args.end_date,
-            max_single_dml_bytes=args.max_single_dml_bytes,
-            partition_limit=args.partition_limit,
-            state_table=args.state_table,
-            states=states,
-            sampling_parallelism=args.sampling_parallelism,
-            use_sampling=target.table in args.sampling_tables,
-            temp_dataset=args.temp_dataset,
+            target.table in args.sampling_tables,
         )
+        for target, sources in targets_with_sources
+        if args.table_filter(target.table)
     ]
+    record_tasks = args.task_table and not args.dry_run
 
-    if not tasks:
-        logging.error("No tables selected")
-        parser.exit(1)
-    # ORDER BY partition_sort_key DESC, sql_table_id ASC
-    # https://docs.python.org/3/howto/sorting.html#sort-stability-and-complex-sorts
-    tasks.sort(key=lambda task: sql_table_id(task.table))
-    tasks.sort(key=attrgetter("partition_sort_key"), reverse=True)
-
-    with ThreadPool(args.parallelism) as pool:
-        if args.task_table and not args.dry_run:
-            # record task information
-            try:
-                client.get_table(args.task_table)
-            except NotFound:
-                table = bigquery.Table(
-                    args.task_table,
-                    [
-                        bigquery.SchemaField("task_id", "STRING"),
-                        bigquery.SchemaField("start_date", "DATE"),
-                        bigquery.SchemaField("end_date", "DATE"),
-                        bigquery.SchemaField("target", "STRING"),
-                        bigquery.SchemaField("target_rows", "INT64"),
-                        bigquery.SchemaField("target_bytes", "INT64"),
-                        bigquery.SchemaField("source_bytes", "INT64"),
-                    ],
-                )
-                table.time_partitioning = bigquery.TimePartitioning()
-                client.create_table(table)
-            sources = list(set(source for task in tasks for source in task.sources))
-            source_bytes = {
-                source: job.total_bytes_processed
-                for source, job in zip(
-                    sources,
-                    pool.starmap(
-                        client.query,
-                        [
-                            (
-                                reformat(
-                                    f"""
-                                    SELECT
-                                      {source.field}
-                                    FROM
-                                      `{sql_table_id(source)}`
-                                    WHERE
-                                      {source_condition}
-                                    """
-                                ),
-                                bigquery.QueryJobConfig(dry_run=True),
-                            )
-                            for source in sources
-                        ],
-                        chunksize=1,
-                    ),
-                )
-            }
-            step = 10000  # max 10K rows per insert
-            for start in range(0, len(tasks), step):
-                end = start + step
-                BigQueryInsertError.raise_if_present(
-                    errors=client.insert_rows_json(
+    with ThreadPool(args.parallelism) as discovery_pool:
+        pool = ThreadPool(args.parallelism)
+        try:
+            if record_tasks:
+                # record task information
+                try:
+                    client.get_table(args.task_table)
+                except NotFound:
+                    table = bigquery.Table(
                         args.task_table,
                         [
-                            {
-                                "task_id": get_task_id(task.table, task.partition_id),
-                                "start_date": args.start_date.isoformat(),
-                                "end_date": args.end_date.isoformat(),
-                                "target": sql_table_id(task.table),
-                                "target_rows": task.table.num_rows,
-                                "target_bytes": task.table.num_bytes,
-                                "source_bytes": sum(
-                                    map(source_bytes.get, task.sources)
-                                ),
-                            }
-                            for task in tasks[start:end]
+                            bigquery.SchemaField("task_id", "STRING"),
+                            bigquery.SchemaField("start_date", "DATE"),
+                            bigquery.SchemaField("end_date", "DATE"),
+                            bigquery.SchemaField("target", "STRING"),
+                            bigquery.SchemaField("target_rows", "INT64"),
+                            bigquery.SchemaField("target_bytes", "INT64"),
+                            bigquery.SchemaField("source_bytes", "INT64"),
                         ],
                     )
+                    table.time_partitioning = bigquery.TimePartitioning()
+                    client.create_table(table)
+                sources = list(
+                    set(source for _, sources, _ in targets for source in sources)
                 )
-        results = pool.map(
-            client_q.with_client, (task.func for task in tasks), chunksize=1
-        )
+                source_bytes = {
+                    source: job.total_bytes_processed
+                    for source, job in zip(
+                        sources,
+                        pool.starmap(
+                            client.query,
+                            [
+                                (
+                                    reformat(
+                                        f"""
+                                        SELECT
+                                          {source.field}
+                                        FROM
+                                          `{sql_table_id(source)}`
+                                        WHERE
+                                          {source_condition}
+                                        """
+                                    ),
+                                    bigquery.QueryJobConfig(dry_run=True),
+                                )
+                                for source in sources
+                            ],
+                            chunksize=1,
+                        ),
+                    )
+                }
+            step = 10000  # max 10K rows per insert
+
+            # start deletes for each table as soon as its partitions are listed
+            results = []
+            for tasks in discover_tasks(
+                discovery_pool,
+                client,
+                targets,
+                source_condition=source_condition,
+                dry_run=args.dry_run,
+                use_dml=args.use_dml,
+                priority=args.priority,
+                start_date=args.start_date,
+                end_date=args.end_date,
+                max_single_dml_bytes=args.max_single_dml_bytes,
+                partition_limit=args.partition_limit,
+                state_table=args.state_table,
+                states=states,
+                sampling_parallelism=args.sampling_parallelism,
+                temp_dataset=args.temp_dataset,
+            ):
+                if record_tasks:
+                    # record tasks before their deletes are started
+                    task_rows = [
+                        {
+                            "task_id": get_task_id(task.table, task.partition_id),
+                            "start_date": args.start_date.isoformat(),
+                            "end_date": args.end_date.isoformat(),
+                            "target": sql_table_id(task.table),
+                            "target_rows": task.table.num_rows,
+                            "target_bytes": task.table.num_bytes,
+                            "source_bytes": sum(map(source_bytes.get, task.sources)),
+                        }
+                        for task in tasks
+                    ]
+                    for start in range(0, len(task_rows), step):
+                        BigQueryInsertError.raise_if_present(
+                            errors=client.insert_rows_json(
+                                args.task_table, task_rows[start : start + step]
+                            )
+                        )
+                results += [
+                    (task, pool.apply_async(client_q.with_client, (task.func,)))
+                    for task in tasks
+                ]
+
+            if not results:
+                logging.error("No tables selected")
+                parser.exit(1)
+        finally:
+            # wait for started deletes to finish, even if discovery failed
+            pool.close()
+            pool.join()
+
     jobs_by_table = defaultdict(list)
-    for i, job in enumerate(results):
-        jobs_by_table[tasks[i].table].append(job)
+    for task, result in results:
+        jobs_by_table[task.table].append(result.get())
     bytes_processed = rows_deleted = 0
     for table, jobs in jobs_by_table.items():
         table_bytes_processed = sum(job.total_bytes_processed or 0 for job in jobs)
@@ -0,0 +1,82 @@
+"""Process-wide store of parsed YAML artifacts, such as metadata and schema files."""
+
+import os
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Tuple
+
+import yaml
+
+# use the libyaml bindings if available, they are several times faster
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+FullLoader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+
+# maximum size of the stored artifacts in bytes
+MAX_SIZE = 256 * 1024 * 1024
+# files modified more recently than this many seconds before they were read
+# are not stored, since a change within the same mtime tick wouldn't be noticed
+MTIME_RESOLUTION = 1
+
+
+class ArtifactStore:
+    """Caches parsed YAML files keyed by path and modification time.
+
+    Parsed content is stored serialized, so each load returns a new copy
+    that callers are free to modify without corrupting the store.
+    """
+
+    def __init__(self, max_size: int = MAX_SIZE):
+        """Initialize an empty store."""
+        self.max_size = max_size
+        self._size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _version(path: str) -> Tuple[int, int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def load_yaml(self, path, loader=SafeLoader) -> Any:
+        """Return the parsed content of the YAML file at path."""
+        path = os.path.abspath(path)
+        key = (path, loader)
+        version = self._version(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return pickle.loads(entry[1])
+
+        read_time = time.time_ns()
+        with open(path) as yaml_stream:
+            content = yaml.load(yaml_stream, Loader=loader)
+
+        if read_time - version[0] > MTIME_RESOLUTION * 1e9:
+            data = pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                if (previous := self._entries.pop(key, None)) is not None:
+                    self._size -= len(previous[1])
+                self._entries[key] = (version, data)
+                self._size += len(data)
+                while self._size > self.max_size:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return content
+
+    def clear(self):
+        """Remove all stored artifacts."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_store = ArtifactStore()
+
+
+def load_yaml(path, loader=SafeLoader) -> Any:
+    """Return the parsed content of the YAML file at path from the shared store."""
+    return _store.load_yaml(path, loader)
@@ -17,15 +17,26 @@ class ClientQueue:
     finished.
     """
 
-    def __init__(self, billing_projects, parallelism, connection_pool_max_size=None):
+    def __init__(
+        self,
+        billing_projects,
+        parallelism,
+        connection_pool_max_size=None,
+        credentials=None,
+    ):
         """Initialize.
 
+        credentials are passed to the clients, which otherwise use the default credentials.
+
         connection_pool_max_size sets the pool size in the HTTP adapter of each client in
         the queue. This allows more concurrent requests when a client is shared across threads.
         See https://cloud.google.com/bigquery/docs/python-libraries#troubleshooting_connection_pool_errors
         Increasing connection_pool_max_size will also increase memory usage.
         """
-        clients = [bigquery.Client(project) for project in billing_projects]
+        clients = [
+            bigquery.Client(project, credentials=credentials)
+            for project in billing_projects
+        ]
 
         if connection_pool_max_size is not None:
             for client in clients:
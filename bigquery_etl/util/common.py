@@ -1,13 +1,13 @@
 """Generic utility functions."""
 
-import glob
+import hashlib
 import logging
 import os
 import random
 import re
 import string
-import tempfile
 import warnings
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Set, Tuple
 from uuid import uuid4
@@ -15,11 +15,13 @@ from uuid import uuid4
 import click
 import sqlglot
 from google.cloud import bigquery
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 
 from bigquery_etl.config import ConfigLoader
 from bigquery_etl.format_sql.formatter import reformat
 from bigquery_etl.metrics import MetricHub
+from bigquery_etl.util.disk_cache import cache_dir
+from bigquery_etl.util.skip_registry import SkipRegistry
 
 # Search for all camelCase situations in reverse with arbitrary lookaheads.
 REV_WORD_BOUND_PAT = re.compile(
@@ -38,6 +40,8 @@ DEFAULT_QUERY_TEMPLATE_VARS = {
 }
 ROOT = Path(__file__).parent.parent.parent
 CHECKS_MACROS_DIR = ROOT / "tests" / "checks"
+# files in a query directory that can affect how its SQL renders
+TEMPLATE_FILE_SUFFIXES = (".sql", ".jinja")
 
 
 def snake_case(line: str) -> str:
@@ -70,6 +74,38 @@ def random_str(length: int = 12) -> str:
     return "".join(random.choice(string.ascii_lowercase) for i in range(length))
 
 
+@lru_cache(maxsize=None)
+def _jinja_environment(template_folder: str) -> Environment:
+    """Return the shared Jinja environment for templates in template_folder.
+
+    Environments are reused across renders so that compiled templates are kept
+    in Jinja's template cache, and stored in the bytecode cache across processes.
+    """
+    bytecode_cache = None
+    bytecode_cache_dir = cache_dir() / "jinja"
+    try:
+        bytecode_cache_dir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(bytecode_cache_dir))
+    except OSError:
+        # caching is best effort
+        pass
+    return Environment(
+        loader=FileSystemLoader(template_folder),
+        bytecode_cache=bytecode_cache,
+    )
+
+
+@lru_cache(maxsize=None)
+def _checks_macros() -> Template:
+    """Return the template defining the macros available to checks."""
+    macro_definitions = "\n".join(
+        macro_file.read_text() for macro_file in sorted(CHECKS_MACROS_DIR.glob("*"))
+    )
+    # the macro definitions were followed by the checks template, so their trailing
+    # newline is part of the rendered checks
+    return Environment(keep_trailing_newline=True).from_string(macro_definitions + "\n")
+
+
 def render(
     sql_filename,
     template_folder=".",
@@ -79,68 +115,42 @@ def render(
 ) -> str:
     """Render a given template query using Jinja."""
     path = Path(template_folder) / sql_filename
-    skip = {
-        file
-        for skip in ConfigLoader.get("render", "skip", fallback=[])
-        for file in glob.glob(
-            skip,
-            recursive=True,
-        )
-    }
-    test_project = ConfigLoader.get("default", "test_project")
-    sql_dir = ConfigLoader.get("default", "sql_dir", fallback="sql")
-
-    if test_project in str(path):
-        # check if staged file needs to be skipped
-        skip.update(
-            [
-                p
-                for f in [Path(s) for s in skip]
-                for p in glob.glob(
-                    f"{sql_dir}/{test_project}/{f.parent.parent.name}*/{f.parent.name}/{f.name}",
-                    recursive=True,
-                )
-            ]
-        )
 
-    if any(s in str(path) for s in skip):
+    if path in SkipRegistry.render():
         rendered = path.read_text()
     else:
+        main_sql = _jinja_environment(os.path.abspath(template_folder)).get_template(
+            sql_filename
+        )
+        template_vars = DEFAULT_QUERY_TEMPLATE_VARS | kwargs
+
         if sql_filename == "checks.sql":
-            # make macros available by creating a temporary file and pasting macro definition
-            # alongside checks.
-            # it is not possible to use `include` or `import` since the macros live in a different
-            # directory than the checks Jinja template.
-            with tempfile.NamedTemporaryFile(mode="w+") as tmp_checks_file:
-                macro_imports = "\n".join(
-                    [
-                        macro_file.read_text()
-                        for macro_file in CHECKS_MACROS_DIR.glob("*")
-                    ]
-                )
-                checks_template = Path(str(tmp_checks_file.name))
-                checks_template.write_text(
-                    macro_imports
-                    + "\n"
-                    + (Path(template_folder) / sql_filename).read_text()
-                )
-
-                file_loader = FileSystemLoader(f"{str(checks_template.parent)}")
-                env = Environment(loader=file_loader)
-                main_sql = env.get_template(checks_template.name)
+            # make the check macros available to checks, as if their definitions were
+            # pasted above the checks template.
+            # it is not possible to use `include` or `import` since the macros live in a
+            # different directory than the checks Jinja template.
+            macros = _checks_macros().make_module(template_vars)
+            rendered = str(macros) + main_sql.render(
+                **(template_vars | macros.__dict__)
+            )
         else:
-            file_loader = FileSystemLoader(f"{template_folder}")
-            env = Environment(loader=file_loader)
-            main_sql = env.get_template(sql_filename)
-
-        template_vars = DEFAULT_QUERY_TEMPLATE_VARS | kwargs
-        rendered = main_sql.render(**template_vars)
+            rendered = main_sql.render(**template_vars)
 
     if format:
         rendered = reformat(rendered)
     return rendered
 
 
+def template_hash(path: Path) -> str:
+    """Return a hash of the SQL file and the templates it may include."""
+    sha = hashlib.sha256()
+    for template in sorted(path.parent.iterdir()):
+        if template == path or template.suffix in TEMPLATE_FILE_SUFFIXES:
+            sha.update(template.name.encode("utf-8"))
+            sha.update(template.read_bytes())
+    return sha.hexdigest()
+
+
 def get_table_dir(output_dir, full_table_id):
     """Return the output directory for a given table id."""
     return Path(os.path.join(output_dir, *list(full_table_id.split(".")[-2:])))
@@ -0,0 +1,124 @@
+"""On-disk cache shared across bqetl processes."""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from bigquery_etl.config import ConfigLoader
+
+CACHE_DIR_ENV_VAR = "BQETL_CACHE_DIR"
+# number of writes after which the cache is checked for entries to evict
+EVICTION_INTERVAL = 100
+
+
+def cache_dir() -> Path:
+    """Return the root directory for caches.
+
+    Can be set via the BQETL_CACHE_DIR environment variable or `default.cache_dir`
+    in bqetl_project.yaml, defaults to ~/.cache/bigquery-etl.
+    """
+    configured_dir = os.environ.get(CACHE_DIR_ENV_VAR) or ConfigLoader.get(
+        "default", "cache_dir"
+    )
+    if configured_dir:
+        return Path(configured_dir).expanduser()
+    return Path.home() / ".cache" / "bigquery-etl"
+
+
+class DiskCache:
+    """Content-addressed store of JSON-serializable values.
+
+    Each entry is written atomically to its own file, so the cache can be used
+    concurrently by multiple processes. Entries older than `ttl` seconds are
+    ignored and once the cache grows beyond `max_size` bytes the oldest entries
+    are evicted.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        directory: Optional[Path] = None,
+    ):
+        """Initialize the cache in the namespace subdirectory of the cache dir."""
+        self.directory = Path(directory or cache_dir()) / namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self._writes = 0
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Return a stable hash for JSON-serializable key parts."""
+        serialized = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return default
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return default
+
+    def set(self, key: str, value: Any):
+        """Store value for key."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=path.parent, suffix=".tmp", delete=False
+            ) as f:
+                json.dump(value, f)
+            os.replace(f.name, path)
+        except OSError as e:
+            # caching is best effort
+            print(f"Cannot write to cache {self.directory}: {e}")
+            return
+
+        if self._writes % EVICTION_INTERVAL == 0:
+            self.evict()
+        self._writes += 1
+
+    def delete(self, key: str):
+        """Remove the entry for key."""
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        """Remove all entries."""
+        for path in self.directory.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+
+    def evict(self):
+        """Remove expired entries and the oldest entries beyond max_size."""
+        entries = []
+        now = time.time()
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        if self.max_size is None:
+            return
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
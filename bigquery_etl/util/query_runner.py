@@ -0,0 +1,256 @@
+"""Run queries as BigQuery jobs in-process instead of through the bq CLI."""
+
+import subprocess
+import tempfile
+import time
+from concurrent import futures
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+from google.cloud import bigquery
+from requests import adapters
+
+# seconds between checking the state of running jobs
+POLL_INTERVAL = 1.0
+
+# bq query flags that are passed as --flag, --noflag or --flag=true|false
+BOOL_FLAGS = {
+    "append_table",
+    "batch",
+    "dry_run",
+    "replace",
+    "use_cache",
+    "use_legacy_sql",
+}
+# bq query flags that may be passed more than once
+REPEATED_FLAGS = {"label", "parameter"}
+VALUE_FLAGS = REPEATED_FLAGS | {
+    "dataset_id",
+    "destination_table",
+    "format",
+    "location",
+    "max_rows",
+    "maximum_bytes_billed",
+    "project_id",
+    "session_id",
+}
+
+
+class UnsupportedQueryArguments(ValueError):
+    """Raised for bq query arguments that can't be translated into a job config."""
+
+
+def _parse_flags(arguments: List[str]) -> Dict:
+    """Parse `bq query` arguments into a dict of flag names and values."""
+    flags: Dict = {name: [] for name in REPEATED_FLAGS}
+    for argument in arguments:
+        if argument == "query":
+            continue
+        if not argument.startswith("--"):
+            raise UnsupportedQueryArguments(f"Unsupported argument: {argument}")
+
+        name, has_value, value = argument[2:].partition("=")
+        if name in BOOL_FLAGS:
+            if has_value and value.lower() not in ("true", "false"):
+                raise UnsupportedQueryArguments(f"Invalid value: {argument}")
+            flags[name] = not has_value or value.lower() == "true"
+        elif name.startswith("no") and name[2:] in BOOL_FLAGS and not has_value:
+            flags[name[2:]] = False
+        elif name in VALUE_FLAGS and has_value:
+            if name in REPEATED_FLAGS:
+                flags[name].append(value)
+            else:
+                flags[name] = value
+        else:
+            raise UnsupportedQueryArguments(f"Unsupported argument: {argument}")
+    return flags
+
+
+def _query_parameter(parameter: str) -> bigquery.ScalarQueryParameter:
+    """Parse a bq query parameter formatted as name:type:value."""
+    try:
+        name, param_type, value = parameter.split(":", 2)
+    except ValueError:
+        raise UnsupportedQueryArguments(f"Invalid parameter: {parameter}")
+    if "<" in param_type:
+        # ARRAY and STRUCT parameters use a JSON encoding for values
+        raise UnsupportedQueryArguments(f"Unsupported parameter: {parameter}")
+    return bigquery.ScalarQueryParameter(
+        name or None, param_type.upper() or "STRING", value
+    )
+
+
+def query_job_config(
+    arguments: List[str],
+) -> Tuple[str, Optional[str], bigquery.QueryJobConfig]:
+    """Translate `bq query` arguments into a project, location and job config.
+
+    Only arguments with an equivalent in the job configuration are supported. Query
+    results are not printed, so running queries without `--format=none` requires bq.
+    Settings that bq may read from .bigqueryrc, such as the project and SQL dialect,
+    need to be set explicitly.
+    """
+    flags = _parse_flags(arguments)
+    dry_run = flags.get("dry_run", False)
+
+    if flags.get("format") != "none" and not dry_run:
+        raise UnsupportedQueryArguments("Query results can only be printed by bq")
+    if "project_id" not in flags:
+        raise UnsupportedQueryArguments("Missing --project_id")
+    if flags.get("use_legacy_sql", True):
+        raise UnsupportedQueryArguments("Legacy SQL queries must be run with bq")
+    if flags.get("replace") and flags.get("append_table"):
+        raise UnsupportedQueryArguments("Cannot both replace and append to a table")
+
+    project = flags["project_id"]
+    job_config = bigquery.QueryJobConfig(
+        dry_run=dry_run,
+        use_legacy_sql=False,
+        query_parameters=[_query_parameter(p) for p in flags["parameter"]],
+        labels=dict(label.split(":", 1) for label in flags["label"]),
+    )
+
+    if "dataset_id" in flags:
+        job_config.default_dataset = bigquery.DatasetReference.from_string(
+            flags["dataset_id"].replace(":", "."), default_project=project
+        )
+    if "destination_table" in flags:
+        destination_table = flags["destination_table"].replace(":", ".")
+        if "." not in destination_table:
+            if job_config.default_dataset is None:
+                raise UnsupportedQueryArguments(
+                    f"Unqualified destination table: {destination_table}"
+                )
+            destination_table = f"{job_config.default_dataset}.{destination_table}"
+        job_config.destination = bigquery.TableReference.from_string(
+            destination_table, default_project=project
+        )
+    if "session_id" in flags:
+        job_config.connection_properties = [
+            bigquery.ConnectionProperty("session_id", flags["session_id"])
+        ]
+    if "maximum_bytes_billed" in flags:
+        job_config.maximum_bytes_billed = int(flags["maximum_bytes_billed"])
+    if flags.get("replace"):
+        job_config.write_disposition = bigquery.WriteDisposition.WRITE_TRUNCATE
+    elif flags.get("append_table"):
+        job_config.write_disposition = bigquery.WriteDisposition.WRITE_APPEND
+    if flags.get("batch"):
+        job_config.priority = bigquery.QueryPriority.BATCH
+    if "use_cache" in flags:
+        job_config.use_query_cache = flags["use_cache"]
+
+    return project, flags.get("location"), job_config
+
+
+def run_bq_query(arguments: List[str], query_text: str):
+    """Run a query with the bq CLI."""
+    # write rendered query to a temporary file;
+    # query string cannot be passed directly to bq as SQL comments will be interpreted as CLI arguments
+    with tempfile.NamedTemporaryFile(mode="w+") as query_stream:
+        query_stream.write(query_text)
+        query_stream.seek(0)
+
+        # run the query as shell command so that passed parameters can be used as is
+        subprocess.check_call(["bq"] + arguments, stdin=query_stream)
+
+
+class QueryRunner:
+    """Runs queries as BigQuery jobs, sharing clients between threads.
+
+    Jobs are submitted without waiting for them to finish; a single background
+    thread polls all running jobs and resolves the futures returned by submit.
+    """
+
+    def __init__(self, connection_pool_max_size=None, poll_interval=POLL_INTERVAL):
+        """Initialize.
+
+        connection_pool_max_size sets the pool size in the HTTP adapter of each
+        client, which allows more concurrent requests when the runner is shared
+        across threads.
+        """
+        self.connection_pool_max_size = connection_pool_max_size
+        self.poll_interval = poll_interval
+        self._clients: Dict[str, bigquery.Client] = {}
+        self._pending: List[Tuple[bigquery.QueryJob, futures.Future]] = []
+        self._poller: Optional[Thread] = None
+        self._lock = Lock()
+
+    def client(self, project: str) -> bigquery.Client:
+        """Return the client for running jobs in project."""
+        with self._lock:
+            if project not in self._clients:
+                client = bigquery.Client(project)
+                if self.connection_pool_max_size is not None:
+                    adapter = adapters.HTTPAdapter(
+                        pool_connections=self.connection_pool_max_size,
+                        pool_maxsize=self.connection_pool_max_size,
+                    )
+                    client._http.mount("https://", adapter)
+                    client._http._auth_request.session.mount("https://", adapter)
+                self._clients[project] = client
+            return self._clients[project]
+
+    def submit(self, arguments: List[str], query_text: str) -> futures.Future:
+        """Start a query job and return a future for the finished job.
+
+        Raises UnsupportedQueryArguments if arguments can't be run in-process.
+        """
+        project, location, job_config = query_job_config(arguments)
+        job = self.client(project).query(
+            query_text, job_config=job_config, project=project, location=location
+        )
+
+        future: futures.Future = futures.Future()
+        if job_config.dry_run:
+            print(
+                "Query successfully validated. Assuming the tables are not modified, "
+                f"running this query will process {job.total_bytes_processed} bytes of data."
+            )
+            future.set_result(job)
+            return future
+
+        with self._lock:
+            self._pending.append((job, future))
+            if self._poller is None:
+                self._poller = Thread(target=self._poll, daemon=True)
+                self._poller.start()
+        return future
+
+    def run(self, arguments: List[str], query_text: str):
+        """Run a query and wait for it to finish.
+
+        Queries with arguments that have no in-process equivalent are run with bq.
+        """
+        try:
+            future = self.submit(arguments, query_text)
+        except UnsupportedQueryArguments:
+            return run_bq_query(arguments, query_text)
+        return future.result()
+
+    def _poll(self):
+        """Resolve futures of pending jobs until there are none left."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._poller = None
+                    return
+                pending = list(self._pending)
+
+            finished = []
+            for job, future in pending:
+                try:
+                    if not job.done():
+                        continue
+                    exception = job.exception()
+                except Exception as e:
+                    exception = e
+                if exception is None:
+                    future.set_result(job)
+                else:
+                    future.set_exception(exception)
+                finished.append(future)
+
+            with self._lock:
+                self._pending = [p for p in self._pending if p[1] not in finished]
+            time.sleep(self.poll_interval)
@@ -0,0 +1,129 @@
+"""Matchers for the file skip lists configured in bqetl_project.yaml."""
+
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+from bigquery_etl.config import ConfigLoader
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a recursive glob pattern into a regex matching the same paths."""
+    components = pattern.split("/")
+    regex = ""
+    for i, component in enumerate(components):
+        last = i == len(components) - 1
+        if component == "**":
+            # matches zero or more directories, or anything at the end
+            regex += ".*" if last else "(?:[^/]+/)*"
+            continue
+
+        j = 0
+        while j < len(component):
+            char = component[j]
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "[" and (end := component.find("]", j + 2)) != -1:
+                chars = component[j + 1 : end]
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                regex += f"[{chars}]"
+                j = end
+            else:
+                regex += re.escape(char)
+            j += 1
+        if not last:
+            regex += "/"
+    return regex
+
+
+class PathMatcher:
+    """Matches paths against glob patterns without scanning the filesystem.
+
+    A path matches if it ends with a path matching one of the patterns, starting
+    at a directory boundary. Relative patterns therefore also match absolute paths
+    of the same files.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """Compile the patterns into a single regex."""
+        self.patterns = tuple(patterns)
+        alternatives = [
+            ("^" if pattern.startswith("/") else "(?:^|/)")
+            + glob_to_regex(os.path.normpath(pattern))
+            for pattern in self.patterns
+        ]
+        self._regex: Optional[re.Pattern] = (
+            re.compile(f"(?:{'|'.join(alternatives)})$") if alternatives else None
+        )
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        """Return whether the path matches any of the patterns."""
+        if self._regex is None:
+            return False
+        return self._regex.search(os.path.normpath(path)) is not None
+
+    def __repr__(self):
+        """Return the patterns of the matcher."""
+        return f"PathMatcher({self.patterns!r})"
+
+
+@lru_cache(maxsize=None)
+def _path_matcher(patterns: Tuple[str, ...]) -> PathMatcher:
+    return PathMatcher(patterns)
+
+
+def _stage_pattern(pattern: str, test_project: str) -> str:
+    """Return the pattern matching files of pattern once deployed to stage.
+
+    Stage deploys rename datasets to <dataset>_<project> in the test project.
+    """
+    return re.sub(
+        r"sql/([^\/]+)/([^/]+)(/?.*|$)",
+        lambda x: f"sql/{test_project}/{x.group(2)}_{x.group(1).replace('-', '_')}*{x.group(3)}",
+        pattern,
+    )
+
+
+class SkipRegistry:
+    """Skip lists configured in bqetl_project.yaml.
+
+    The configured glob patterns are compiled into a PathMatcher once per process,
+    so checking whether a file is skipped doesn't scan the filesystem.
+    """
+
+    @staticmethod
+    def get(*config_keys: str) -> PathMatcher:
+        """Return the matcher for the skip list at the config path."""
+        return _path_matcher(tuple(ConfigLoader.get(*config_keys, fallback=[])))
+
+    @staticmethod
+    def render() -> PathMatcher:
+        """Return the matcher for files that are not rendered with Jinja."""
+        skip = ConfigLoader.get("render", "skip", fallback=[])
+        sql_dir = ConfigLoader.get("default", "sql_dir", fallback="sql")
+        test_project = ConfigLoader.get("default", "test_project", fallback="")
+        # also match staged files, in datasets with a project suffix
+        staged = [
+            f"{sql_dir}/{test_project}/{path.parent.parent.name}*/{path.parent.name}/{path.name}"
+            for path in map(Path, skip)
+        ]
+        return _path_matcher(tuple(skip + staged))
+
+    @staticmethod
+    def dry_run(sql_dir=None) -> PathMatcher:
+        """Return the matcher for files skipped by dry run in sql_dir."""
+        skip = ConfigLoader.get("dry_run", "skip", fallback=[])
+        default_sql_dir = ConfigLoader.get("default", "sql_dir", fallback="sql")
+        sql_dir = str(sql_dir or default_sql_dir)
+        test_project = ConfigLoader.get("default", "test_project", fallback="")
+        default_sql_dir_re = re.compile(rf"^{re.escape(default_sql_dir)}/")
+        return _path_matcher(
+            tuple(default_sql_dir_re.sub(f"{sql_dir}/", pattern) for pattern in skip)
+            # also match renamed queries in stage
+            + tuple(_stage_pattern(pattern, test_project) for pattern in skip)
+        )
@@ -0,0 +1,138 @@
+"""In-memory catalog of the files in a sql/ directory tree."""
+
+import copy
+import os
+import re
+from collections import defaultdict
+from fnmatch import translate
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ArtifactKey = Tuple[str, str, str]
+
+
+@lru_cache(maxsize=None)
+def _compile_file_patterns(patterns: Tuple[str, ...]) -> re.Pattern:
+    """Compile file name glob patterns into a single regex."""
+    return re.compile("|".join(f"(?:{translate(p)})" for p in patterns))
+
+
+class SqlCatalog:
+    """Index of the files in a sql/ directory tree.
+
+    The tree is walked once and files are indexed by the (project, dataset, table)
+    directories they are located in. Catalogs are shared across the process via
+    `SqlCatalog.for_path()`, which rebuilds the catalog only if a directory in the
+    tree has been modified since it was indexed. Returned paths are relative to
+    the root as it was passed in by the caller.
+    """
+
+    _catalogs: Dict[str, "SqlCatalog"] = {}
+    _lock = Lock()
+
+    def __init__(self, root):
+        """Walk the directory tree under root and build the indexes."""
+        self.root = Path(root)
+        self._abs_root = os.path.abspath(root)
+        self._dir_mtimes: Dict[str, Optional[int]] = {}
+        self._files: List[Tuple[str, ...]] = []
+        self._artifacts: Dict[ArtifactKey, List[Tuple[str, ...]]] = defaultdict(list)
+        self._build()
+
+    @classmethod
+    def for_path(cls, root) -> "SqlCatalog":
+        """Return the shared catalog for root, re-indexing it if it is stale."""
+        key = os.path.abspath(root)
+        with cls._lock:
+            catalog = cls._catalogs.get(key)
+            if catalog is None or catalog.is_stale():
+                catalog = cls(key)
+                cls._catalogs[key] = catalog
+
+        # share the indexes, but resolve paths against the root passed in
+        view = copy.copy(catalog)
+        view.root = Path(root)
+        return view
+
+    @staticmethod
+    def _mtime(path) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _build(self):
+        """Walk the tree, following symlinks like glob() does."""
+        root_parts = Path(self._abs_root).parts
+        visited = set()
+        stack: List[Tuple[str, ...]] = [()]
+
+        while stack:
+            rel_dir = stack.pop()
+            path = os.path.join(self._abs_root, *rel_dir)
+            real_path = os.path.realpath(path)
+            if real_path in visited:
+                continue
+            visited.add(real_path)
+
+            # record mtime before listing so that concurrent changes mark the catalog stale
+            self._dir_mtimes[path] = self._mtime(path)
+            try:
+                entries = sorted(os.scandir(path), key=lambda e: e.name)
+            except OSError:
+                continue
+
+            subdirs = []
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    subdirs.append(rel_dir + (entry.name,))
+                else:
+                    rel_file = rel_dir + (entry.name,)
+                    self._files.append(rel_file)
+                    parts = root_parts + rel_file
+                    if len(parts) >= 4:
+                        self._artifacts[tuple(parts[-4:-1])].append(rel_file)
+
+            stack.extend(reversed(subdirs))
+
+    def is_stale(self) -> bool:
+        """Check whether any directory in the tree was changed after indexing."""
+        return any(
+            self._mtime(path) != mtime for path, mtime in self._dir_mtimes.items()
+        )
+
+    @staticmethod
+    def _in_subdir(rel_file: Tuple[str, ...], subdir: Optional[str]) -> bool:
+        return subdir is None or (len(rel_file) > 1 and rel_file[0] == subdir)
+
+    def files(self, file_patterns: Iterable[str], subdir=None) -> List[Path]:
+        """Return paths to files with names matching any of the glob patterns."""
+        pattern = _compile_file_patterns(tuple(file_patterns))
+        return [
+            self.root.joinpath(*rel_file)
+            for rel_file in self._files
+            if self._in_subdir(rel_file, subdir) and pattern.match(rel_file[-1])
+        ]
+
+    def artifacts(
+        self,
+        file_patterns: Iterable[str],
+        subdir=None,
+        key_filter: Optional[Callable[[ArtifactKey], bool]] = None,
+    ) -> Iterator[Tuple[ArtifactKey, List[Path]]]:
+        """Yield (project, dataset, table) with paths to files matching the patterns."""
+        pattern = _compile_file_patterns(tuple(file_patterns))
+        for key, rel_files in self._artifacts.items():
+            if key_filter is not None and not key_filter(key):
+                continue
+            paths = [
+                self.root.joinpath(*rel_file)
+                for rel_file in rel_files
+                if self._in_subdir(rel_file, subdir) and pattern.match(rel_file[-1])
+            ]
+            if paths:
+                yield key, paths
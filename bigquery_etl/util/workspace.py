@@ -0,0 +1,42 @@
+"""Scratch copies of directory trees that share file content with the original."""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+
+def _link(src, dst):
+    """Link dst to src, preferring hard links over symlinks."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        # hard links don't work across file systems
+        os.symlink(os.path.abspath(src), dst)
+
+
+def link_tree(src, dst):
+    """Mirror the directory tree at src in dst without copying any file content.
+
+    Directories are created in dst while files are linked to the files in src,
+    so that unchanged files are served from the original tree. Changing a file in
+    dst requires replacing it, e.g. via `replace_text()`, since writing to the file
+    in place would modify the original file as well.
+    """
+    shutil.copytree(src, dst, copy_function=_link, dirs_exist_ok=True)
+
+
+def replace_text(path, content):
+    """Replace the file at path with a new file containing content.
+
+    Unlike `Path.write_text()` this never writes through a link, so files in a
+    tree created by `link_tree()` can be changed without affecting the original.
+    """
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as tmp_file:
+        tmp_file.write(content)
+    if path.exists():
+        shutil.copymode(path, tmp_file.name)
+    os.replace(tmp_file.name, path)
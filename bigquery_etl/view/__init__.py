@@ -1,6 +1,5 @@
 """Represents a SQL view."""
 
-import glob
 import re
 import string
 import sys
@@ -26,6 +25,7 @@ from bigquery_etl.metadata.parse_metadata import (
 from bigquery_etl.schema import SCHEMA_FILE, Schema
 from bigquery_etl.util import extract_from_query_path
 from bigquery_etl.util.common import render
+from bigquery_etl.util.skip_registry import PathMatcher, SkipRegistry
 
 # Regex matching CREATE VIEW statement so it can be removed to get the view query
 CREATE_VIEW_PATTERN = re.compile(
@@ -135,31 +135,17 @@ class View:
         )
         return cls(path, name, dataset, project)
 
-    def skip_validation(self):
+    def skip_validation(self) -> PathMatcher:
         """Get views that should be skipped during validation."""
-        return {
-            file
-            for skip in ConfigLoader.get("view", "validation", "skip", fallback=[])
-            for file in glob.glob(
-                skip,
-                recursive=True,
-            )
-        }
+        return SkipRegistry.get("view", "validation", "skip")
 
-    def skip_publish(self):
+    def skip_publish(self) -> PathMatcher:
         """Get views that should be skipped during publishing."""
-        return {
-            file
-            for skip in ConfigLoader.get("view", "publish", "skip", fallback=[])
-            for file in glob.glob(
-                skip,
-                recursive=True,
-            )
-        }
+        return SkipRegistry.get("view", "publish", "skip")
 
     def is_valid(self) -> bool:
         """Validate the SQL view definition."""
-        if any(str(self.path).endswith(p) for p in self.skip_validation()):
+        if self.path in self.skip_validation():
             print(f"Skipped validation for {self.path}")
             return True
         return self._valid_fully_qualified_references() and self._valid_view_naming()
@@ -294,7 +280,7 @@ class View:
 
     def has_changes(self, target_project=None, credentials=None):
         """Determine whether there are any changes that would be published."""
-        if any(str(self.path).endswith(p) for p in self.skip_publish()):
+        if self.path in self.skip_publish():
             return False
 
         if target_project and self.project != ConfigLoader.get(
@@ -361,16 +347,13 @@ class View:
 
         If `target_project` is set, it will replace the project ID in the view definition.
         """
-        if any(str(self.path).endswith(p) for p in self.skip_publish()):
+        if self.path in self.skip_publish():
             print(f"Skipping {self.path}")
             return True
 
         # avoid checking references since Jenkins might throw an exception:
         # https://github.com/mozilla/bigquery-etl/issues/2246
-        if (
-            any(str(self.path).endswith(p) for p in self.skip_validation())
-            or self._valid_view_naming()
-        ):
+        if self.path in self.skip_validation() or self._valid_view_naming():
             client = client or bigquery.Client()
             sql = self.content
             target_view = self.target_view_identifier(target_project)
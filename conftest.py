@@ -35,6 +35,12 @@ def pytest_collection_modifyitems(config, items):
             item.add_marker(skip_integration)
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep on-disk caches of tests separate from each other and from the user's cache."""
+    monkeypatch.setenv("BQETL_CACHE_DIR", str(tmp_path / ".bqetl_cache"))
+
+
 @pytest.fixture
 def project_id():
     """Provide a BigQuery project ID."""
@@ -1,9 +1,13 @@
 """Upload symbols used in crash pings."""
 
+import hashlib
+import os
+import tempfile
 from datetime import datetime
 from functools import partial
 from multiprocessing.pool import ThreadPool as Pool
 from pathlib import Path
+from threading import Lock
 
 import click
 import requests
@@ -19,6 +23,108 @@ SCHEMA_FILE = Path(__file__).parent / "schema.yaml"
 OUTPUT_SCHEMA = bigquery.SchemaField.from_api_repr(
     {"name": "root", "type": "RECORD", **yaml.safe_load(SCHEMA_FILE.read_text())}
 ).fields
+DEFAULT_SYMCACHE_MAX_SIZE_GIB = 20
+
+
+class SymcacheStore:
+    """Size-bounded on-disk store of symcaches built from symbol files.
+
+    Symcaches are keyed by debug file and debug id, so popular modules are only
+    downloaded and parsed once across runs. Files are written atomically and the
+    store can be shared by worker threads. Once the store grows beyond max_size
+    bytes the least recently used symcaches are evicted.
+    """
+
+    def __init__(self, directory, max_size):
+        """Initialize the store in directory."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = Lock()
+        self._key_locks = {}
+        self._size = sum(
+            path.stat().st_size
+            for pattern in ("*.symcache", "*.module")
+            for path in self.directory.glob(pattern)
+        )
+
+    @staticmethod
+    def _key(debug_file, debug_id):
+        try:
+            debug_id = symbolic.normalize_debug_id(debug_id)
+        except symbolic.ParseDebugIdError:
+            pass
+        return debug_file, debug_id
+
+    def _path(self, debug_file, debug_id):
+        key = "/".join(self._key(debug_file, debug_id))
+        return self.directory / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def lock(self, debug_file, debug_id):
+        """Return the lock for building the symcache of a symbol file.
+
+        Holding it while downloading makes concurrent lookups of the same module
+        wait for the stored symcache instead of downloading it again.
+        """
+        with self._lock:
+            return self._key_locks.setdefault(self._key(debug_file, debug_id), Lock())
+
+    def get(self, debug_file, debug_id):
+        """Return the symcache and module filename, or None if not stored."""
+        path = self._path(debug_file, debug_id)
+        symcache_path = path.with_suffix(".symcache")
+        try:
+            module_filename = path.with_suffix(".module").read_text()
+            symcache = symbolic.SymCache.open(str(symcache_path))
+            # mark as recently used
+            os.utime(symcache_path)
+        except (OSError, symbolic.SymbolicError):
+            return None
+        if not symcache.is_latest_version:
+            return None  # written by an older version of symbolic
+        return symcache, module_filename
+
+    def put(self, debug_file, debug_id, symcache, module_filename):
+        """Store the symcache and module filename for a symbol file."""
+        path = self._path(debug_file, debug_id)
+        size = 0
+        # the module file is written first, it's only read if the symcache exists
+        for suffix, write in (
+            (".module", lambda f: f.write(module_filename.encode("utf-8"))),
+            (".symcache", symcache.dump_into),
+        ):
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=self.directory, suffix=".tmp", delete=False
+            ) as f:
+                write(f)
+            size += os.path.getsize(f.name)
+            os.replace(f.name, path.with_suffix(suffix))
+
+        with self._lock:
+            self._size += size
+            if self._size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """Remove the least recently used symcaches until below max_size."""
+        entries = []
+        for symcache_path in self.directory.glob("*.symcache"):
+            module_path = symcache_path.with_suffix(".module")
+            try:
+                stat = symcache_path.stat()
+                size = stat.st_size + module_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, size, symcache_path, module_path))
+
+        self._size = sum(size for _, size, _, _ in entries)
+        for _, size, symcache_path, module_path in sorted(entries):
+            if self._size <= self.max_size:
+                break
+            # open symcaches are memory mapped and remain readable
+            symcache_path.unlink(missing_ok=True)
+            module_path.unlink(missing_ok=True)
+            self._size -= size
 
 
 def _bytes_split_generator(item, sep):
@@ -49,22 +155,17 @@ def _get_module_filename(sym_file, debug_filename):
     return debug_filename
 
 
-def _get_symbols(session, source_url, submission_date, row):
-    """Get symbols needed from a single symbol file.
+def _download_symcache(session, source_url, debug_file, debug_id):
+    """Download a symbol file and build its symcache.
 
-    This may be rearchitected to use eliot by sending per-module jobs.
+    Returns an error or None, and the symcache and module filename, which are None
+    if the symbol file doesn't exist.
     """
-    debug_file = row["debug_file"]
-    debug_id = row["debug_id"]
-    module_offsets = row["module_offsets"]
-
-    symbols = []
     if debug_file.endswith(".pdb"):
         sym_filename = debug_file[:-4] + ".sym"
     else:
         sym_filename = debug_file + ".sym"
 
-    request_timestamp = datetime.utcnow()
     try:
         resp = session.get(
             f"{source_url}/{debug_file}/{debug_id}/{sym_filename}",
@@ -74,10 +175,10 @@ def _get_symbols(session, source_url, submission_date, row):
             resp.raise_for_status()
     except (ConnectionError, HTTPError) as e:
         print("ERROR: could not get symbols: " f"{debug_file} {debug_id} {e}")
-        return e, []
+        return e, None
     if resp.status_code == 404:
         print("WARNING: symbols not found: " f"{debug_file} {debug_id}")
-        return None, []
+        return None, None
     if resp.status_code == 400:
         print(
             f"400 Invalid Request {resp.request.url}: "
@@ -91,6 +192,30 @@ def _get_symbols(session, source_url, submission_date, row):
     sym_archive = symbolic.Archive.from_bytes(sym_file)
     symcache = sym_archive.get_object(debug_id=norm_debug_id).make_symcache()
     module_filename = _get_module_filename(sym_file, debug_file)
+    return None, (symcache, module_filename)
+
+
+def _get_symbols(session, source_url, submission_date, symcache_store, row):
+    """Get symbols needed from a single symbol file.
+
+    This may be rearchitected to use eliot by sending per-module jobs.
+    """
+    debug_file = row["debug_file"]
+    debug_id = row["debug_id"]
+    module_offsets = row["module_offsets"]
+
+    symbols = []
+    request_timestamp = datetime.utcnow()
+    with symcache_store.lock(debug_file, debug_id):
+        cached = symcache_store.get(debug_file, debug_id)
+        if cached is None:
+            error, cached = _download_symcache(
+                session, source_url, debug_file, debug_id
+            )
+            if cached is None:
+                return error, []
+            symcache_store.put(debug_file, debug_id, *cached)
+    symcache, module_filename = cached
 
     # https://github.com/mozilla-services/eliot/blob/be74cd6c0ef09dd85a71c8b1b22c3297b6b9f9bf/eliot/symbolicate_resource.py#L505-L553
     for module_offset in module_offsets:
@@ -178,6 +303,18 @@ def _get_symbols(session, source_url, submission_date, row):
     "--destination-table",
     default="moz-fx-data-shared-prod.telemetry_derived.crash_symbols_v1",
 )
+@click.option(
+    "--symcache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    required=True,
+    help="Directory for caching symcaches built from symbol files across runs."
+    " Must be on a volume that persists between runs for the cache to be reused.",
+)
+@click.option(
+    "--symcache-max-size",
+    default=DEFAULT_SYMCACHE_MAX_SIZE_GIB,
+    help="Maximum size of the symcache directory in GiB.",
+)
 def main(
     collect_only_missing,
     parallelism,
@@ -185,6 +322,8 @@ def main(
     source_table,
     source_url,
     destination_table,
+    symcache_dir,
+    symcache_max_size,
 ):
     bq = bigquery.Client()
     query_job = bq.query(
@@ -265,14 +404,17 @@ def main(
     adapter = HTTPAdapter(max_retries=retry_strategy)
     session = requests.Session()
     session.mount("https://", adapter)
-    _get_symbols_with_args = partial(_get_symbols, session, source_url, submission_date)
+    symcache_store = SymcacheStore(symcache_dir, symcache_max_size * 1024**3)
+    _get_symbols_with_args = partial(
+        _get_symbols, session, source_url, submission_date, symcache_store
+    )
 
     symbols = []
     symbol_errors = []
     with Pool(parallelism) as pool:
         for error, _symbols in pool.imap(_get_symbols_with_args, rows, chunksize=1):
             if error is None:
-                symbols.extend(symbols)
+                symbols.extend(_symbols)
             else:
                 symbol_errors.append(error)
 
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 import yaml
 from click.testing import CliRunner
-from google.api_core.exceptions import NotFound
+from google.api_core.exceptions import BadRequest, NotFound
 
 from bigquery_etl.backfill.parse import (
     BACKFILL_FILE,
@@ -1501,14 +1501,14 @@ class TestBackfill:
         assert delete_table.call_count == 1
 
     @patch("google.cloud.bigquery.Client")
-    @patch("subprocess.check_call")
+    @patch("bigquery_etl.cli.query.QueryRunner.run")
     @patch("bigquery_etl.cli.backfill.deploy_table")
     @patch("bigquery_etl.cli.backfill.Schema.from_query_file")
     def test_initiate_partitioned_backfill(
         self,
         mock_from_query_file,
         mock_deploy_table,
-        check_call,
+        run_query,
         mock_client,
         runner,
     ):
@@ -1580,9 +1580,9 @@ class TestBackfill:
             for day in range(3, 9)
         ]
 
-        # this is inspecting calls to the underlying subprocess.check_call(["bq]"...)
-        assert check_call.call_count == 12  # 6 for dry run, 6 for backfill
-        for call in check_call.call_args_list:
+        # this is inspecting the bq query arguments of the underlying query runs
+        assert run_query.call_count == 12  # 6 for dry run, 6 for backfill
+        for call in run_query.call_args_list:
             submission_date_params = [
                 arg for arg in call.args[0] if "--parameter=submission_date" in arg
             ]
@@ -1595,11 +1595,11 @@ class TestBackfill:
             assert destination_table_params[0] in expected_destination_table_params
 
     @patch("google.cloud.bigquery.Client")
-    @patch("subprocess.check_call")
+    @patch("bigquery_etl.cli.query.QueryRunner.run")
     @patch("bigquery_etl.cli.backfill.deploy_table")
     @patch("bigquery_etl.cli.backfill.Schema.from_query_file")
     def test_initiate_partitioned_backfill_without_schema_should_pass(
-        self, mock_from_query_file, mock_deploy_table, check_call, mock_client, runner
+        self, mock_from_query_file, mock_deploy_table, run_query, mock_client, runner
     ):
         backfill_staging_table_name = (
             "moz-fx-data-shared-prod.backfills_staging_derived.test__test_query_v1"
@@ -1662,9 +1662,9 @@ class TestBackfill:
             for day in range(3, 9)
         ]
 
-        # this is inspecting calls to the underlying subprocess.check_call(["bq]"...)
-        assert check_call.call_count == 12  # 6 for dry run, 6 for backfill
-        for call in check_call.call_args_list:
+        # this is inspecting the bq query arguments of the underlying query runs
+        assert run_query.call_count == 12  # 6 for dry run, 6 for backfill
+        for call in run_query.call_args_list:
             submission_date_params = [
                 arg for arg in call.args[0] if "--parameter=submission_date" in arg
             ]
@@ -1677,11 +1677,11 @@ class TestBackfill:
             assert destination_table_params[0] in expected_destination_table_params
 
     @patch("google.cloud.bigquery.Client")
-    @patch("subprocess.check_call")
+    @patch("bigquery_etl.cli.query.QueryRunner.run")
     @patch("bigquery_etl.cli.backfill.deploy_table")
     @patch("bigquery_etl.cli.backfill.Schema.from_query_file")
     def test_initiate_partitioned_backfill_with_valid_billing_project_from_entry(
-        self, mock_from_query_file, mock_deploy_table, check_call, mock_client, runner
+        self, mock_from_query_file, mock_deploy_table, run_query, mock_client, runner
     ):
         backfill_staging_table_name = (
             "moz-fx-data-shared-prod.backfills_staging_derived.test__test_query_v1"
@@ -1749,9 +1749,9 @@ class TestBackfill:
             for day in range(3, 9)
         ]
 
-        # this is inspecting calls to the underlying subprocess.check_call(["bq]"...)
-        assert check_call.call_count == 12  # 6 for dry run, 6 for backfill
-        for call in check_call.call_args_list:
+        # this is inspecting the bq query arguments of the underlying query runs
+        assert run_query.call_count == 12  # 6 for dry run, 6 for backfill
+        for call in run_query.call_args_list:
             submission_date_params = [
                 arg for arg in call.args[0] if "--parameter=submission_date" in arg
             ]
@@ -1820,6 +1820,56 @@ class TestBackfill:
         assert result.exit_code == 1
         assert "Backfill initiate failed to deploy" in str(result.exception)
 
+    @patch("google.cloud.bigquery.Client")
+    @patch("bigquery_etl.cli.query.QueryRunner.run")
+    @patch("bigquery_etl.cli.backfill.deploy_table")
+    @patch("bigquery_etl.cli.backfill.Schema.from_query_file")
+    def test_initiate_backfill_with_failed_query(
+        self, mock_from_query_file, mock_deploy_table, run_query, mock_client, runner
+    ):
+        backfill_staging_table_name = (
+            "moz-fx-data-shared-prod.backfills_staging_derived.test__test_query_v1"
+        )
+
+        run_query.side_effect = BadRequest("Syntax error")
+        mock_client().get_table.side_effect = [
+            NotFound(  # Check that staging data does not exist
+                f"{backfill_staging_table_name}_backup_2021_05_03" "not found"
+            ),
+            None,  # Check that production data exists during dry run
+            None,  # Check that production data exists
+        ]
+
+        backfill_file = Path(QUERY_DIR) / BACKFILL_FILE
+        backfill_file.write_text(
+            """
+        2021-05-03:
+          start_date: 2021-01-03
+          end_date: 2021-01-08
+          reason: test_reason
+          watchers:
+          - test@example.org
+          status: Initiate
+          override_retention_limit: True
+          """
+        )
+
+        result = runner.invoke(
+            initiate,
+            [
+                "moz-fx-data-shared-prod.test.test_query_v1",
+                "--parallelism=0",
+            ],
+        )
+
+        assert result.exit_code == 1
+        assert isinstance(result.exception, ValueError)
+        assert (
+            "Backfill initiate resulted in error for "
+            "moz-fx-data-shared-prod.test.test_query_v1"
+        ) in str(result.exception)
+        assert isinstance(result.exception.__cause__, BadRequest)
+
     @patch("google.cloud.bigquery.Client")
     def test_initiate_partitioned_backfill_with_invalid_billing_project_from_entry_should_fail(
         self, mock_client, runner
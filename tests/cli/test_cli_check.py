@@ -1,10 +1,18 @@
 from pathlib import Path
 from textwrap import dedent
+from unittest.mock import Mock, patch
 
 import pytest
 from click.testing import CliRunner
+from google.api_core.exceptions import BadRequest
 
-from bigquery_etl.cli.check import _build_jinja_parameters, _parse_check_output, _render
+from bigquery_etl.cli.check import (
+    _build_jinja_parameters,
+    _parse_check_output,
+    _render,
+    _run_checks,
+    run,
+)
 
 
 class TestCheck:
@@ -71,3 +79,67 @@ class TestCheck:
         )
 
         assert actual == expected
+
+    @patch("bigquery_etl.cli.check.is_authenticated", return_value=True)
+    def test_check_run(self, _is_authenticated, runner, tmp_path):
+        checks_dir = tmp_path / "sql" / "moz-fx-data-shared-prod" / "test" / "test_v1"
+        checks_dir.mkdir(parents=True)
+        (checks_dir / "checks.sql").write_text(
+            dedent(
+                """
+                #fail
+                SELECT 1;
+
+                #warn
+                SELECT 2;
+
+                #fail
+                ASSERT FALSE AS 'ETL Data Check Failed: no rows';
+                """
+            )
+        )
+
+        passed_job = Mock()
+        passed_job.done.return_value = True
+        passed_job.exception.return_value = None
+        failed_job = Mock()
+        failed_job.done.return_value = True
+        failed_job.exception.return_value = BadRequest(
+            "Query error: ETL Data Check Failed: no rows at [1:1]"
+        )
+
+        with patch("google.cloud.bigquery.Client") as client:
+            client.return_value.query.side_effect = lambda query, **kwargs: (
+                failed_job if "ASSERT" in query else passed_job
+            )
+            result = runner.invoke(
+                run,
+                [
+                    "test.test_v1",
+                    f"--sql_dir={tmp_path / 'sql'}",
+                    "--parameter=submission_date:DATE:2023-07-01",
+                ],
+            )
+
+        assert result.exit_code == 1
+        assert client.return_value.query.call_count == 2
+        job_config = client.return_value.query.call_args.kwargs["job_config"]
+        assert job_config.query_parameters[0].name == "submission_date"
+        assert "PASSED moz-fx-data-shared-prod.test.test_v1 check 1" in result.output
+        assert "FAILED moz-fx-data-shared-prod.test.test_v1 check 2" in result.output
+        assert "ETL Data Check Failed: no rows at [1:1]" in result.output
+        assert "1 of 2 checks passed, 1 failed" in result.output
+
+    @patch("bigquery_etl.cli.check.QueryRunner")
+    def test_run_checks_with_runner(self, query_runner):
+        runner = Mock()
+        checks = [("p.d.t", ["--parameter=a:INT64:1"], ["SELECT 1", "SELECT 2"])]
+
+        results = _run_checks(checks, parallelism=2, runner=runner)
+
+        query_runner.assert_not_called()
+        assert runner.submit.call_count == 2
+        assert [(r.table, r.index, r.passed) for r in results] == [
+            ("p.d.t", 1, True),
+            ("p.d.t", 2, True),
+        ]
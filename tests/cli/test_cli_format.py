@@ -1,9 +1,11 @@
 import os
+from unittest.mock import patch
 
 import pytest
 from click.testing import CliRunner
 
 from bigquery_etl.cli.format import format as sql_format
+from bigquery_etl.format_sql.format import _format_path
 
 
 class TestFormat:
@@ -36,3 +38,26 @@ class TestFormat:
             assert "2 files reformatted" in result.output
             assert "1 file invalid" in result.output
             assert result.exit_code == 0
+
+    def test_format_cache(self, runner):
+        with runner.isolated_filesystem():
+            os.makedirs("sql/test-project/test/foo_v1")
+            path = "sql/test-project/test/foo_v1/query.sql"
+            with open(path, "w") as f:
+                f.write("SELECT 1 FROM test")
+
+            # reformatted files are checked again on the next run
+            assert _format_path(False, path, use_cache=True) == (1, 0)
+            assert _format_path(True, path, use_cache=True) == (0, 0)
+
+            with patch(
+                "bigquery_etl.format_sql.format.qualify_table_references_in_file"
+            ) as qualify:
+                assert _format_path(True, path, use_cache=True) == (0, 0)
+                assert not qualify.called
+
+                with open(path, "w") as f:
+                    f.write("SELECT 2 FROM test")
+                qualify.side_effect = NotImplementedError
+                assert _format_path(True, path, use_cache=True) == (1, 0)
+                assert qualify.called
@@ -509,7 +509,7 @@ class TestQuery:
             runner.isolated_filesystem(),
             # Mock client to avoid NotFound
             patch("google.cloud.bigquery.Client", autospec=True),
-            patch("subprocess.check_call", autospec=True) as check_call,
+            patch("bigquery_etl.cli.query.QueryRunner.run") as run_query,
         ):
             os.makedirs("sql/moz-fx-data-shared-prod/telemetry_derived/query_v1")
 
@@ -555,8 +555,8 @@ class TestQuery:
                 for day in (3, 5, 6, 7)
             ]
 
-            assert check_call.call_count == 4
-            for call in check_call.call_args_list:
+            assert run_query.call_count == 4
+            for call in run_query.call_args_list:
                 submission_date_params = [
                     arg for arg in call.args[0] if "--parameter=submission_date" in arg
                 ]
@@ -568,7 +568,7 @@ class TestQuery:
             runner.isolated_filesystem(),
             # Mock client to avoid NotFound
             patch("google.cloud.bigquery.Client", autospec=True),
-            patch("subprocess.check_call", autospec=True) as check_call,
+            patch("bigquery_etl.cli.query.QueryRunner.run") as run_query,
         ):
             os.makedirs("sql/moz-fx-data-shared-prod/telemetry_derived/query_v1")
 
@@ -615,9 +615,9 @@ class TestQuery:
             expected_submission_date_params = [
                 f"--parameter=submission_date:DATE:2021-01-0{day}" for day in (5, 6)
             ]
-            assert check_call.call_count == 2
+            assert run_query.call_count == 2
 
-            for call in check_call.call_args_list:
+            for call in run_query.call_args_list:
                 submission_date_params = [
                     arg for arg in call.args[0] if "--parameter=submission_date" in arg
                 ]
@@ -633,7 +633,7 @@ class TestQuery:
             runner.isolated_filesystem(),
             # Mock client to avoid NotFound
             patch("google.cloud.bigquery.Client", autospec=True),
-            patch("subprocess.check_call", autospec=True) as check_call,
+            patch("bigquery_etl.cli.query.QueryRunner.run") as run_query,
         ):
             os.makedirs("sql/moz-fx-data-shared-prod/telemetry_derived/query_v1")
 
@@ -686,8 +686,8 @@ class TestQuery:
 
             assert result.exit_code == 0
 
-            assert check_call.call_count == 5
-            for call in check_call.call_args_list:
+            assert run_query.call_count == 5
+            for call in run_query.call_args_list:
                 destination_table_params = [
                     arg for arg in call.args[0] if "--destination_table" in arg
                 ]
@@ -709,7 +709,7 @@ class TestQuery:
                 assert conversion_params[0] == "--parameter=conversion_window:INT64:30"
 
     @patch("bigquery_etl.cli.query.get_credentials")
-    @patch("bigquery_etl.cli.query.get_id_token")
+    @patch("bigquery_etl.dryrun.get_id_token")
     @patch("bigquery_etl.cli.query.deploy_table")
     def test_deploy(
         self, mock_deploy_table, mock_get_id_token, mock_get_credentials, runner
@@ -753,13 +753,12 @@ class TestQuery:
                 respect_dryrun_skip=True,
                 sql_dir="sql/",
                 credentials=None,
-                id_token=None,
             )
-            mock_get_id_token.assert_called_once()
+            mock_get_id_token.assert_not_called()
             mock_get_credentials.assert_called_once()
 
     @patch("bigquery_etl.cli.query.get_credentials")
-    @patch("bigquery_etl.cli.query.get_id_token")
+    @patch("bigquery_etl.dryrun.get_id_token")
     @patch("bigquery_etl.cli.query.deploy_table")
     def test_deploy_schema(
         self, mock_deploy_table, mock_get_id_token, mock_get_credentials, runner
@@ -811,13 +810,12 @@ class TestQuery:
                 respect_dryrun_skip=True,
                 sql_dir="sql/",
                 credentials=None,
-                id_token=None,
             )
-            mock_get_id_token.assert_called_once()
+            mock_get_id_token.assert_not_called()
             mock_get_credentials.assert_called_once()
 
     @patch("bigquery_etl.cli.query.get_credentials")
-    @patch("bigquery_etl.cli.query.get_id_token")
+    @patch("bigquery_etl.dryrun.get_id_token")
     @patch("bigquery_etl.cli.query.deploy_table")
     def test_deploy_schema_no_duplicate(
         self, mock_deploy_table, mock_get_id_token, mock_get_credentials, runner
@@ -875,13 +873,12 @@ class TestQuery:
                 respect_dryrun_skip=True,
                 sql_dir="sql/",
                 credentials=None,
-                id_token=None,
             )
-            mock_get_id_token.assert_called_once()
+            mock_get_id_token.assert_not_called()
             mock_get_credentials.assert_called_once()
 
     @patch("bigquery_etl.cli.query.get_credentials")
-    @patch("bigquery_etl.cli.query.get_id_token")
+    @patch("bigquery_etl.dryrun.get_id_token")
     @patch("bigquery_etl.cli.query.deploy_table")
     def test_prevent_deploy_for_views(
         self, mock_deploy_table, mock_get_id_token, mock_get_credentials, runner
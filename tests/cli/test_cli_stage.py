@@ -0,0 +1,95 @@
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from bigquery_etl.cli.stage import _deploy_artifacts, _update_references
+
+
+class TestStage:
+    @pytest.fixture
+    def sql_dir(self, tmp_path):
+        sql_dir = tmp_path / "sql"
+        files = {
+            "moz-fx-data-test-project/test/artifact/view.sql": (
+                "CREATE OR REPLACE VIEW `moz-fx-data-test-project.test.artifact` AS "
+                "SELECT * FROM `moz-fx-data-test-project.test_derived.artifact_v1`"
+            ),
+            "moz-fx-data-test-project/test_derived/artifact_v1/query.sql": "SELECT 1",
+            "moz-fx-data-test-project/test/downstream/view.sql": (
+                "SELECT * FROM test.artifact JOIN `test`.`artifact_2` "
+                "JOIN moz-fx-data-test-project.test.artifact"
+            ),
+            "moz-fx-data-other-project/test/downstream/query.sql": (
+                "SELECT * FROM test.artifact\n"
+            ),
+            "moz-fx-data-test-project/test/templated/query.sql": (
+                "SELECT * FROM test.{{ 'artifact' }}\n"
+            ),
+            "moz-fx-data-test-project/test/unrelated/query.sql": (
+                "SELECT {{ 1 }} FROM test.artifact_2\n"
+            ),
+        }
+        for path, content in files.items():
+            (sql_dir / path).parent.mkdir(parents=True)
+            (sql_dir / path).write_text(content)
+        return sql_dir
+
+    def test_update_references(self, sql_dir):
+        artifact_files = [
+            Path(sql_dir) / "moz-fx-data-test-project/test/artifact/view.sql",
+            Path(sql_dir)
+            / "moz-fx-data-test-project/test_derived/artifact_v1/query.sql",
+        ]
+        _update_references(artifact_files, "stage-project", "abc", str(sql_dir))
+
+        def read(path):
+            return (sql_dir / path).read_text()
+
+        assert read("moz-fx-data-test-project/test/artifact/view.sql") == (
+            "CREATE OR REPLACE VIEW "
+            "`stage-project.test_moz_fx_data_test_project_abc.artifact` AS "
+            "SELECT * FROM "
+            "`stage-project.test_derived_moz_fx_data_test_project_abc.artifact_v1`"
+        )
+        assert read("moz-fx-data-test-project/test/downstream/view.sql") == (
+            "SELECT * FROM "
+            "`stage-project`.`test_moz_fx_data_test_project_abc`.`artifact` "
+            "JOIN `test`.`artifact_2` JOIN "
+            "`stage-project`.`test_moz_fx_data_test_project_abc`.`artifact`"
+        )
+        assert read("moz-fx-data-test-project/test/templated/query.sql") == (
+            "SELECT * FROM "
+            "`stage-project`.`test_moz_fx_data_test_project_abc`.`artifact`"
+        )
+        # partial references only refer to artifacts in the same project
+        assert read("moz-fx-data-other-project/test/downstream/query.sql") == (
+            "SELECT * FROM test.artifact\n"
+        )
+        # files without references to artifacts are not rendered
+        assert read("moz-fx-data-test-project/test/unrelated/query.sql") == (
+            "SELECT {{ 1 }} FROM test.artifact_2\n"
+        )
+
+    @patch("bigquery_etl.cli.stage.bigquery.Client")
+    def test_deploy_artifacts_creates_datasets_once(self, mock_client):
+        stage_dir = Path("sql/stage-project")
+        artifact_files = [
+            stage_dir / "udf_abc/fn/udf.sql",
+            stage_dir / "test_abc/a_v1/query.sql",
+            stage_dir / "test_abc/b_v1/query.py",
+            stage_dir / "test_abc/a/view.sql",
+            stage_dir / "other_abc/c/view.sql",
+        ]
+        ctx = Mock()
+
+        _deploy_artifacts(ctx, artifact_files, "stage-project", "abc", "sql")
+
+        client = mock_client.return_value
+        mock_client.assert_called_once_with("stage-project")
+        assert sorted(
+            c.args[0].dataset_id for c in client.create_dataset.call_args_list
+        ) == ["other_abc", "test_abc", "udf_abc"]
+        assert client.update_dataset.call_count == 3
+        # routines, table schema updates, table deploys and views
+        assert ctx.invoke.call_count == 4
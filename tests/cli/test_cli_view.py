@@ -0,0 +1,59 @@
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from bigquery_etl.cli.view import _map_in_dependency_order, publish
+
+
+class TestView:
+    def test_map_in_dependency_order(self):
+        dependencies = {
+            "a": set(),
+            "b": {"a"},
+            "c": {"b"},
+            "d": set(),
+            "e": {"d"},
+        }
+        processed = []
+        lock = threading.Lock()
+        d_started = threading.Event()
+
+        def process(node):
+            if node == "a":
+                # a slow view doesn't block publishing unrelated views
+                assert d_started.wait(timeout=10)
+            if node == "d":
+                d_started.set()
+            with lock:
+                assert dependencies[node] <= set(processed)
+                processed.append(node)
+            # failures don't stop dependent views from being processed
+            return node != "b"
+
+        result = _map_in_dependency_order(process, dependencies, parallelism=2)
+
+        assert result == {"a": True, "b": False, "c": True, "d": True, "e": True}
+        assert sorted(processed) == ["a", "b", "c", "d", "e"]
+
+    @pytest.mark.parametrize("parallelism", ["0", "1", "4"])
+    @patch("bigquery_etl.util.client_queue.bigquery.Client")
+    @patch("bigquery_etl.cli.view._collect_views")
+    @patch("bigquery_etl.cli.view.get_credentials")
+    def test_publish(self, get_credentials, collect_views, client, parallelism):
+        views = []
+        for name, references in [("a", []), ("b", ["p.d.a"]), ("c", [])]:
+            view = Mock(view_identifier=f"p.d.{name}", table_references=references)
+            view.path = f"sql/p/d/{name}/view.sql"
+            view.publish.return_value = True
+            views.append(view)
+        collect_views.return_value = views
+
+        result = CliRunner().invoke(
+            publish, ["--force", f"--parallelism={parallelism}"]
+        )
+
+        assert result.exit_code == 0, result.output
+        for view in views:
+            view.publish.assert_called_once_with(None, False, client.return_value)
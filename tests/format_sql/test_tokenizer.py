@@ -0,0 +1,50 @@
+from bigquery_etl.format_sql.tokenizer import tokenize
+
+
+class TestTokenizer:
+    def test_tokenize_stateful_matches(self):
+        query = "SELECT a[0].from, ARRAY<INT64>[1 << 2], t.* EXCEPT (x) AS end FROM t"
+
+        assert [
+            (type(token).__name__, token.value)
+            for token in tokenize(query)
+            if not token.value.isspace()
+        ] == [
+            ("TopLevelKeyword", "SELECT"),
+            ("Identifier", "a"),
+            ("OpeningBracket", "["),
+            ("Literal", "0"),
+            ("ClosingBracket", "]"),
+            ("FieldAccessOperator", "."),
+            ("Identifier", "from"),
+            ("ExpressionSeparator", ","),
+            ("AngleBracketKeyword", "ARRAY"),
+            ("OpeningBracket", "<"),
+            ("Identifier", "INT64"),
+            ("ClosingBracket", ">"),
+            ("OpeningBracket", "["),
+            ("Literal", "1"),
+            ("Operator", "<<"),
+            ("Literal", "2"),
+            ("ClosingBracket", "]"),
+            ("ExpressionSeparator", ","),
+            ("Identifier", "t"),
+            ("FieldAccessOperator", "."),
+            ("SpaceBeforeBracketKeyword", "* EXCEPT"),
+            ("OpeningBracket", "("),
+            ("Identifier", "x"),
+            ("ClosingBracket", ")"),
+            ("AliasSeparator", "AS"),
+            ("Identifier", "end"),
+            ("TopLevelKeyword", "FROM"),
+            ("Identifier", "t"),
+        ]
+
+    def test_tokenize_string_literals(self):
+        query = """SELECT 'a"b', "c'd", '''e'f''', r"\\g" """
+
+        assert [
+            token.value
+            for token in tokenize(query)
+            if type(token).__name__ == "Literal"
+        ] == ["'a\"b'", '"c\'d"', "'''e'f'''", 'r"\\g"']
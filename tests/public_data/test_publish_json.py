@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from unittest.mock import MagicMock, Mock, call
+from unittest.mock import MagicMock, Mock, call, patch
 
 import pytest
 import smart_open
@@ -39,6 +39,7 @@ class TestPublishJson(object):
     mock_blob = Mock()
     mock_blob.download_as_string.return_value = bytes("[]", "utf-8")
     mock_blob.name = "blob_path/000000000000.ndjson"
+    mock_blob.size = 100
 
     mock_bucket = Mock()
     mock_bucket.blob.return_value = mock_blob
@@ -54,6 +55,7 @@ class TestPublishJson(object):
     mock_storage_client = Mock()
     mock_storage_client.list_blobs.return_value = [mock_blob]
     mock_storage_client.bucket.return_value = mock_bucket
+    mock_storage_client.batch.return_value = MagicMock()
 
     temp_table = f"{project_id}.tmp.incremental_query_v1_20200315"
     non_incremental_table = f"{project_id}.test.non_incremental_query_v1"
@@ -156,7 +158,7 @@ class TestPublishJson(object):
         smart_open.open.assert_has_calls(
             [
                 call("gs://test-bucket/blob_path/000000000000.ndjson"),
-                call("gs://test-bucket/blob_path/000000000000.json.tmp.gz", "w"),
+                call("gs://test-bucket/blob_path/000000000000_0.json.tmp.gz", "w"),
             ]
         )
 
@@ -164,6 +166,197 @@ class TestPublishJson(object):
             [call("["), call('{"a": 1}'), call(","), call('{"b": "cc"}'), call("]")]
         )
 
+    def test_gcp_convert_ndjson_to_json_in_parallel(self):
+        storage_client = MagicMock()
+        publisher = JsonPublisher(
+            self.mock_client,
+            storage_client,
+            self.project_id,
+            str(self.incremental_sql_path),
+            self.api_version,
+            self.test_bucket,
+            ["submission_date:DATE:2020-03-15"],
+            parallelism=3,
+        )
+
+        blobs = []
+        for i, size in enumerate([15, 5, 10, 30]):
+            blob = Mock(size=size)
+            blob.name = f"stage/{i:012}.ndjson"
+            blobs.append(blob)
+        storage_client.list_blobs.return_value = reversed(blobs)
+
+        lines = {
+            "gs://test-bucket/stage/000000000000.ndjson": ['{"a": 1}\n'],
+            "gs://test-bucket/stage/000000000001.ndjson": ['{"b": 2}\n'],
+            "gs://test-bucket/stage/000000000002.ndjson": ['{"c": 3}\n'],
+            "gs://test-bucket/stage/000000000003.ndjson": [
+                '{"d": 4}\n',
+                '{"e": 5}\n',
+                '{"f": 6}\n',
+            ],
+        }
+        outputs = {}
+
+        def open_file(path, mode="r"):
+            if mode == "w":
+                outputs[path] = output = MagicMock()
+                return output
+            return MagicMock(__enter__=Mock(return_value=lines[path]))
+
+        with (
+            patch("bigquery_etl.public_data.publish_json.MAX_JSON_SIZE", 20),
+            patch("smart_open.open", side_effect=open_file),
+        ):
+            publisher._gcp_convert_ndjson_to_json("target/")
+
+        # files are grouped by size in the order they were exported
+        written = {
+            path: "".join(c.args[0] for c in output.write.call_args_list)
+            for path, output in outputs.items()
+        }
+        assert written == {
+            "gs://test-bucket/stage/000000000000_0.json.tmp.gz": '[{"a": 1},{"b": 2}]',
+            "gs://test-bucket/stage/000000000001_0.json.tmp.gz": '[{"c": 3}]',
+            "gs://test-bucket/stage/000000000002_0.json.tmp.gz": '[{"d": 4},{"e": 5},{"f": 6}]',
+        }
+
+        bucket = storage_client.bucket.return_value
+        assert [c.args[0] for c in bucket.blob.call_args_list[:3]] == [
+            "stage/000000000000_0.json.tmp.gz",
+            "stage/000000000001_0.json.tmp.gz",
+            "stage/000000000002_0.json.tmp.gz",
+        ]
+        assert [c.args[2] for c in bucket.copy_blob.call_args_list] == [
+            "target/000000000000.json",
+            "target/000000000001.json",
+            "target/000000000002.json",
+        ]
+        assert storage_client.batch.call_count == 2
+
+    @staticmethod
+    def _convert_sequentially(shards, max_size):
+        """Pack rows into JSON files like a single pass over all exported files."""
+        files = []
+        output_size = 0
+        for lines in shards:
+            for line in lines:
+                if not files or output_size >= max_size:
+                    files.append([])
+                    output_size = 1
+                files[-1].append(json.loads(line))
+                output_size += len(line)
+        return files
+
+    @pytest.mark.parametrize(
+        "row_counts",
+        [
+            [1, 2, 3, 4, 5, 6],
+            [10, 1, 1, 10, 1],
+            [3, 3, 3, 3, 3, 3, 3, 3],
+            [25, 0, 2],
+        ],
+    )
+    def test_gcp_convert_ndjson_to_json_layout(self, row_counts):
+        storage_client = MagicMock()
+        publisher = JsonPublisher(
+            self.mock_client,
+            storage_client,
+            self.project_id,
+            str(self.incremental_sql_path),
+            self.api_version,
+            self.test_bucket,
+            ["submission_date:DATE:2020-03-15"],
+            parallelism=4,
+        )
+
+        max_size = 100
+        shards = []
+        lines = {}
+        blobs = []
+        row = 0
+        for i, row_count in enumerate(row_counts):
+            shard = []
+            for _ in range(row_count):
+                shard.append(json.dumps({"row": row, "x": "y" * (row % 7)}) + "\n")
+                row += 1
+            shards.append(shard)
+            blob = Mock(size=sum(len(line.encode()) for line in shard))
+            blob.name = f"stage/{i:012}.ndjson"
+            blobs.append(blob)
+            lines[f"gs://test-bucket/{blob.name}"] = shard
+        storage_client.list_blobs.return_value = blobs
+
+        outputs = {}
+
+        def open_file(path, mode="r"):
+            if mode == "w":
+                outputs[path] = output = MagicMock()
+                return output
+            return MagicMock(__enter__=Mock(return_value=lines[path]))
+
+        with (
+            patch("bigquery_etl.public_data.publish_json.MAX_JSON_SIZE", max_size),
+            patch("smart_open.open", side_effect=open_file),
+        ):
+            publisher._gcp_convert_ndjson_to_json("target/")
+
+        # output files in the order they are published
+        bucket = storage_client.bucket.return_value
+        file_count = bucket.copy_blob.call_count
+        tmp_paths = [c.args[0] for c in bucket.blob.call_args_list[:file_count]]
+        files = [
+            json.loads(
+                "".join(
+                    c.args[0]
+                    for c in outputs[f"gs://test-bucket/{path}"].write.call_args_list
+                )
+            )
+            for path in tmp_paths
+        ]
+
+        expected = self._convert_sequentially(shards, max_size)
+        # rows are in the same order as when converting sequentially
+        assert [r for f in files for r in f] == [r for f in expected for r in f]
+        # files are only filled within a group, so there can be more of them
+        assert len(expected) <= len(files) <= 2 * len(expected)
+        for f in files:
+            assert sum(len(json.dumps(r)) + 1 for r in f[:-1]) + 1 < max_size
+        assert [c.args[2] for c in bucket.copy_blob.call_args_list] == [
+            f"target/{i:012}.json" for i in range(len(files))
+        ]
+
+    def test_gcp_convert_ndjson_to_json_too_many_files(self):
+        storage_client = MagicMock()
+        publisher = JsonPublisher(
+            self.mock_client,
+            storage_client,
+            self.project_id,
+            str(self.incremental_sql_path),
+            self.api_version,
+            self.test_bucket,
+            ["submission_date:DATE:2020-03-15"],
+        )
+
+        blobs = []
+        for i, size in enumerate([10, 10, 45]):
+            blob = Mock(size=size)
+            blob.name = f"stage/{i:012}.ndjson"
+            blobs.append(blob)
+        storage_client.list_blobs.return_value = blobs
+
+        with (
+            patch("bigquery_etl.public_data.publish_json.MAX_JSON_SIZE", 20),
+            patch("bigquery_etl.public_data.publish_json.MAX_FILE_COUNT", 3),
+            patch("smart_open.open") as open_file,
+            pytest.raises(SystemExit),
+        ):
+            # 2 groups, which could be split into up to 5 files
+            publisher._gcp_convert_ndjson_to_json("target/")
+
+        open_file.assert_not_called()
+        storage_client.bucket.return_value.copy_blob.assert_not_called()
+
     def test_publish_last_updated_to_gcs(self):
         publisher = JsonPublisher(
             self.mock_client,
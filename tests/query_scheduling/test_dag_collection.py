@@ -145,6 +145,85 @@ class TestDagCollection:
         assert task.dag_name == "bqetl_test_dag"
         assert len(task.secrets) == 2
 
+    def test_with_referenced_tables(self, tmp_path):
+        query_file = (
+            tmp_path
+            / "sql"
+            / "moz-fx-data-test-project"
+            / "test"
+            / "foo_v1"
+            / "query.sql"
+        )
+        query_file.parent.mkdir(parents=True)
+        query_file.write_text("SELECT * FROM test.table2 JOIN test.table1 USING (id)")
+        metadata = Metadata(
+            "test", "test", ["test@example.org"], {}, {"dag_name": "bqetl_test_dag"}
+        )
+        query_task = Task.of_query(query_file, metadata)
+        bigeye_task = Task.of_bigeye_check(query_file, metadata=metadata)
+
+        dags = DagCollection.from_dict(
+            {
+                "bqetl_test_dag": {
+                    "schedule_interval": "daily",
+                    "default_args": self.default_args,
+                }
+            }
+        ).with_tasks([query_task, bigeye_task])
+        dags.with_referenced_tables()
+
+        assert query_task.referenced_tables == [
+            ("moz-fx-data-test-project", "test", "table1"),
+            ("moz-fx-data-test-project", "test", "table2"),
+        ]
+        assert bigeye_task.referenced_tables is None
+
+    def test_check_tasks_for_table(self):
+        query_file = (
+            TEST_DIR
+            / "data"
+            / "test_sql"
+            / "moz-fx-data-test-project"
+            / "test"
+            / "incremental_query_v1"
+            / "query.sql"
+        )
+        metadata = Metadata(
+            "test", "test", ["test@example.org"], {}, {"dag_name": "bqetl_test_dag"}
+        )
+
+        query_task = Task.of_query(query_file, metadata)
+        fail_checks_task = Task.of_dq_check(
+            query_file, is_check_fail=True, metadata=metadata
+        )
+        warn_checks_task = Task.of_dq_check(
+            query_file, is_check_fail=False, metadata=metadata
+        )
+        bigeye_task = Task.of_bigeye_check(query_file, metadata=metadata)
+
+        dags = DagCollection.from_dict(
+            {
+                "bqetl_test_dag": {
+                    "schedule_interval": "daily",
+                    "default_args": self.default_args,
+                }
+            }
+        )
+        table = ("moz-fx-data-test-project", "test", "incremental_query_v1")
+        assert dags.task_for_table(*table) is None
+
+        dags.with_tasks([warn_checks_task, fail_checks_task, bigeye_task, query_task])
+
+        assert dags.task_for_table(*table) is query_task
+        assert dags.fail_checks_task_for_table(*table) is fail_checks_task
+        assert dags.fail_bigeye_checks_task_for_table(*table) is bigeye_task
+        assert (
+            dags.fail_checks_task_for_table(
+                "moz-fx-data-test-project", "test", "non_existing_table"
+            )
+            is None
+        )
+
     def test_task_for_non_existing_table(self):
         dags = DagCollection.from_dict(
             {
@@ -302,3 +302,22 @@ END;"""
 
         routines = parse_routine.get_routines_from_dir("non-existing")
         assert len(routines) == 0
+
+    def test_routine_registry(self):
+        registry = parse_routine.RoutineRegistry(
+            [
+                {"name": "hist.extract"},
+                {"name": "hist.extract_keyed"},
+                {"name": "udf.mode"},
+                {"name": "udf_js"},
+            ]
+        )
+
+        assert registry.usages(
+            "SELECT mozfun.hist.extract_keyed(a), xudf.model, udf_js_flatten(b)"
+        ) == {"hist.extract", "hist.extract_keyed", "udf.mode", "udf_js"}
+        assert registry.usages("SELECT hist . extract(a)") == set()
+
+        assert registry.calls(
+            "SELECT `hist`.`extract_keyed`(a), udf.mode_last(b), udf.mode (c)"
+        ) == {"hist.extract_keyed"}
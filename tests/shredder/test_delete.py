@@ -1,5 +1,6 @@
 import datetime
 from functools import partial
+from multiprocessing.pool import ThreadPool
 from unittest.mock import ANY, Mock, patch
 
 from google.api_core.exceptions import NotFound
@@ -220,3 +221,51 @@ def test_context_id_brace_normalization(mock_sql_table_id):
 
     assert "REPLACE(REPLACE(context_id" in sql
     assert "REPLACE(REPLACE(payload.scalars.parent.deletion_request_context_id" in sql
+
+
+@patch("bigquery_etl.shredder.delete.list_partitions")
+def test_discover_tasks(mock_list_partitions):
+    """discover_tasks should yield the tasks of each table, most recent first."""
+    mock_list_partitions.side_effect = lambda client, table, *args: [
+        shredder_delete.Partition(id=partition_id, condition="")
+        for partition_id in ("20240101", "20240103", "20240102")
+    ]
+    missing_target = DeleteTarget(table="dataset.missing_v1", field="client_id")
+    mock_client = Mock()
+
+    def get_table(table_id):
+        if "missing" in table_id:
+            raise NotFound(table_id)
+        return Mock(table_id=table_id)
+
+    mock_client.get_table.side_effect = get_table
+    args = {
+        key: value
+        for key, value in COMMON_DELETE_ARGS.items()
+        if key not in ("target", "sources")
+    }
+
+    with ThreadPool(2) as pool:
+        tables = list(
+            shredder_delete.discover_tasks(
+                pool,
+                mock_client,
+                [
+                    (
+                        COMMON_DELETE_ARGS["target"],
+                        COMMON_DELETE_ARGS["sources"],
+                        False,
+                    ),
+                    (missing_target, COMMON_DELETE_ARGS["sources"], False),
+                ],
+                **args,
+                sampling_parallelism=10,
+                max_single_dml_bytes=1,
+                partition_limit=None,
+                end_date="",
+            )
+        )
+
+    assert sorted(map(len, tables)) == [0, 3]
+    tasks = max(tables, key=len)
+    assert [task.partition_id for task in tasks] == ["20240103", "20240102", "20240101"]
@@ -0,0 +1,143 @@
+import importlib.util
+import os
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+
+import pytest
+import requests
+
+QUERY_FILE = (
+    Path(__file__).parents[4]
+    / "sql"
+    / "moz-fx-data-shared-prod"
+    / "telemetry_derived"
+    / "crash_symbols_v1"
+    / "query.py"
+)
+DEBUG_FILE = "test.pdb"
+DEBUG_ID = "3249D99D0C4049318610F4E4FB0B69361"
+SYM_FILE = f"""MODULE windows x86_64 {DEBUG_ID} {DEBUG_FILE}
+INFO CODE_ID 5AB0F4B5A000 test.dll
+FILE 0 c:\\src\\test.c
+FUNC 1000 10 0 test_function
+1000 10 42 0
+""".encode()
+
+
+@pytest.fixture(scope="module")
+def crash_symbols():
+    spec = importlib.util.spec_from_file_location("crash_symbols_v1", QUERY_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def source_url():
+    """Serve SYM_FILE over HTTP and record the requested paths."""
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            # give concurrent requests for the same module a chance to overlap
+            time.sleep(0.1)
+            if self.path.startswith(f"/{DEBUG_FILE}/"):
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(SYM_FILE)))
+                self.end_headers()
+                self.wfile.write(SYM_FILE)
+            else:
+                self.send_error(404)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requested
+    server.shutdown()
+    thread.join()
+
+
+class TestSymcacheStore:
+    def _get_symbols(self, crash_symbols, source_url, store, rows):
+        with ThreadPool(len(rows)) as pool:
+            return pool.map(
+                partial(
+                    crash_symbols._get_symbols,
+                    requests.Session(),
+                    source_url,
+                    datetime(2024, 1, 1),
+                    store,
+                ),
+                rows,
+            )
+
+    def test_get_symbols_downloads_module_once(
+        self, crash_symbols, source_url, tmp_path
+    ):
+        url, requested = source_url
+        rows = [
+            {
+                "debug_file": DEBUG_FILE,
+                # equivalent debug ids share the symcache
+                "debug_id": debug_id,
+                "module_offsets": [0x1004],
+            }
+            for debug_id in [DEBUG_ID, DEBUG_ID.lower()] * 4
+        ]
+
+        store = crash_symbols.SymcacheStore(tmp_path, max_size=1024**2)
+        results = self._get_symbols(crash_symbols, url, store, rows)
+
+        assert len(requested) == 1
+        for error, symbols in results:
+            assert error is None
+            assert [
+                (s["function"], s["file"], s["line"], s["module"]) for s in symbols
+            ] == [("test_function", "c:\\src\\test.c", 42, "test.dll")]
+
+        # the symcache is reused across runs
+        store = crash_symbols.SymcacheStore(tmp_path, max_size=1024**2)
+        assert store.get(DEBUG_FILE, DEBUG_ID) is not None
+        results = self._get_symbols(crash_symbols, url, store, rows[:1])
+        assert len(requested) == 1
+        assert results[0][1][0]["function"] == "test_function"
+
+    def test_get_symbols_missing_module(self, crash_symbols, source_url, tmp_path):
+        url, requested = source_url
+        row = {"debug_file": "missing.pdb", "debug_id": DEBUG_ID, "module_offsets": [1]}
+
+        store = crash_symbols.SymcacheStore(tmp_path, max_size=1024**2)
+        assert self._get_symbols(crash_symbols, url, store, [row]) == [(None, [])]
+        assert store.get("missing.pdb", DEBUG_ID) is None
+
+    def test_eviction(self, crash_symbols, source_url, tmp_path):
+        url, _ = source_url
+        store = crash_symbols.SymcacheStore(tmp_path, max_size=1024**2)
+        _, cached = crash_symbols._download_symcache(
+            requests.Session(), url, DEBUG_FILE, DEBUG_ID
+        )
+        store.put("old.pdb", DEBUG_ID, *cached)
+        entry_size = sum(path.stat().st_size for path in tmp_path.iterdir())
+        # make old.pdb the least recently used symcache
+        for path in tmp_path.iterdir():
+            os.utime(path, (0, 0))
+
+        store = crash_symbols.SymcacheStore(tmp_path, max_size=entry_size * 2)
+        store.put("new.pdb", DEBUG_ID, *cached)
+        store.put("newest.pdb", DEBUG_ID, *cached)
+
+        assert store.get("old.pdb", DEBUG_ID) is None
+        assert store.get("new.pdb", DEBUG_ID) is not None
+        assert store.get("newest.pdb", DEBUG_ID) is not None
+        assert sum(path.stat().st_size for path in tmp_path.iterdir()) <= (
+            entry_size * 2
+        )
@@ -0,0 +1,168 @@
+from datetime import date, datetime, timedelta, timezone
+from multiprocessing.pool import ThreadPool
+from threading import Event
+from unittest import mock
+
+from google.api_core.exceptions import BadRequest
+
+# the cli package needs to be imported first to avoid a circular import
+import bigquery_etl.cli  # noqa: F401
+from bigquery_etl.copy_deduplicate import (
+    _get_partition_sizes,
+    _query_parameters,
+    _run_deduplication_query,
+    _run_pipelined,
+    _split_slice,
+)
+
+
+class TestCopyDeduplicate:
+    def _client_queue(self):
+        client_q = mock.Mock()
+        client_q.with_client.side_effect = lambda func, *args: func(
+            client_q.default_client, *args
+        )
+        return client_q
+
+    def _run_pipelined(self, table_jobs, run_query, copy_join_parts=None):
+        with mock.patch(
+            "bigquery_etl.copy_deduplicate._run_deduplication_query",
+            side_effect=run_query,
+        ):
+            with mock.patch(
+                "bigquery_etl.copy_deduplicate._copy_join_parts",
+                side_effect=copy_join_parts,
+            ) as copy:
+                with ThreadPool(2) as pool, ThreadPool(2) as copy_pool:
+                    failed = _run_pipelined(
+                        self._client_queue(), pool, copy_pool, table_jobs
+                    )
+        return failed, copy
+
+    def test_copy_starts_before_other_tables_finish(self):
+        fast_table_copied = Event()
+        copied = {}
+
+        def run_query(client, sql, stable_table, job_config, num_retries):
+            if stable_table == "slow":
+                # block until the other table was copied
+                assert fast_table_copied.wait(timeout=10)
+            return stable_table, [f"{stable_table}_{sql}"]
+
+        def copy_join_parts(client, stable_table, query_jobs):
+            copied[stable_table] = query_jobs
+            if stable_table == "fast":
+                fast_table_copied.set()
+
+        failed, _ = self._run_pipelined(
+            [
+                [("a", "slow", None, 0)],
+                [("a", "fast", None, 0), ("b", "fast", None, 0)],
+            ],
+            run_query,
+            copy_join_parts,
+        )
+
+        assert failed == []
+        assert copied == {"slow": ["slow_a"], "fast": ["fast_a", "fast_b"]}
+
+    def test_failed_slice_skips_copy(self):
+        def run_query(client, sql, stable_table, job_config, num_retries):
+            if sql == "b":
+                raise BadRequest("resources exceeded")
+            return stable_table, [sql]
+
+        failed, copy = self._run_pipelined(
+            [
+                [("a", "failing", None, 0), ("b", "failing", None, 0)],
+                [("a", "ok", None, 0)],
+            ],
+            run_query,
+        )
+
+        assert failed == ["failing"]
+        copy.assert_called_once()
+        assert copy.call_args.args[1:] == ("ok", ["a"])
+
+    def test_get_partition_sizes(self):
+        client = mock.Mock()
+        client.query.return_value.result.return_value = [
+            mock.Mock(
+                table_name="main_v5", partition_id="20240101", total_logical_bytes=10
+            ),
+        ]
+        client.query.return_value.result.return_value[0].total_rows = 2
+
+        with ThreadPool(2) as pool:
+            sizes = _get_partition_sizes(
+                client, pool, ["project.telemetry_live.main_v5"], [date(2024, 1, 1)]
+            )
+
+        assert sizes == {("project.telemetry_live.main_v5", date(2024, 1, 1)): (10, 2)}
+        assert "`project.telemetry_live.INFORMATION_SCHEMA.PARTITIONS`" in (
+            client.query.call_args.args[0]
+        )
+
+    def test_split_slice_on_resources_exceeded(self):
+        client = mock.Mock()
+        failed_job = mock.Mock(dry_run=False)
+        failed_job.result.side_effect = BadRequest(
+            "Resources exceeded during query execution",
+            errors=[{"reason": "resourcesExceeded"}],
+        )
+        split_jobs = [mock.Mock(dry_run=False), mock.Mock(dry_run=False)]
+        client.query.side_effect = [failed_job, *split_jobs]
+        split = mock.Mock(
+            return_value=[
+                ("first half", "stable", mock.Mock(), 0, None),
+                ("second half", "stable", mock.Mock(), 0, None),
+            ]
+        )
+        job_config = mock.Mock()
+
+        stable_table, query_jobs = _run_deduplication_query(
+            client, "sql", "stable", job_config, 2, split
+        )
+
+        assert stable_table == "stable"
+        assert query_jobs == split_jobs
+        split.assert_called_once_with(client, "stable", job_config)
+
+    def test_split_slice_halves_time_range(self):
+        client = mock.Mock()
+        client.get_table.return_value = mock.Mock(
+            table_id="main_v5$20240101", clustering_fields=["sample_id"]
+        )
+        temp_dataset = mock.Mock()
+        temp_dataset.temp_table.side_effect = ["tmp.a", "tmp.b"]
+        start_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        job_config = mock.Mock(
+            query_parameters=_query_parameters(
+                start_time, start_time + timedelta(hours=1), 0
+            )
+        )
+
+        jobs = _split_slice(
+            "project.telemetry_live.main_v5",
+            0,
+            1,
+            temp_dataset,
+            client,
+            "project.telemetry_stable.main_v5$20240101",
+            job_config,
+        )
+
+        assert [
+            [param.value for param in job[2].query_parameters[:2]] for job in jobs
+        ] == [
+            [start_time, start_time + timedelta(minutes=30)],
+            [start_time + timedelta(minutes=30), start_time + timedelta(hours=1)],
+        ]
+        assert "`tmp.a`" in jobs[0][0] and "`tmp.b`" in jobs[1][0]
+
+        short_config = mock.Mock(
+            query_parameters=_query_parameters(
+                start_time, start_time + timedelta(minutes=5), 0
+            )
+        )
+        assert _split_slice(None, 0, 1, temp_dataset, client, None, short_config) == []
@@ -1,4 +1,16 @@
-from bigquery_etl.dependency import extract_table_references
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from bigquery_etl import dependency
+from bigquery_etl.dependency import (
+    extract_table_references,
+    extract_table_references_without_views,
+    get_dependency_graph,
+    get_downstream_graph,
+    table_references_without_views,
+)
 
 
 class TestDependency:
@@ -24,3 +36,202 @@ class TestDependency:
         refs = extract_table_references(pivot_query)
 
         assert set(refs) == {"Produce", "Perishable_Mints"}
+
+
+class TestTableReferencesWithoutViews:
+    def _write(self, path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def _setup_tree(self, sql_dir: Path) -> Path:
+        dataset_dir = sql_dir / "moz-fx-data-test-project" / "test"
+        self._write(
+            dataset_dir / "foo_v1" / "query.sql",
+            "SELECT * FROM test.bar JOIN test.baz_v1 USING (id)",
+        )
+        self._write(dataset_dir / "bar" / "view.sql", "SELECT * FROM test.bar_v1")
+        return dataset_dir / "foo_v1" / "query.sql"
+
+    def test_resolves_views(self, tmp_path):
+        query_file = self._setup_tree(tmp_path / "sql")
+
+        refs = table_references_without_views(query_file)
+        assert sorted(refs) == [
+            "moz-fx-data-test-project.test.bar_v1",
+            "moz-fx-data-test-project.test.baz_v1",
+        ]
+        assert refs == list(extract_table_references_without_views(query_file))
+
+    def test_cached_result(self, tmp_path):
+        query_file = self._setup_tree(tmp_path / "sql")
+        expected = table_references_without_views(query_file)
+
+        with mock.patch(
+            "bigquery_etl.dependency._table_references_without_views"
+        ) as extract:
+            assert table_references_without_views(query_file) == expected
+            extract.assert_not_called()
+
+    def test_cache_invalidated_by_changes(self, tmp_path):
+        query_file = self._setup_tree(tmp_path / "sql")
+        dataset_dir = query_file.parent.parent
+        table_references_without_views(query_file)
+
+        # change to a referenced view
+        self._write(dataset_dir / "bar" / "view.sql", "SELECT * FROM test.bar_v2")
+        assert "moz-fx-data-test-project.test.bar_v2" in (
+            table_references_without_views(query_file)
+        )
+
+        # new view for a table that was referenced directly
+        self._write(dataset_dir / "baz_v1" / "view.sql", "SELECT * FROM test.qux_v1")
+        assert "moz-fx-data-test-project.test.qux_v1" in (
+            table_references_without_views(query_file)
+        )
+
+        # change to the query
+        self._write(query_file, "SELECT * FROM test.quux_v1")
+        assert table_references_without_views(query_file) == [
+            "moz-fx-data-test-project.test.quux_v1"
+        ]
+
+    def test_cache_invalidated_by_new_view_from_other_directory(
+        self, tmp_path, monkeypatch
+    ):
+        query_file = self._setup_tree(tmp_path / "sql")
+        self._write(query_file, "SELECT * FROM test.baz_v1")
+        monkeypatch.chdir(tmp_path)
+        relative_query_file = query_file.relative_to(tmp_path)
+        assert "moz-fx-data-test-project.test.baz_v1" in (
+            table_references_without_views(relative_query_file)
+        )
+
+        # new view for a table that was referenced directly, checked from another
+        # working directory
+        dataset_dir = query_file.parent.parent
+        self._write(dataset_dir / "baz_v1" / "view.sql", "SELECT * FROM test.qux_v1")
+        monkeypatch.chdir(tmp_path / "sql")
+        assert "moz-fx-data-test-project.test.qux_v1" in (
+            table_references_without_views(query_file.relative_to(tmp_path / "sql"))
+        )
+
+    def test_metrics_not_cached(self, tmp_path):
+        query_file = self._setup_tree(tmp_path / "sql")
+        self._write(
+            query_file, "-- derived from metrics.active_users\nSELECT * FROM test.bar"
+        )
+        expected = table_references_without_views(query_file)
+
+        with mock.patch(
+            "bigquery_etl.dependency._table_references_without_views",
+            wraps=dependency._table_references_without_views,
+        ) as extract:
+            assert table_references_without_views(query_file) == expected
+            extract.assert_called_once()
+
+    def test_views_expanded_once(self, tmp_path):
+        dataset_dir = tmp_path / "sql" / "moz-fx-data-test-project" / "test"
+        self._write(dataset_dir / "bar" / "view.sql", "SELECT * FROM test.bar_v1")
+        for name in ("foo_v1", "baz_v1"):
+            self._write(dataset_dir / name / "query.sql", "SELECT * FROM test.bar")
+
+        with mock.patch(
+            "bigquery_etl.dependency.render", wraps=dependency.render
+        ) as render:
+            for name in ("foo_v1", "baz_v1"):
+                assert list(
+                    extract_table_references_without_views(
+                        dataset_dir / name / "query.sql"
+                    )
+                ) == ["moz-fx-data-test-project.test.bar_v1"]
+            assert [call.args[0] for call in render.call_args_list].count(
+                "view.sql"
+            ) == 1
+
+    def test_persisted_view_expansion(self, tmp_path):
+        query_file = self._setup_tree(tmp_path / "sql")
+        expected = list(
+            extract_table_references_without_views(query_file, use_cache=True)
+        )
+
+        with (
+            mock.patch.dict(dependency._view_references, clear=True),
+            mock.patch(
+                "bigquery_etl.dependency.render", wraps=dependency.render
+            ) as render,
+        ):
+            assert (
+                list(extract_table_references_without_views(query_file, use_cache=True))
+                == expected
+            )
+            render.assert_called_once()
+
+    def test_circular_view_references(self, tmp_path):
+        dataset_dir = tmp_path / "sql" / "moz-fx-data-test-project" / "test"
+        self._write(dataset_dir / "a" / "view.sql", "SELECT * FROM test.b")
+        self._write(dataset_dir / "b" / "view.sql", "SELECT * FROM test.a")
+        self._write(dataset_dir / "foo_v1" / "query.sql", "SELECT * FROM test.a")
+
+        with pytest.raises(ValueError, match="Circular view reference"):
+            list(
+                extract_table_references_without_views(
+                    dataset_dir / "foo_v1" / "query.sql"
+                )
+            )
+
+
+class TestDependencyGraph:
+    def _write(self, path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def test_incremental_dependency_graph(self, tmp_path):
+        sql_dir = tmp_path / "sql"
+        dataset_dir = sql_dir / "moz-fx-data-test-project" / "test"
+        self._write(dataset_dir / "foo_v1" / "query.sql", "SELECT * FROM test.bar")
+        self._write(dataset_dir / "bar" / "view.sql", "SELECT * FROM test.bar_v1")
+        self._write(dataset_dir / "baz_v1" / "query.sql", "SELECT * FROM test.foo_v1")
+
+        expected = {
+            "moz-fx-data-test-project.test.bar": [
+                "moz-fx-data-test-project.test.bar_v1"
+            ],
+            "moz-fx-data-test-project.test.baz_v1": [
+                "moz-fx-data-test-project.test.foo_v1"
+            ],
+            "moz-fx-data-test-project.test.foo_v1": [
+                "moz-fx-data-test-project.test.bar_v1"
+            ],
+        }
+        assert get_dependency_graph([str(sql_dir)], without_views=True) == expected
+
+        with mock.patch(
+            "bigquery_etl.dependency.render", wraps=dependency.render
+        ) as render:
+            assert get_dependency_graph([str(sql_dir)], without_views=True) == expected
+            render.assert_not_called()
+
+            self._write(dataset_dir / "baz_v1" / "query.sql", "SELECT * FROM test.qux")
+            graph = get_dependency_graph([str(sql_dir)], without_views=True)
+            assert graph["moz-fx-data-test-project.test.baz_v1"] == [
+                "moz-fx-data-test-project.test.qux"
+            ]
+            assert render.call_count == 1
+
+            # changed views invalidate the files referencing them
+            self._write(dataset_dir / "bar" / "view.sql", "SELECT * FROM test.bar_v2")
+            graph = get_dependency_graph([str(sql_dir)], without_views=True)
+            assert graph["moz-fx-data-test-project.test.foo_v1"] == [
+                "moz-fx-data-test-project.test.bar_v2"
+            ]
+
+    def test_downstream_graph(self):
+        dependency_graph = {
+            "project.test.foo_v1": ["project.test.bar_v1", "project.test.baz_v1"],
+            "project.test.qux_v1": ["project.test.bar_v1", "project.test.bar_v1"],
+        }
+
+        assert get_downstream_graph(dependency_graph) == {
+            "project.test.bar_v1": ["project.test.foo_v1", "project.test.qux_v1"],
+            "project.test.baz_v1": ["project.test.foo_v1"],
+        }
@@ -1,8 +1,15 @@
+import itertools
 import os
+import time
+from unittest import mock
 
 import pytest
+import responses
+from google.auth import jwt
 
-from bigquery_etl.dryrun import DryRun, Errors
+from bigquery_etl.dryrun import DryRun, DryRunSession, Errors, dry_run_many
+
+DRY_RUN_URL = "https://dryrun.example.com/"
 
 
 @pytest.fixture
@@ -192,3 +199,202 @@ class TestDryRun:
 
         dryrun = DryRun(sqlfile=str(query_file))
         assert dryrun.is_valid()
+
+
+class TestDryRunCache:
+    @pytest.fixture(autouse=True)
+    def authenticated(self):
+        with mock.patch("bigquery_etl.cli.utils.is_authenticated", return_value=True):
+            yield
+
+    @staticmethod
+    def _response(result):
+        return lambda *args, **kwargs: result
+
+    def test_dry_run_result_cached(self, tmp_query_path):
+        query_file = tmp_query_path / "query.sql"
+        query_file.write_text("SELECT 123")
+        result = {"valid": True, "referencedTables": [], "schema": {}}
+
+        with mock.patch.object(
+            DryRunSession, "post", side_effect=self._response(result)
+        ) as urlopen:
+            assert DryRun(str(query_file), id_token="token").dry_run_result == result
+            cached = DryRun(str(query_file), id_token="token")
+            assert cached.dry_run_result == result
+            assert cached.dry_run_cached
+            assert urlopen.call_count == 1
+
+            # different content and disabled caching result in new requests
+            DryRun(str(query_file), content="SELECT 1", id_token="token").dry_run_result
+            DryRun(str(query_file), id_token="token", use_cache=False).dry_run_result
+            assert urlopen.call_count == 3
+
+    def test_failed_dry_run_not_cached(self, tmp_query_path):
+        query_file = tmp_query_path / "query.sql"
+        query_file.write_text("SELECT INVALID 123")
+        result = {"valid": False, "errors": [{"code": 400, "message": "Syntax"}]}
+
+        with mock.patch.object(
+            DryRunSession, "post", side_effect=self._response(result)
+        ) as urlopen:
+            DryRun(str(query_file), id_token="token").dry_run_result
+            DryRun(str(query_file), id_token="token").dry_run_result
+            assert urlopen.call_count == 2
+
+    def test_table_metadata_not_cached(self, tmp_query_path):
+        query_file = tmp_query_path / "query.sql"
+        query_file.write_text("SELECT * FROM telemetry_derived.mytable")
+        result = {
+            "valid": True,
+            "schema": {"fields": []},
+            "tableMetadata": {"schema": {"fields": []}},
+            "datasetLabels": {"schemas_build_id": "old"},
+        }
+
+        with mock.patch.object(
+            DryRunSession, "post", side_effect=self._response(result)
+        ) as urlopen:
+            for _ in range(2):
+                dry_run = DryRun(
+                    str(query_file),
+                    id_token="token",
+                    project="moz-fx-data-shared-prod",
+                    dataset="telemetry_derived",
+                    table="mytable",
+                )
+                assert dry_run.dry_run_result == result
+                assert not dry_run.dry_run_cached
+            assert urlopen.call_count == 2
+
+            # live state isn't cached with results of other dry runs
+            DryRun(str(query_file), id_token="token").dry_run_result
+            cached = DryRun(str(query_file), id_token="token")
+            assert cached.dry_run_result == {"valid": True, "schema": {"fields": []}}
+            assert cached.dry_run_cached
+            assert urlopen.call_count == 3
+
+    def test_cache_invalidated_on_schema_change(self, tmp_path, tmp_query_path):
+        query_file = tmp_query_path / "query.sql"
+        query_file.write_text("SELECT * FROM telemetry_derived.upstream_v1")
+        schema_file = (
+            tmp_path
+            / "moz-fx-data-shared-prod"
+            / "telemetry_derived"
+            / "upstream_v1"
+            / "schema.yaml"
+        )
+        schema_file.parent.mkdir(parents=True)
+        schema_file.write_text("fields: []")
+        result = {
+            "valid": True,
+            "referencedTables": [
+                {
+                    "projectId": "moz-fx-data-shared-prod",
+                    "datasetId": "telemetry_derived",
+                    "tableId": "upstream_v1",
+                }
+            ],
+        }
+
+        with mock.patch.object(
+            DryRunSession, "post", side_effect=self._response(result)
+        ) as urlopen:
+            DryRun(str(query_file), id_token="token", sql_dir=tmp_path).dry_run_result
+            DryRun(str(query_file), id_token="token", sql_dir=tmp_path).dry_run_result
+            assert urlopen.call_count == 1
+
+            schema_file.write_text("fields: [{name: a, type: STRING}]")
+            DryRun(str(query_file), id_token="token", sql_dir=tmp_path).dry_run_result
+            assert urlopen.call_count == 2
+
+
+class TestDryRunSession:
+    @staticmethod
+    def _id_token(expires_in):
+        signer = mock.Mock(key_id=None, sign=lambda message: b"signature")
+        return jwt.encode(signer, {"exp": int(time.time()) + expires_in}).decode()
+
+    @responses.activate
+    def test_post(self):
+        responses.post(DRY_RUN_URL, json={"valid": True})
+        session = DryRunSession(DRY_RUN_URL, id_token="token")
+
+        assert session.post({"query": "SELECT 1"}) == {"valid": True}
+        assert responses.calls[0].request.headers["Authorization"] == "Bearer token"
+
+    @responses.activate
+    def test_post_retries_server_errors(self):
+        responses.post(DRY_RUN_URL, status=503)
+        responses.post(DRY_RUN_URL, json={"valid": True})
+        session = DryRunSession(DRY_RUN_URL, id_token="token", backoff_factor=0)
+
+        assert session.post({"query": "SELECT 1"}) == {"valid": True}
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_id_token_refreshed(self):
+        responses.post(DRY_RUN_URL, json={"valid": True})
+        expired_token = self._id_token(expires_in=60)
+        valid_token = self._id_token(expires_in=3600)
+        session = DryRunSession(DRY_RUN_URL, id_token=valid_token)
+
+        with mock.patch(
+            "bigquery_etl.dryrun.get_id_token", return_value="new_token"
+        ) as get_id_token:
+            assert session.id_token == valid_token
+            session.post({"query": "SELECT 1"})
+            assert get_id_token.call_count == 0
+
+            session = DryRunSession(DRY_RUN_URL, id_token=expired_token)
+            assert session.id_token == "new_token"
+            assert session.id_token == "new_token"
+            assert get_id_token.call_count == 1
+
+    @responses.activate
+    def test_unauthorized_refreshes_id_token(self):
+        responses.post(DRY_RUN_URL, status=401)
+        responses.post(DRY_RUN_URL, json={"valid": True})
+        session = DryRunSession(DRY_RUN_URL, id_token="stale_token")
+
+        with mock.patch("bigquery_etl.dryrun.get_id_token", return_value="new_token"):
+            assert session.post({"query": "SELECT 1"}) == {"valid": True}
+
+        assert responses.calls[1].request.headers["Authorization"] == "Bearer new_token"
+
+    def test_shared(self):
+        assert DryRunSession.shared() is DryRunSession.shared()
+
+    @pytest.mark.parametrize("parallelism", [0, 3])
+    def test_dry_run_many(self, tmp_query_path, parallelism):
+        query_files = []
+        for i in range(5):
+            query_file = tmp_query_path / f"query_{i}.sql"
+            query_file.write_text(f"SELECT {i}")
+            query_files.append(str(query_file))
+
+        def post(session, json_data, id_token=None):
+            # worker processes use the ID token minted in the parent process
+            assert session.id_token == "parent_token"
+            if json_data["query"] == "SELECT 3":
+                return {"valid": False, "errors": [{"message": "invalid"}]}
+            return {"valid": True}
+
+        with (
+            mock.patch("bigquery_etl.cli.utils.is_authenticated", return_value=True),
+            mock.patch.dict(DryRunSession._sessions, clear=True),
+            mock.patch(
+                "bigquery_etl.dryrun.get_id_token",
+                side_effect=itertools.chain(
+                    ["parent_token"], itertools.repeat("child_token")
+                ),
+            ),
+            mock.patch.object(DryRunSession, "post", autospec=True, side_effect=post),
+        ):
+            result = list(
+                dry_run_many(query_files, parallelism=parallelism, use_cache=False)
+            )
+
+        assert result == [
+            (query_file, i != 3) for i, query_file in enumerate(query_files)
+        ]
@@ -0,0 +1,38 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from bigquery_etl.newtab_merino import delete_old_files, write_json_array
+
+
+class TestNewtabMerino:
+    @pytest.mark.parametrize(
+        "rows",
+        [
+            [],
+            [{"a": 1}],
+            [{"a": [1, {"b": "c\nd"}], "e": None, "f": "ü"}, {"g": {}}, {"h": []}],
+        ],
+    )
+    def test_write_json_array(self, rows):
+        ndjson = "".join(json.dumps(row) + "\n" for row in rows)
+        output = io.StringIO()
+
+        write_json_array(io.StringIO(ndjson), output)
+
+        assert output.getvalue() == json.dumps(rows, indent=1)
+
+    def test_delete_old_files(self):
+        now = datetime.now(timezone.utc)
+        blobs = [Mock(updated=now - timedelta(days=days)) for days in range(300)]
+        bucket = Mock()
+        bucket.list_blobs.return_value = blobs
+        bucket.client.batch.return_value = MagicMock()
+
+        delete_old_files(bucket, "prefix", 3)
+
+        assert bucket.client.batch.call_count == 3
+        assert [blob.delete.called for blob in blobs] == [False] * 3 + [True] * 297
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+import yaml
+
+from bigquery_etl.util.artifact_store import ArtifactStore
+
+
+class TestArtifactStore:
+    @pytest.fixture
+    def metadata_file(self, tmp_path):
+        metadata_file = tmp_path / "metadata.yaml"
+        metadata_file.write_text("owners:\n- test@example.org\n")
+        os.utime(metadata_file, (0, 0))
+        return metadata_file
+
+    def test_load_yaml_returns_copies(self, metadata_file):
+        store = ArtifactStore()
+
+        metadata = store.load_yaml(metadata_file)
+        metadata["owners"].append("other@example.org")
+
+        assert store.load_yaml(metadata_file) == {"owners": ["test@example.org"]}
+        assert store.load_yaml(str(metadata_file)) is not store.load_yaml(metadata_file)
+
+    def test_load_yaml_reloads_changed_files(self, metadata_file):
+        store = ArtifactStore()
+        assert store.load_yaml(metadata_file) == {"owners": ["test@example.org"]}
+
+        metadata_file.write_text("owners: []\n")
+        os.utime(metadata_file, (1, 1))
+        assert store.load_yaml(metadata_file) == {"owners": []}
+
+    def test_load_yaml_recently_modified_files_are_not_stored(self, tmp_path):
+        store = ArtifactStore()
+        metadata_file = tmp_path / "metadata.yaml"
+        metadata_file.write_text("a: 1\n")
+
+        assert store.load_yaml(metadata_file) == {"a": 1}
+        assert store._size == 0
+
+    def test_load_yaml_evicts_least_recently_used(self, tmp_path):
+        store = ArtifactStore(max_size=110)
+        for name in "abc":
+            (tmp_path / f"{name}.yaml").write_text(f"{name}: {'x' * 30}\n")
+            os.utime(tmp_path / f"{name}.yaml", (0, 0))
+            store.load_yaml(tmp_path / f"{name}.yaml")
+
+        assert store._size <= 110
+        assert [os.path.basename(path) for path, _ in store._entries] == [
+            "b.yaml",
+            "c.yaml",
+        ]
+
+    def test_load_yaml_invalid(self, tmp_path):
+        store = ArtifactStore()
+        with pytest.raises(FileNotFoundError):
+            store.load_yaml(tmp_path / "missing.yaml")
+
+        (tmp_path / "invalid.yaml").write_text("a: [")
+        with pytest.raises(yaml.YAMLError):
+            store.load_yaml(tmp_path / "invalid.yaml")
@@ -123,6 +123,18 @@ class TestUtilCommon:
         assert "SELECT" in rendered_sql
         assert "`project.dataset.table`" in rendered_sql
 
+    def test_render_reloads_changed_templates(self, tmp_path):
+        file_path = tmp_path / "query.sql"
+        file_path.write_text("SELECT {{ a }}")
+        assert render(file_path.name, template_folder=tmp_path, a=1) == "SELECT\n  1"
+
+        file_path.write_text("SELECT {{ a }}, 2 -- changed")
+        os.utime(file_path, (0, 0))
+        assert (
+            render(file_path.name, template_folder=tmp_path, format=False, a=1)
+            == "SELECT 1, 2 -- changed"
+        )
+
     def test_qualify_table_references_in_file(self, tmp_path):
         query = "SELECT * FROM test LEFT JOIN other.joined_query"
         query_path = tmp_path / "project" / "dataset" / "test"
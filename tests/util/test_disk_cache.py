@@ -0,0 +1,49 @@
+import os
+import time
+
+from bigquery_etl.util.disk_cache import DiskCache, cache_dir
+
+
+class TestDiskCache:
+    def test_cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("BQETL_CACHE_DIR", str(tmp_path))
+        assert cache_dir() == tmp_path
+
+    def test_get_set(self, tmp_path):
+        cache = DiskCache("test", directory=tmp_path)
+        key = DiskCache.key("SELECT 1", {"project": "test"})
+
+        assert cache.get(key) is None
+        assert cache.get(key, default={}) == {}
+
+        cache.set(key, {"valid": True})
+        assert cache.get(key) == {"valid": True}
+        assert DiskCache("test", directory=tmp_path).get(key) == {"valid": True}
+        assert DiskCache("other", directory=tmp_path).get(key) is None
+
+        cache.delete(key)
+        assert cache.get(key) is None
+
+    def test_key(self):
+        assert DiskCache.key({"a": 1, "b": 2}) == DiskCache.key({"b": 2, "a": 1})
+        assert DiskCache.key("a") != DiskCache.key("b")
+
+    def test_ttl(self, tmp_path):
+        cache = DiskCache("test", ttl=60, directory=tmp_path)
+        cache.set("expired", 1)
+        cache.set("fresh", 2)
+        expired_path = cache._path("expired")
+        os.utime(expired_path, (time.time() - 120, time.time() - 120))
+
+        assert cache.get("expired") is None
+        assert not expired_path.exists()
+        assert cache.get("fresh") == 2
+
+    def test_evict_max_size(self, tmp_path):
+        cache = DiskCache("test", max_size=10, directory=tmp_path)
+        for i in range(5):
+            cache.set(f"key{i}", "x" * 5)
+            os.utime(cache._path(f"key{i}"), (time.time() + i, time.time() + i))
+
+        cache.evict()
+        assert [cache.get(f"key{i}") for i in range(5)] == [None] * 4 + ["x" * 5]
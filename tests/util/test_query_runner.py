@@ -0,0 +1,149 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from google.api_core.exceptions import BadRequest
+from google.cloud import bigquery
+
+from bigquery_etl.util.query_runner import (
+    QueryRunner,
+    UnsupportedQueryArguments,
+    query_job_config,
+)
+
+BACKFILL_ARGUMENTS = [
+    "query",
+    "--use_legacy_sql=false",
+    "--replace",
+    "--max_rows=0",
+    "--project_id=test-project",
+    "--format=none",
+    "--parameter=submission_date:DATE:2021-01-05",
+    "--parameter=conversion_window:INT64:30",
+    "--destination_table=moz-fx-data-shared-prod:telemetry_derived.query_v1$20210105",
+    "--session_id=session",
+]
+
+
+class TestQueryRunner:
+    def test_query_job_config(self):
+        project, location, job_config = query_job_config(BACKFILL_ARGUMENTS)
+
+        assert project == "test-project"
+        assert location is None
+        assert job_config.use_legacy_sql is False
+        assert job_config.dry_run is False
+        assert job_config.write_disposition == "WRITE_TRUNCATE"
+        assert job_config.destination == bigquery.TableReference.from_string(
+            "moz-fx-data-shared-prod.telemetry_derived.query_v1$20210105"
+        )
+        assert [p.to_api_repr() for p in job_config.query_parameters] == [
+            bigquery.ScalarQueryParameter(
+                "submission_date", "DATE", "2021-01-05"
+            ).to_api_repr(),
+            bigquery.ScalarQueryParameter(
+                "conversion_window", "INT64", "30"
+            ).to_api_repr(),
+        ]
+        assert [(p.key, p.value) for p in job_config.connection_properties] == [
+            ("session_id", "session")
+        ]
+
+    def test_query_job_config_default_dataset(self):
+        _, _, job_config = query_job_config(
+            [
+                "query",
+                "--nouse_legacy_sql",
+                "--format=none",
+                "--append_table",
+                "--noreplace",
+                "--project_id=test-project",
+                "--dataset_id=test",
+                "--destination_table=query_v1",
+            ]
+        )
+
+        assert job_config.default_dataset == bigquery.DatasetReference(
+            "test-project", "test"
+        )
+        assert job_config.destination == bigquery.TableReference.from_string(
+            "test-project.test.query_v1"
+        )
+        assert job_config.write_disposition == "WRITE_APPEND"
+
+    @pytest.mark.parametrize(
+        "arguments",
+        [
+            # results are printed by bq
+            ["--use_legacy_sql=false", "--project_id=test-project"],
+            # project may be set in .bigqueryrc
+            ["--use_legacy_sql=false", "--format=none"],
+            # legacy SQL is the bq default
+            ["--format=none", "--project_id=test-project"],
+            [
+                "--nouse_legacy_sql",
+                "--format=none",
+                "--project_id=p",
+                "--max_rows",
+                "0",
+            ],
+            ["--nouse_legacy_sql", "--format=none", "--project_id=p", "--unknown=1"],
+            [
+                "--nouse_legacy_sql",
+                "--format=none",
+                "--project_id=p",
+                "--parameter=ids:ARRAY<INT64>:[1]",
+            ],
+        ],
+    )
+    def test_query_job_config_unsupported(self, arguments):
+        with pytest.raises(UnsupportedQueryArguments):
+            query_job_config(arguments)
+
+    def test_run_unsupported_arguments_with_bq(self):
+        runner = QueryRunner()
+        with patch("subprocess.check_call") as check_call:
+            runner.run(["query", "--project_id=test-project"], "SELECT 1")
+
+        assert check_call.call_args.args == (
+            ["bq", "query", "--project_id=test-project"],
+        )
+
+    def test_run_shares_client(self):
+        job = Mock()
+        job.done.side_effect = [False, True, True]
+        job.exception.return_value = None
+
+        runner = QueryRunner(poll_interval=0)
+        with patch("google.cloud.bigquery.Client") as client:
+            client.return_value.query.return_value = job
+            future = runner.submit(BACKFILL_ARGUMENTS, "SELECT 1")
+            assert future.result(timeout=5) is job
+            assert runner.run(BACKFILL_ARGUMENTS, "SELECT 2") is job
+
+        client.assert_called_once_with("test-project")
+        query_calls = client.return_value.query.call_args_list
+        assert [call.args[0] for call in query_calls] == ["SELECT 1", "SELECT 2"]
+        assert query_calls[0].kwargs["project"] == "test-project"
+
+    def test_run_failed_job(self):
+        job = Mock()
+        job.done.return_value = True
+        job.exception.return_value = BadRequest("invalid query")
+
+        runner = QueryRunner(poll_interval=0)
+        with patch("google.cloud.bigquery.Client") as client:
+            client.return_value.query.return_value = job
+            with pytest.raises(BadRequest):
+                runner.run(BACKFILL_ARGUMENTS, "SELECT 1")
+
+    def test_dry_run(self, capsys):
+        job = Mock(total_bytes_processed=100)
+
+        runner = QueryRunner()
+        with patch("google.cloud.bigquery.Client") as client:
+            client.return_value.query.return_value = job
+            assert runner.run(BACKFILL_ARGUMENTS + ["--dry_run"], "SELECT 1") is job
+
+        assert client.return_value.query.call_args.kwargs["job_config"].dry_run
+        assert not job.done.called
+        assert "will process 100 bytes" in capsys.readouterr().out
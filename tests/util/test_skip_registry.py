@@ -0,0 +1,93 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from bigquery_etl.util.skip_registry import PathMatcher, SkipRegistry, glob_to_regex
+
+CONFIG = {
+    ("default", "sql_dir"): "sql",
+    ("default", "test_project"): "test-project",
+    ("dry_run", "skip"): [
+        "sql/moz-fx-data-shared-prod/telemetry_derived/clients_v1/query.sql",
+        "sql/moz-fx-data-shared-prod/search/**/*.sql",
+    ],
+    ("render", "skip"): [
+        "sql/moz-fx-data-shared-prod/telemetry/events/view.sql",
+    ],
+    ("view", "publish", "skip"): ["sql/*/monitoring/*/view.sql"],
+}
+
+
+def get_config(*keys, fallback=None):
+    return CONFIG.get(keys, fallback)
+
+
+@pytest.fixture(autouse=True)
+def config():
+    with patch("bigquery_etl.util.skip_registry.ConfigLoader.get", get_config):
+        yield
+
+
+class TestSkipRegistry:
+    @pytest.mark.parametrize(
+        "pattern,regex",
+        [
+            ("sql/*.sql", r"sql/[^/]*\.sql"),
+            ("sql/q?ery.sql", r"sql/q[^/]ery\.sql"),
+            ("sql/[!a]b.sql", r"sql/[^a]b\.sql"),
+            ("sql/**/view.sql", r"sql/(?:[^/]+/)*view\.sql"),
+            ("sql/**", r"sql/.*"),
+        ],
+    )
+    def test_glob_to_regex(self, pattern, regex):
+        assert glob_to_regex(pattern) == regex
+
+    def test_path_matcher(self):
+        matcher = PathMatcher(["sql/*/telemetry/**/view.sql", "/tmp/query.sql"])
+
+        assert "sql/moz-fx-data-shared-prod/telemetry/events/view.sql" in matcher
+        assert "sql/moz-fx-data-shared-prod/telemetry/a/b/view.sql" in matcher
+        assert Path("/repo/sql/project/telemetry/events/view.sql") in matcher
+        assert "./sql/project/telemetry/events/view.sql" in matcher
+        assert "/tmp/query.sql" in matcher
+
+        assert "sql/project/telemetry/events/query.sql" not in matcher
+        assert "sql/project/other/telemetry/events/view.sql" not in matcher
+        assert "mysql/project/telemetry/events/view.sql" not in matcher
+        assert "/repo/tmp/query.sql" not in matcher
+        assert "anything" not in PathMatcher([])
+
+    def test_get(self):
+        matcher = SkipRegistry.get("view", "publish", "skip")
+
+        assert matcher is SkipRegistry.get("view", "publish", "skip")
+        assert "sql/moz-fx-data-shared-prod/monitoring/jobs/view.sql" in matcher
+        assert "sql/moz-fx-data-shared-prod/telemetry/jobs/view.sql" not in matcher
+        assert "anything" not in SkipRegistry.get("format", "skip")
+
+    def test_dry_run(self):
+        matcher = SkipRegistry.dry_run("/tmp/sql")
+
+        assert "/tmp/sql/moz-fx-data-shared-prod/search/a/query.sql" in matcher
+        assert "/tmp/sql/moz-fx-data-shared-prod/search/query.sql" in matcher
+        assert "/repo/sql/moz-fx-data-shared-prod/search/query.sql" not in matcher
+        # queries deployed to stage
+        assert (
+            "sql/test-project/telemetry_derived_moz_fx_data_shared_prod/clients_v1/query.sql"
+            in matcher
+        )
+        assert (
+            "sql/moz-fx-data-shared-prod/telemetry_derived/clients_v2/query.sql"
+            not in matcher
+        )
+
+    def test_render(self):
+        matcher = SkipRegistry.render()
+
+        assert "sql/moz-fx-data-shared-prod/telemetry/events/view.sql" in matcher
+        assert (
+            "sql/test-project/telemetry_moz_fx_data_shared_prod/events/view.sql"
+            in matcher
+        )
+        assert "sql/test-project/telemetry/other/view.sql" not in matcher
@@ -0,0 +1,90 @@
+from pathlib import Path
+
+from bigquery_etl.util.sql_catalog import SqlCatalog
+
+
+class TestSqlCatalog:
+    def _write(self, path: Path, content="SELECT 1"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def test_files(self, tmp_path):
+        sql_dir = tmp_path / "sql"
+        self._write(
+            sql_dir / "moz-fx-data-test-project" / "test" / "foo_v1" / "query.sql"
+        )
+        self._write(
+            sql_dir / "moz-fx-data-test-project" / "test" / "foo_v1" / "metadata.yaml"
+        )
+        self._write(sql_dir / "moz-fx-data-test-project" / "test" / "bar" / "view.sql")
+        self._write(sql_dir / "other-project" / "test" / "foo_v1" / "query.sql")
+        self._write(sql_dir / "other-project" / ".hidden" / "foo_v1" / "query.sql")
+
+        catalog = SqlCatalog.for_path(sql_dir)
+
+        assert len(catalog.files(["*.sql"])) == 3
+        assert len(catalog.files(["query.sql", "metadata.yaml"])) == 3
+        assert catalog.files(["view.sql"]) == [
+            sql_dir / "moz-fx-data-test-project" / "test" / "bar" / "view.sql"
+        ]
+        assert catalog.files(["query.sql"], subdir="other-project") == [
+            sql_dir / "other-project" / "test" / "foo_v1" / "query.sql"
+        ]
+
+    def test_artifacts(self, tmp_path):
+        sql_dir = tmp_path / "sql"
+        self._write(
+            sql_dir / "moz-fx-data-test-project" / "test" / "foo_v1" / "query.sql"
+        )
+        self._write(sql_dir / "moz-fx-data-test-project" / "test" / "bar" / "view.sql")
+
+        artifacts = dict(SqlCatalog.for_path(sql_dir).artifacts(["*.sql"]))
+        assert artifacts == {
+            ("moz-fx-data-test-project", "test", "foo_v1"): [
+                sql_dir / "moz-fx-data-test-project" / "test" / "foo_v1" / "query.sql"
+            ],
+            ("moz-fx-data-test-project", "test", "bar"): [
+                sql_dir / "moz-fx-data-test-project" / "test" / "bar" / "view.sql"
+            ],
+        }
+
+        artifacts = dict(
+            SqlCatalog.for_path(sql_dir).artifacts(
+                ["*.sql"], key_filter=lambda key: key[2] == "bar"
+            )
+        )
+        assert list(artifacts) == [("moz-fx-data-test-project", "test", "bar")]
+
+    def test_catalog_is_shared_and_refreshed(self, tmp_path):
+        sql_dir = tmp_path / "sql"
+        self._write(
+            sql_dir / "moz-fx-data-test-project" / "test" / "foo_v1" / "query.sql"
+        )
+
+        catalog = SqlCatalog.for_path(sql_dir)
+        assert SqlCatalog.for_path(sql_dir)._files is catalog._files
+        assert not catalog.is_stale()
+
+        self._write(
+            sql_dir / "moz-fx-data-test-project" / "test" / "bar_v1" / "query.sql"
+        )
+        assert catalog.is_stale()
+        assert len(SqlCatalog.for_path(sql_dir).files(["query.sql"])) == 2
+
+    def test_paths_relative_to_root(self, tmp_path, monkeypatch):
+        self._write(
+            tmp_path
+            / "sql"
+            / "moz-fx-data-test-project"
+            / "test"
+            / "foo_v1"
+            / "query.sql"
+        )
+        monkeypatch.chdir(tmp_path)
+
+        assert SqlCatalog.for_path("sql").files(["query.sql"]) == [
+            Path("sql/moz-fx-data-test-project/test/foo_v1/query.sql")
+        ]
+        assert SqlCatalog.for_path(tmp_path / "sql").files(["query.sql"]) == [
+            tmp_path / "sql/moz-fx-data-test-project/test/foo_v1/query.sql"
+        ]
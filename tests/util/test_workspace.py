@@ -0,0 +1,40 @@
+import os
+
+from bigquery_etl.util.workspace import link_tree, replace_text
+
+
+class TestWorkspace:
+    def test_link_tree(self, tmp_path):
+        src = tmp_path / "src"
+        (src / "project" / "dataset" / "table_v1").mkdir(parents=True)
+        (src / "project" / "dataset" / "table_v1" / "query.sql").write_text("SELECT 1")
+        (src / "project" / "empty").mkdir()
+
+        dst = tmp_path / "dst"
+        link_tree(src, dst)
+
+        query_file = dst / "project" / "dataset" / "table_v1" / "query.sql"
+        assert query_file.read_text() == "SELECT 1"
+        assert os.path.samefile(
+            query_file, src / "project" / "dataset" / "table_v1" / "query.sql"
+        )
+        assert (dst / "project" / "empty").is_dir()
+
+    def test_replace_text_does_not_write_through_links(self, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "query.sql").write_text("SELECT 1")
+        os.chmod(src / "query.sql", 0o644)
+
+        dst = tmp_path / "dst"
+        link_tree(src, dst)
+        replace_text(dst / "query.sql", "SELECT 2")
+
+        assert (dst / "query.sql").read_text() == "SELECT 2"
+        assert (src / "query.sql").read_text() == "SELECT 1"
+        assert os.stat(dst / "query.sql").st_mode & 0o777 == 0o644
+        assert sorted(os.listdir(dst)) == ["query.sql"]
+
+    def test_replace_text_new_file(self, tmp_path):
+        replace_text(tmp_path / "query.sql", "SELECT 1")
+        assert (tmp_path / "query.sql").read_text() == "SELECT 1"